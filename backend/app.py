@@ -1,8 +1,17 @@
 import os
 from flask import Flask, send_from_directory
 from flask_cors import CORS
+from .cli import register_cli
 from .db import init_db
+from .db_profile import engine_options_from_env, sqlite_pragmas_from_env
+from .instrumentation import instrumentation
+from .profiling import profiler
 from .controllers import register_controllers
+from .services import rollups
+from .services.auth import DEFAULT_SECRET_KEY
+from .services.jobs import job_runner
+from .services.reminders import reminder_scheduler
+from .services.stats_cache import stats_cache
 
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -47,18 +56,68 @@ def create_app():
     # Use dist directory if it exists (production), otherwise fallback to source
     static_folder = FRONTEND_DIST_DIR if os.path.exists(FRONTEND_DIST_DIR) else FRONTEND_DIR
     app = Flask(__name__, static_folder=static_folder, static_url_path='')
+    database_url = _resolve_database_url()
     app.config.from_mapping(
-        SQLALCHEMY_DATABASE_URI=_resolve_database_url(),
+        SQLALCHEMY_DATABASE_URI=database_url,
+        SQLALCHEMY_ENGINE_OPTIONS=engine_options_from_env(database_url),
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
-        SECRET_KEY=os.getenv("SECRET_KEY", "change-me"),
+        SQLITE_PRAGMAS=sqlite_pragmas_from_env(),
+        SECRET_KEY=os.getenv("SECRET_KEY", DEFAULT_SECRET_KEY),
+        LOG_LEVEL=os.getenv("LOG_LEVEL", "INFO").upper(),
+        STATS_ENGINE=os.getenv("STATS_ENGINE", "python").lower(),
+        STATS_CACHE_SIZE=int(os.getenv("STATS_CACHE_SIZE", "1024")),
+        AUTO_MIGRATE=os.getenv("AUTO_MIGRATE", "1").lower() in {"1", "true", "yes", "on"},
+        AUTH_REQUIRED=os.getenv("AUTH_REQUIRED", "0").lower() in {"1", "true", "yes", "on"},
+        AUTH_TOKEN_MAX_AGE=int(os.getenv("AUTH_TOKEN_MAX_AGE", str(30 * 24 * 3600))),
+        FAVICON_SERVICE_URL=os.getenv(
+            "FAVICON_SERVICE_URL", "https://www.google.com/s2/favicons?sz={size}&domain={domain}"
+        ),
+        FAVICON_CACHE_TTL=int(os.getenv("FAVICON_CACHE_TTL", str(7 * 24 * 3600))),
+        FAVICON_NEGATIVE_TTL=int(os.getenv("FAVICON_NEGATIVE_TTL", "3600")),
+        FAVICON_CACHE_MAX_ENTRIES=int(os.getenv("FAVICON_CACHE_MAX_ENTRIES", "5000")),
+        FAVICON_POOL_SIZE=int(os.getenv("FAVICON_POOL_SIZE", "16")),
+        FAVICON_BATCH_WORKERS=int(os.getenv("FAVICON_BATCH_WORKERS", "8")),
+        FAVICON_BATCH_DEADLINE=float(os.getenv("FAVICON_BATCH_DEADLINE", "8")),
+        FAVICON_BATCH_MAX_URLS=int(os.getenv("FAVICON_BATCH_MAX_URLS", "100")),
+        SUBSCRIPTION_BATCH_MAX_OPERATIONS=int(os.getenv("SUBSCRIPTION_BATCH_MAX_OPERATIONS", "500")),
+        REMINDERS_ENABLED=os.getenv("REMINDERS_ENABLED", "0").lower() in {"1", "true", "yes", "on"},
+        REMINDER_SINK=os.getenv("REMINDER_SINK", "log"),
+        REMINDER_HOUR=int(os.getenv("REMINDER_HOUR", "9")),
+        REMINDER_RESYNC_SECONDS=float(os.getenv("REMINDER_RESYNC_SECONDS", "3600")),
+        ICON_MAX_BYTES=int(os.getenv("ICON_MAX_BYTES", str(2 * 1024 * 1024))),
+        ICON_MAX_PIXELS=int(os.getenv("ICON_MAX_PIXELS", str(4096 * 4096))),
+        ICON_INLINE_MAX_BYTES=int(os.getenv("ICON_INLINE_MAX_BYTES", str(256 * 1024))),
+        INSTRUMENTATION_ENABLED=os.getenv("INSTRUMENTATION_ENABLED", "1").lower() in {"1", "true", "yes", "on"},
+        METRICS_TOKEN=os.getenv("METRICS_TOKEN", ""),
+        PROFILING_TOKEN=os.getenv("PROFILING_TOKEN", ""),
+        PROFILING_SAMPLE_RATE=float(os.getenv("PROFILING_SAMPLE_RATE", "0")),
+        PROFILING_THRESHOLD_MS=float(os.getenv("PROFILING_THRESHOLD_MS", "500")),
+        PROFILING_DIR=os.getenv("PROFILING_DIR", os.path.join(BASE_DIR, "data", "profiles")),
+        PROFILING_MAX_DUMPS=int(os.getenv("PROFILING_MAX_DUMPS", "50")),
+        JOB_WORKERS=int(os.getenv("JOB_WORKERS", "2")),
+        JOB_POLL_SECONDS=float(os.getenv("JOB_POLL_SECONDS", "1")),
+        JOB_RETRY_BASE_SECONDS=float(os.getenv("JOB_RETRY_BASE_SECONDS", "30")),
+        JOB_LEASE_SECONDS=int(os.getenv("JOB_LEASE_SECONDS", "300")),
+        JOB_RETENTION_SECONDS=int(os.getenv("JOB_RETENTION_SECONDS", str(24 * 3600))),
     )
 
+    # Without a level the app logger inherits root's WARNING and startup reports never show.
+    app.logger.setLevel(app.config["LOG_LEVEL"])
+
     # Initialize DB and CORS
     init_db(app)
+    instrumentation.init_app(app)
+    profiler.init_app(app)
+    stats_cache.init_app(app)
+    rollups.init_app(app)
+    reminder_scheduler.init_app(app)
     CORS(app)
 
     # Register API routes via controller layer
     register_controllers(app)
+    register_cli(app)
+    # After the controllers: importing the services registers the job handlers.
+    job_runner.init_app(app)
 
     @app.get("/api/health")
     def health():
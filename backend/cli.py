@@ -0,0 +1,79 @@
+from datetime import date
+
+import click
+from flask.cli import AppGroup
+
+renewals_cli = AppGroup("renewals", help="Billing date maintenance.")
+rollups_cli = AppGroup("rollups", help="Monthly spend rollups.")
+synthetic_cli = AppGroup("synthetic", help="Synthetic data for benchmarks.")
+jobs_cli = AppGroup("jobs", help="Background job queue.")
+
+
+@renewals_cli.command("advance")
+@click.option("--today", type=click.DateTime(formats=["%Y-%m-%d"]), help="Reference day (default: today).")
+def advance_command(today):
+    """Move every past next_billing_date forward to its next billing date."""
+    from .services.renewals import advance_billing_dates
+
+    moved = advance_billing_dates(today.date() if today else date.today())
+    click.echo(f"Advanced {moved} subscription(s).")
+
+
+@rollups_cli.command("backfill")
+@click.option("--user-id", type=int, help="Only this user (default: everyone).")
+def backfill_command(user_id):
+    """Rebuild spend_rollups by replaying billing dates from each start date."""
+    from .db import db
+    from .models import User
+    from .services.rollups import rollup_user
+
+    user_ids = [user_id] if user_id is not None else [uid for (uid,) in db.session.query(User.id)]
+    total = 0
+    for uid in user_ids:
+        total += rollup_user(uid)
+        db.session.commit()
+    click.echo(f"Rolled up {total} subscription(s) for {len(user_ids)} user(s).")
+
+
+@synthetic_cli.command("generate")
+@click.option("--users", type=int, default=1, show_default=True)
+@click.option("--subscriptions", type=int, default=1000, show_default=True, help="Subscriptions per user.")
+@click.option("--seed", type=int, default=0, show_default=True, help="Same seed, same data.")
+@click.option("--icon-ratio", type=float, default=0.3, show_default=True, help="Share of uploaded (data-URL) icons.")
+@click.confirmation_option(
+    prompt="This adds users to the configured database, which also ends anonymous demo access. Continue?"
+)
+def generate_command(users, subscriptions, seed, icon_ratio):
+    """Bulk-create synthetic users with realistic subscriptions (no one can log in as them)."""
+    from .services.synthetic import generate
+
+    user_ids = generate(users=users, subscriptions=subscriptions, seed=seed, icon_ratio=icon_ratio)
+    click.echo(f"Created {len(user_ids)} user(s) with {subscriptions} subscription(s) each: ids {user_ids}.")
+
+
+@jobs_cli.command("run")
+@click.option("--workers", type=int, default=2, show_default=True, help="Worker threads.")
+@click.option("--once", is_flag=True, help="Run the jobs that are due now, then exit.")
+def run_jobs_command(workers, once):
+    """Process background jobs, e.g. in a dedicated process with JOB_WORKERS=0 on the web workers."""
+    import time
+
+    from .services.jobs import job_runner
+
+    if once:
+        click.echo(f"Ran {job_runner.drain()} job(s).")
+        return
+    job_runner.start(workers)
+    click.echo(f"Processing jobs with {workers} worker(s); Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        job_runner.stop()
+
+
+def register_cli(app):
+    app.cli.add_command(renewals_cli)
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(synthetic_cli)
+    app.cli.add_command(jobs_cli)
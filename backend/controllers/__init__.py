@@ -5,12 +5,19 @@ api_bp = Blueprint("api", __name__, url_prefix="/api")
 
 def register_controllers(app):
     # Import controllers so that route handlers are registered on the shared blueprint
+    from . import auth  # noqa: F401
     from . import seed  # noqa: F401
     from . import favicon  # noqa: F401
+    from . import icons  # noqa: F401
     from . import profile  # noqa: F401
     from . import category  # noqa: F401
     from . import subscription  # noqa: F401
     from . import exchange  # noqa: F401
     from . import stats  # noqa: F401
+    from . import renewals  # noqa: F401
+    from . import reminders  # noqa: F401
+    from . import metrics  # noqa: F401
+    from . import profiles  # noqa: F401
+    from . import jobs  # noqa: F401
 
     app.register_blueprint(api_bp)
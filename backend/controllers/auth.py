@@ -0,0 +1,33 @@
+from flask import request
+
+from ..services.auth import authenticate, can_issue_credentials, login_user, logout_user, register_user
+from ..services.profile import serialize_profile
+from . import api_bp
+
+
+@api_bp.post("/auth/register")
+def register():
+    if not can_issue_credentials():
+        return {"error": "secret_key_not_configured"}, 503
+    data = request.json or {}
+    result, status = register_user(data)
+    if status != 201:
+        return result, status
+    return {**login_user(result), "profile": serialize_profile(result)}, 201
+
+
+@api_bp.post("/auth/login")
+def login():
+    if not can_issue_credentials():
+        return {"error": "secret_key_not_configured"}, 503
+    data = request.json or {}
+    user = authenticate(data.get("username"), data.get("password"))
+    if not user:
+        return {"error": "invalid_credentials"}, 401
+    return {**login_user(user), "profile": serialize_profile(user)}
+
+
+@api_bp.post("/auth/logout")
+def logout():
+    logout_user()
+    return {"status": "ok"}
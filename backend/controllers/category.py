@@ -1,20 +1,20 @@
 from flask import request
 
 from ..services.category import list_categories, create_category, delete_category, serialize_category
-from ..services.user import get_or_create_demo_user
+from ..services.auth import current_user
+from ..services.conditional import versioned_response
 from . import api_bp
 
 
 @api_bp.get("/categories")
 def get_categories():
-    user = get_or_create_demo_user()
-    cats = list_categories(user)
-    return [serialize_category(c) for c in cats]
+    user = current_user()
+    return versioned_response(user, lambda: [serialize_category(c) for c in list_categories(user)])
 
 
 @api_bp.post("/categories")
 def post_category():
-    user = get_or_create_demo_user()
+    user = current_user()
     data = request.json or {}
     category = create_category(user, data)
     return serialize_category(category), 201
@@ -22,6 +22,6 @@ def post_category():
 
 @api_bp.delete("/categories/<int:cid>")
 def remove_category(cid: int):
-    user = get_or_create_demo_user()
+    user = current_user()
     delete_category(user, cid)
     return {"status": "deleted"}
@@ -1,20 +1,20 @@
 from flask import request
 
 from ..services.exchange import list_exchange_rates, upsert_exchange_rate, serialize_exchange_rate
-from ..services.user import get_or_create_demo_user
+from ..services.auth import current_user
+from ..services.conditional import versioned_response
 from . import api_bp
 
 
 @api_bp.get("/exchange")
 def get_exchange_rates():
-    user = get_or_create_demo_user()
-    rows = list_exchange_rates(user)
-    return [serialize_exchange_rate(row) for row in rows]
+    user = current_user()
+    return versioned_response(user, lambda: [serialize_exchange_rate(row) for row in list_exchange_rates(user)])
 
 
 @api_bp.post("/exchange")
 def post_exchange_rate():
-    user = get_or_create_demo_user()
+    user = current_user()
     data = request.json or {}
     upsert_exchange_rate(user, data)
     return {"status": "ok"}
@@ -1,6 +1,6 @@
-from flask import request
+from flask import current_app, request
 
-from ..services.favicon import fetch_favicon_payload, InvalidURLError, FetchFailedError
+from ..services.favicon import fetch_favicon_payload, resolve_favicons, InvalidURLError, FetchFailedError
 from . import api_bp
 
 
@@ -17,3 +17,14 @@ def generate_favicon():
     except FetchFailedError:
         return {"error": "fetch_failed"}, 502
     return payload
+
+
+@api_bp.post("/favicon/batch")
+def generate_favicons():
+    data = request.json or {}
+    urls = data.get("urls")
+    if not isinstance(urls, list) or not urls:
+        return {"error": "urls_required"}, 400
+    if len(urls) > current_app.config["FAVICON_BATCH_MAX_URLS"]:
+        return {"error": "too_many_urls"}, 400
+    return {"results": resolve_favicons(urls, fallback_color=data.get("fallback_color"))}
@@ -0,0 +1,25 @@
+from flask import abort, make_response, request
+
+from ..services.icons import get_icon
+from . import api_bp
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+# Icons are only ever used as <img> sources. Icons stored before SVG uploads were
+# refused may still hold script, so never let one run on this origin.
+RASTER_TYPES = {"image/png", "image/webp", "image/jpeg", "image/gif", "image/bmp", "image/x-icon"}
+
+
+@api_bp.get("/icons/<string:digest>")
+def read_icon(digest: str):
+    icon = get_icon(digest, size=request.args.get("size", type=int))
+    if not icon:
+        abort(404)
+    response = make_response(icon.data)
+    response.headers["Content-Type"] = icon.content_type
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE
+    response.headers["Content-Security-Policy"] = "sandbox"
+    response.headers["X-Content-Type-Options"] = "nosniff"
+    if icon.content_type not in RASTER_TYPES:
+        response.headers["Content-Disposition"] = "attachment"
+    response.set_etag(icon.hash)
+    return response.make_conditional(request)
@@ -0,0 +1,36 @@
+from flask import request
+
+from ..models import Job
+from ..services.auth import current_user
+from ..services.jobs import STATUSES, job_runner, job_to_dict
+from . import api_bp
+
+RECENT_JOBS = 50
+
+
+@api_bp.get("/jobs")
+def list_jobs():
+    user = current_user()
+    q = Job.query.filter_by(user_id=user.id)
+    status = request.args.get("status")
+    if status:
+        if status not in STATUSES:
+            return {"error": "invalid_status"}, 400
+        q = q.filter_by(status=status)
+    jobs = q.order_by(Job.created_at.desc(), Job.id.desc()).limit(RECENT_JOBS).all()
+    return {"jobs": [job_to_dict(job) for job in jobs]}
+
+
+@api_bp.get("/jobs/<int:job_id>")
+def get_job(job_id: int):
+    user = current_user()
+    job = Job.query.filter_by(id=job_id, user_id=user.id).first()
+    if job is None:
+        return {"error": "not_found"}, 404
+    return job_to_dict(job)
+
+
+@api_bp.get("/jobs/status")
+def jobs_status():
+    current_user()
+    return job_runner.info()
@@ -0,0 +1,22 @@
+import hmac
+
+from flask import current_app, request
+
+from ..instrumentation import instrumentation
+from . import api_bp
+
+
+def _authorized(token: str) -> bool:
+    header = request.headers.get("Authorization", "")
+    value = header[7:].strip() if header.lower().startswith("bearer ") else request.args.get("token")
+    return value is not None and hmac.compare_digest(value.encode(), token.encode())
+
+
+@api_bp.get("/metrics")
+def metrics():
+    token = current_app.config.get("METRICS_TOKEN")
+    if not instrumentation.enabled or not token:
+        return {"error": "metrics_disabled"}, 404
+    if not _authorized(token):
+        return {"error": "forbidden"}, 403
+    return instrumentation.render_prometheus(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
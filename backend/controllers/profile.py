@@ -1,19 +1,20 @@
 from flask import request
 
 from ..services.profile import serialize_profile, update_profile
-from ..services.user import get_or_create_demo_user
+from ..services.auth import current_user
+from ..services.conditional import versioned_response
 from . import api_bp
 
 
 @api_bp.get("/profile")
 def get_profile():
-    user = get_or_create_demo_user()
-    return serialize_profile(user)
+    user = current_user()
+    return versioned_response(user, lambda: serialize_profile(user))
 
 
 @api_bp.put("/profile")
 def put_profile():
-    user = get_or_create_demo_user()
+    user = current_user()
     data = request.json or {}
     body, status = update_profile(user, data)
     return body, status
@@ -0,0 +1,29 @@
+from flask import request, send_file
+
+from ..profiling import profiler
+from . import api_bp
+
+
+def _authorized() -> bool:
+    return profiler.authorized(request.headers.get("X-Profile-Token") or request.args.get("token"))
+
+
+@api_bp.get("/profiles")
+def list_profiles():
+    if not profiler.token:
+        return {"error": "profiling_disabled"}, 404
+    if not _authorized():
+        return {"error": "forbidden"}, 403
+    return {"directory": profiler.directory, "max_dumps": profiler.max_dumps, "dumps": profiler.list_dumps()}
+
+
+@api_bp.get("/profiles/<name>")
+def download_profile(name: str):
+    if not profiler.token:
+        return {"error": "profiling_disabled"}, 404
+    if not _authorized():
+        return {"error": "forbidden"}, 403
+    path = profiler.dump_path(name)
+    if path is None:
+        return {"error": "not_found"}, 404
+    return send_file(path, mimetype="application/octet-stream", as_attachment=True, download_name=name)
@@ -0,0 +1,9 @@
+from ..services.auth import current_user
+from ..services.reminders import reminder_scheduler
+from . import api_bp
+
+
+@api_bp.get("/reminders/status")
+def reminders_status():
+    current_user()
+    return reminder_scheduler.info()
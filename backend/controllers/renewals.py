@@ -0,0 +1,13 @@
+from flask import request
+
+from ..services.auth import current_user
+from ..services.conditional import versioned_response
+from ..services.renewals import DEFAULT_DAYS, upcoming_renewals
+from . import api_bp
+
+
+@api_bp.get("/renewals")
+def get_renewals():
+    user = current_user()
+    days = request.args.get("days", DEFAULT_DAYS, type=int)
+    return versioned_response(user, lambda: upcoming_renewals(user, days), per_day=True)
@@ -1,7 +1,7 @@
 from flask import request
 
 from ..services.seed import seed_defaults
-from ..services.user import get_or_create_demo_user
+from ..services.auth import current_user
 from . import api_bp
 
 
@@ -11,6 +11,6 @@ def seed():
     if request.method == "OPTIONS":  # Preflight passthrough
         return {"status": "ok"}
 
-    user = get_or_create_demo_user()
+    user = current_user()
     seed_defaults(user)
     return {"status": "seeded"}
@@ -1,20 +1,51 @@
 from flask import request
 
+from ..services.rollups import DEFAULT_MONTHS, spend_history
 from ..services.stats import build_summary, stats_by_category
-from ..services.user import get_or_create_demo_user
+from ..services.stats_cache import stats_cache
+from ..services.auth import current_user
+from ..services.conditional import versioned_response
+from ..services.helpers import to_int
 from . import api_bp
 
 
 @api_bp.get("/stats/summary")
 def summary():
-    user = get_or_create_demo_user()
+    user = current_user()
     period = request.args.get("period", "month").lower()
     category_id = request.args.get("category_id")
-    return build_summary(user, period, category_id)
+    cache_category = None if category_id in (None, "", "all") else category_id
+    return versioned_response(user, lambda: stats_cache.get_or_compute(
+        user, "summary", period, cache_category,
+        lambda: build_summary(user, period, category_id),
+    ), per_day=True)
 
 
 @api_bp.get("/stats/by-category")
 def by_category():
-    user = get_or_create_demo_user()
+    user = current_user()
     period = request.args.get("period", "month").lower()
-    return stats_by_category(user, period)
+    return versioned_response(user, lambda: stats_cache.get_or_compute(
+        user, "by-category", period, None,
+        lambda: stats_by_category(user, period),
+    ), per_day=True)
+
+
+@api_bp.get("/stats/history")
+def history():
+    user = current_user()
+    months = request.args.get("months", DEFAULT_MONTHS, type=int)
+    category_id = request.args.get("category_id")
+    if category_id in (None, "", "all"):
+        category_id = None
+    else:
+        category_id = to_int(category_id)
+        if category_id is None:
+            return {"error": "invalid_category_id"}, 400
+    return versioned_response(user, lambda: spend_history(user, months, category_id), per_day=True)
+
+
+@api_bp.get("/stats/cache")
+def cache_info():
+    current_user()
+    return stats_cache.info()
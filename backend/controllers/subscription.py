@@ -1,58 +1,130 @@
-from flask import request
+from flask import Response, request, stream_with_context
 
 from ..services.subscription import (
+    DEFAULT_PAGE_SIZE,
+    InvalidCursorError,
     list_subscriptions,
+    page_subscriptions,
+    parse_fields,
     create_subscription,
     get_subscription,
     update_subscription,
     delete_subscription,
     subscription_to_dict,
 )
-from ..services.user import get_or_create_demo_user
+from ..services.auth import current_user
+from ..services.conditional import versioned_response
+from ..services.icons import IconTooLargeError, InvalidIconError
+from ..services.subscription_batch import BatchError, apply_batch
+from ..services.transfer import FORMATS, ImportStreamError, detect_format, export_subscriptions, import_subscriptions
 from . import api_bp
 
 
+def _icon_error(exc):
+    if isinstance(exc, IconTooLargeError):
+        return {"error": "icon_too_large"}, 413
+    return {"error": "invalid_icon"}, 400
+
+
 @api_bp.get("/subscriptions")
 def get_subscriptions():
-    user = get_or_create_demo_user()
+    user = current_user()
+    # Trial state and display price depend on today's date.
+    return versioned_response(user, lambda: _subscription_list(user), per_day=True)
+
+
+def _subscription_list(user):
     category_id = request.args.get("category_id")
-    subs = list_subscriptions(user, category_id)
-    return [subscription_to_dict(s) for s in subs]
+    fields = parse_fields(request.args.get("fields"))
+    if "limit" not in request.args and "cursor" not in request.args:
+        subs = list_subscriptions(user, category_id)
+        return [subscription_to_dict(s, fields=fields) for s in subs]
+
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    try:
+        subs, next_cursor = page_subscriptions(user, category_id, limit=limit, cursor=request.args.get("cursor"))
+    except InvalidCursorError:
+        return {"error": "invalid_cursor"}, 400
+    return {"items": [subscription_to_dict(s, fields=fields) for s in subs], "next_cursor": next_cursor}
 
 
 @api_bp.post("/subscriptions")
 def post_subscription():
-    user = get_or_create_demo_user()
+    user = current_user()
     data = request.json or {}
-    sub = create_subscription(user, data)
+    try:
+        sub = create_subscription(user, data)
+    except (IconTooLargeError, InvalidIconError) as exc:
+        return _icon_error(exc)
     return subscription_to_dict(sub, detail=True), 201
 
 
 @api_bp.get("/subscriptions/<int:sid>")
 def read_subscription(sid: int):
-    user = get_or_create_demo_user()
-    sub = get_subscription(user, sid)
-    return subscription_to_dict(sub, detail=True)
+    user = current_user()
+    return versioned_response(
+        user, lambda: subscription_to_dict(get_subscription(user, sid), detail=True), per_day=True
+    )
 
 
 @api_bp.put("/subscriptions/<int:sid>")
 def put_subscription(sid: int):
-    user = get_or_create_demo_user()
+    user = current_user()
     data = request.json or {}
-    sub = update_subscription(user, sid, data, partial=False)
+    try:
+        sub = update_subscription(user, sid, data, partial=False)
+    except (IconTooLargeError, InvalidIconError) as exc:
+        return _icon_error(exc)
     return subscription_to_dict(sub, detail=True)
 
 
 @api_bp.patch("/subscriptions/<int:sid>")
 def patch_subscription(sid: int):
-    user = get_or_create_demo_user()
+    user = current_user()
     data = request.json or {}
-    sub = update_subscription(user, sid, data, partial=True)
+    try:
+        sub = update_subscription(user, sid, data, partial=True)
+    except (IconTooLargeError, InvalidIconError) as exc:
+        return _icon_error(exc)
     return subscription_to_dict(sub, detail=True)
 
 
 @api_bp.delete("/subscriptions/<int:sid>")
 def remove_subscription(sid: int):
-    user = get_or_create_demo_user()
+    user = current_user()
     delete_subscription(user, sid)
     return {"status": "deleted"}
+
+
+@api_bp.post("/subscriptions/batch")
+def batch_subscriptions():
+    user = current_user()
+    data = request.json or {}
+    try:
+        results = apply_batch(user, data.get("operations"))
+    except BatchError as exc:
+        return {"error": exc.code, "index": exc.index}, exc.status
+    return {"results": results}
+
+
+@api_bp.post("/subscriptions/import")
+def import_subscription_rows():
+    user = current_user()
+    fmt = detect_format(request.args.get("format"), request.content_type)
+    if fmt is None:
+        return {"error": "unsupported_format"}, 415
+    try:
+        return import_subscriptions(user, request.stream, fmt)
+    except ImportStreamError as exc:
+        return {"error": exc.code, "row": exc.row, **exc.report}, 400
+
+
+@api_bp.get("/subscriptions/export")
+def export_subscription_rows():
+    user = current_user()
+    fmt = detect_format(request.args.get("format", "csv"), None)
+    if fmt is None:
+        return {"error": "unsupported_format"}, 400
+    response = Response(stream_with_context(export_subscriptions(user, fmt)), mimetype=FORMATS[fmt])
+    response.headers["Content-Disposition"] = f"attachment; filename=subscriptions.{fmt}"
+    return response
@@ -1,41 +1,105 @@
+import logging
+import os
+import tempfile
+import time
+
+from flask.logging import default_handler
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
-from sqlalchemy import inspect, text
+from flask_migrate import Migrate, upgrade
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+
+from .db_profile import install_sqlite_profile, profile_report
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
 
 db = SQLAlchemy()
-migrate = Migrate()
+migrate = Migrate(directory=MIGRATIONS_DIR)
+
+_head_revision = None
+
+
+def head_revision() -> str:
+    global _head_revision
+    if _head_revision is None:
+        _head_revision = ScriptDirectory(MIGRATIONS_DIR).get_current_head()
+    return _head_revision
+
+
+def current_revision():
+    """Return the revision stored in alembic_version, or None for an unversioned database."""
+    try:
+        with db.engine.connect() as conn:
+            return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except Exception:
+        return None
+
+
+def _lock_path() -> str:
+    url = db.engine.url
+    if url.get_backend_name() == "sqlite" and url.database and url.database != ":memory:":
+        return f"{url.database}.migrate.lock"
+    return os.path.join(tempfile.gettempdir(), "roo-migrate.lock")
+
+
+def ensure_schema(auto_migrate: bool = True) -> str:
+    """Bring the database schema to the head revision.
+
+    The fast path is a single SELECT on alembic_version. Only when the stored
+    revision is behind do we take an exclusive file lock, so that several
+    workers booting against the same database run the upgrade once.
+    """
+    head = head_revision()
+    if current_revision() == head:
+        return "current"
+    if not auto_migrate:
+        return "outdated"
+
+    lock_file = open(_lock_path(), "a")
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        # Another worker may have finished the upgrade while we waited for the lock.
+        if current_revision() == head:
+            return "current"
+        upgrade(directory=MIGRATIONS_DIR)
+        return "upgraded"
+    finally:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
 
 
 def init_db(app):
     db.init_app(app)
     migrate.init_app(app, db)
-    # Dev convenience: auto create tables if not present
     with app.app_context():
-        # Import models before create_all so metadata is populated
+        # Import models so metadata is populated for Flask-Migrate
         from . import models  # noqa: F401
 
-        try:
-            db.create_all()
-        except Exception:
-            pass
-
-        try:
-            inspector = inspect(db.engine)
-            columns = {col['name'] for col in inspector.get_columns('subscriptions')}
-        except Exception:
-            columns = set()
-
-        if 'disabled' not in columns:
-            try:
-                db.session.execute(text('ALTER TABLE subscriptions ADD COLUMN disabled BOOLEAN DEFAULT 0'))
-                db.session.execute(text('UPDATE subscriptions SET disabled = 0 WHERE disabled IS NULL'))
-                db.session.commit()
-            except Exception:
-                db.session.rollback()
-
-        if 'logo_url' not in columns:
-            try:
-                db.session.execute(text('ALTER TABLE subscriptions ADD COLUMN logo_url TEXT'))
-                db.session.commit()
-            except Exception:
-                db.session.rollback()
+        install_sqlite_profile(db.engine, app.config.get("SQLITE_PRAGMAS", {}))
+        started = time.perf_counter()
+        status = ensure_schema(app.config.get("AUTO_MIGRATE", True))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        app.config["DB_PROFILE"] = profile_report(db.engine)
+
+    if logging.getLogger().handlers and default_handler in app.logger.handlers:
+        # Running migrations configured root logging (migrations/env.py); log there only, not twice.
+        app.logger.removeHandler(default_handler)
+
+    app.config["SCHEMA_SETUP"] = {"status": status, "revision": head_revision(), "ms": round(elapsed_ms, 2)}
+    if status == "outdated":
+        app.logger.warning(
+            "Database schema is behind revision %s; run `flask db upgrade` (AUTO_MIGRATE is off).",
+            head_revision(),
+        )
+    else:
+        app.logger.info("Schema setup: %s at %s in %.1f ms", status, head_revision(), elapsed_ms)
+    app.logger.info(
+        "Database profile: %s", ", ".join(f"{key}={value}" for key, value in app.config["DB_PROFILE"].items())
+    )
@@ -0,0 +1,91 @@
+"""Database connection profile: SQLite pragmas and engine pool options.
+
+Every new SQLite connection gets the pragmas from SQLITE_* settings through a
+``connect`` event: WAL lets readers run alongside a writer, a busy timeout
+makes writers wait for the lock instead of failing with "database is locked",
+and synchronous=NORMAL is safe under WAL while avoiding an fsync per commit.
+Pool options (DB_POOL_*) apply to any database.
+"""
+import os
+
+from sqlalchemy import event, text
+
+SQLITE_PRAGMA_DEFAULTS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": "5000",  # milliseconds
+    "cache_size": "-20000",  # negative means KiB, so about 20 MiB per connection
+    "mmap_size": str(256 * 1024 * 1024),
+    "temp_store": "MEMORY",
+}
+# journal_mode first: switching to WAL needs no open transaction on the connection.
+PRAGMA_ORDER = ("journal_mode", "busy_timeout", "synchronous", "cache_size", "mmap_size", "temp_store")
+
+# PRAGMA reads return numbers for these; the report shows the names.
+PRAGMA_VALUE_NAMES = {
+    "synchronous": {0: "OFF", 1: "NORMAL", 2: "FULL", 3: "EXTRA"},
+    "temp_store": {0: "DEFAULT", 1: "FILE", 2: "MEMORY"},
+}
+
+POOL_OPTIONS = {
+    "DB_POOL_SIZE": ("pool_size", int),
+    "DB_MAX_OVERFLOW": ("max_overflow", int),
+    "DB_POOL_TIMEOUT": ("pool_timeout", float),
+    "DB_POOL_RECYCLE": ("pool_recycle", int),
+    "DB_POOL_PRE_PING": ("pool_pre_ping", lambda value: value.lower() in {"1", "true", "yes", "on"}),
+}
+
+
+def sqlite_pragmas_from_env() -> dict:
+    """Pragmas to apply, from SQLITE_<PRAGMA> variables; an empty value skips a pragma."""
+    pragmas = {}
+    for name, default in SQLITE_PRAGMA_DEFAULTS.items():
+        value = os.getenv(f"SQLITE_{name.upper()}", default).strip()
+        if value:
+            pragmas[name] = value
+    return pragmas
+
+
+def engine_options_from_env(database_url: str) -> dict:
+    """SQLALCHEMY_ENGINE_OPTIONS from the DB_POOL_* variables that are set."""
+    options = {}
+    for env_name, (option, convert) in POOL_OPTIONS.items():
+        raw = os.getenv(env_name)
+        if raw:
+            options[option] = convert(raw)
+    if database_url.startswith("sqlite") and ":memory:" in database_url:
+        # The in-memory database uses a single shared connection; queue pool sizes do not apply.
+        options.pop("pool_size", None)
+        options.pop("max_overflow", None)
+    return options
+
+
+def install_sqlite_profile(engine, pragmas: dict) -> None:
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name in PRAGMA_ORDER:
+                if name in pragmas:
+                    cursor.execute(f"PRAGMA {name}={pragmas[name]}")
+        finally:
+            cursor.close()
+
+
+def profile_report(engine) -> dict:
+    """Settings actually in effect on a live connection, for the startup log."""
+    pool = engine.pool
+    report = {"dialect": engine.dialect.name, "pool": type(pool).__name__}
+    if hasattr(pool, "size"):
+        report["pool_size"] = pool.size()
+    if hasattr(pool, "_max_overflow"):
+        report["max_overflow"] = pool._max_overflow
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            for name in PRAGMA_ORDER:
+                value = conn.execute(text(f"PRAGMA {name}")).scalar()
+                report[name] = PRAGMA_VALUE_NAMES.get(name, {}).get(value, value)
+    return report
@@ -0,0 +1,255 @@
+"""Per-request timing: Server-Timing headers and Prometheus metrics.
+
+While a request runs, a RequestTimings object sits in a context variable.
+SQLAlchemy cursor events add each statement's count and duration to it, and
+service functions wrapped with ``@timed`` (or blocks inside ``span(name)``)
+add theirs. Every response gets a ``Server-Timing`` header such as
+
+    total;dur=41.2, db;dur=12.8;desc="5 queries", build_summary;dur=30.1
+
+and the request's totals go into in-process histograms per endpoint, which
+GET /api/metrics renders in the Prometheus text format. Nested spans overlap:
+``db`` time also counts inside the service span that issued the queries.
+
+Outside a request (CLI, background threads) the hooks see no RequestTimings
+and return straight away; inside one, a hook costs two perf_counter calls and
+a dict update. Metrics are per process, so scrape each worker.
+"""
+import functools
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+
+from flask import request
+from sqlalchemy import event
+
+from .db import db
+
+# Upper bounds in seconds; a final +Inf bucket is implied.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED_ENDPOINT = "<unmatched>"
+
+_current: ContextVar["RequestTimings | None"] = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    __slots__ = ("started", "statements", "db_seconds", "spans")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.spans: dict[str, float] = {}
+
+    def add_span(self, name: str, seconds: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+
+@contextmanager
+def span(name: str):
+    """Time a block into the current request's ``name`` span."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add_span(name, time.perf_counter() - started)
+
+
+def timed(fn=None, *, name: str | None = None):
+    """Decorator: time every call of ``fn`` into the span ``name`` (default: the function name)."""
+    if fn is None:
+        return lambda f: timed(f, name=name)
+    label = name or fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        timings = _current.get()
+        if timings is None:
+            return fn(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            timings.add_span(label, time.perf_counter() - started)
+
+    return wrapper
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class Instrumentation:
+    def __init__(self):
+        self._lock = Lock()
+        self._latency: dict[tuple[str, str], Histogram] = {}
+        self._responses: dict[tuple[str, str, int], int] = {}
+        self._db: dict[tuple[str, str], list] = {}  # -> [statements, seconds]
+        self._spans: dict[str, list] = {}  # -> [calls, seconds]
+        self.enabled = False
+
+    def init_app(self, app) -> None:
+        app.extensions["instrumentation"] = self
+        if not app.config.get("INSTRUMENTATION_ENABLED", True):
+            return
+        self.enabled = True
+        with app.app_context():
+            engine = db.engine
+        if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+            event.listen(engine, "handle_error", _handle_error)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    # -- request hooks ----------------------------------------------------------
+
+    def _before_request(self) -> None:
+        _current.set(RequestTimings())
+
+    def _after_request(self, response):
+        timings = _current.get()
+        if timings is None:
+            return response
+        elapsed = time.perf_counter() - timings.started
+        parts = [
+            f"total;dur={elapsed * 1000:.1f}",
+            f'db;dur={timings.db_seconds * 1000:.1f};desc="{timings.statements} queries"',
+        ]
+        parts.extend(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.spans.items())
+        response.headers["Server-Timing"] = ", ".join(parts)
+        self._record(request.method, _endpoint_label(), response.status_code, elapsed, timings)
+        return response
+
+    def _teardown_request(self, exc=None) -> None:
+        _current.set(None)
+
+    def _record(self, method: str, endpoint: str, status: int, elapsed: float, timings: RequestTimings) -> None:
+        key = (method, endpoint)
+        with self._lock:
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = Histogram()
+            histogram.observe(elapsed)
+            status_key = (method, endpoint, status)
+            self._responses[status_key] = self._responses.get(status_key, 0) + 1
+            db_totals = self._db.setdefault(key, [0, 0.0])
+            db_totals[0] += timings.statements
+            db_totals[1] += timings.db_seconds
+            for name, seconds in timings.spans.items():
+                span_totals = self._spans.setdefault(name, [0, 0.0])
+                span_totals[0] += 1
+                span_totals[1] += seconds
+
+    # -- exposition --------------------------------------------------------------
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            latency = {key: (list(h.counts), h.total, h.count) for key, h in self._latency.items()}
+            responses = dict(self._responses)
+            db_totals = {key: tuple(value) for key, value in self._db.items()}
+            spans = {key: tuple(value) for key, value in self._spans.items()}
+
+        lines = [
+            "# HELP roo_http_request_duration_seconds Request latency by endpoint.",
+            "# TYPE roo_http_request_duration_seconds histogram",
+        ]
+        for (method, endpoint), (counts, total, count) in sorted(latency.items()):
+            labels = f'method="{method}",endpoint="{_escape(endpoint)}"'
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'roo_http_request_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"roo_http_request_duration_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"roo_http_request_duration_seconds_count{{{labels}}} {count}")
+
+        lines += [
+            "# HELP roo_http_responses_total Responses by endpoint and status code.",
+            "# TYPE roo_http_responses_total counter",
+        ]
+        for (method, endpoint, status), count in sorted(responses.items()):
+            lines.append(
+                f'roo_http_responses_total{{method="{method}",endpoint="{_escape(endpoint)}",status="{status}"}} {count}'
+            )
+
+        lines += [
+            "# HELP roo_db_statements_total SQL statements executed while serving an endpoint.",
+            "# TYPE roo_db_statements_total counter",
+        ]
+        for (method, endpoint), (statements, _) in sorted(db_totals.items()):
+            lines.append(f'roo_db_statements_total{{method="{method}",endpoint="{_escape(endpoint)}"}} {statements}')
+        lines += [
+            "# HELP roo_db_duration_seconds_total Time spent in SQL while serving an endpoint.",
+            "# TYPE roo_db_duration_seconds_total counter",
+        ]
+        for (method, endpoint), (_, seconds) in sorted(db_totals.items()):
+            lines.append(
+                f'roo_db_duration_seconds_total{{method="{method}",endpoint="{_escape(endpoint)}"}} {seconds:.6f}'
+            )
+
+        lines += [
+            "# HELP roo_span_duration_seconds_total Time spent in instrumented service functions.",
+            "# TYPE roo_span_duration_seconds_total counter",
+        ]
+        for name, (_, seconds) in sorted(spans.items()):
+            lines.append(f'roo_span_duration_seconds_total{{span="{_escape(name)}"}} {seconds:.6f}')
+        lines += [
+            "# HELP roo_span_requests_total Requests that entered each instrumented span.",
+            "# TYPE roo_span_requests_total counter",
+        ]
+        for name, (calls, _) in sorted(spans.items()):
+            lines.append(f'roo_span_requests_total{{span="{_escape(name)}"}} {calls}')
+        return "\n".join(lines) + "\n"
+
+
+def _endpoint_label() -> str:
+    # The route pattern, not the path, keeps label cardinality bounded.
+    rule = request.url_rule
+    return rule.rule if rule is not None else UNMATCHED_ENDPOINT
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("instrumentation_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = _current.get()
+    started = conn.info.get("instrumentation_started")
+    if timings is None or not started:
+        return
+    timings.statements += 1
+    timings.db_seconds += time.perf_counter() - started.pop()
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time.
+    conn = exception_context.connection
+    started = conn.info.get("instrumentation_started") if conn is not None else None
+    if started:
+        started.pop()
+
+
+instrumentation = Instrumentation()
@@ -0,0 +1,121 @@
+"""baseline schema
+
+Creates the tables that ``db.create_all()`` used to produce. Tables that already
+exist are left alone, so databases created before migrations were introduced
+can be brought under version control with a plain ``flask db upgrade``. Such
+databases may predate columns that ``init_db`` used to patch in at startup;
+those are added here.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_baseline'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _add_missing_columns(inspector, table, columns):
+    present = {col['name'] for col in inspector.get_columns(table)}
+    for column in columns:
+        if column.name not in present:
+            op.add_column(table, column)
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    existing = set(inspector.get_table_names())
+
+    if 'users' in existing:
+        _add_missing_columns(inspector, 'users', [
+            sa.Column('data_version', sa.Integer(), nullable=False, server_default='0'),
+        ])
+    if 'subscriptions' in existing:
+        _add_missing_columns(inspector, 'subscriptions', [
+            sa.Column('disabled', sa.Boolean(), nullable=False, server_default=sa.false()),
+            sa.Column('logo_url', sa.String(length=512), nullable=True),
+        ])
+
+    if 'users' not in existing:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('username', sa.String(length=80), nullable=False),
+            sa.Column('password_hash', sa.String(length=200), nullable=False),
+            sa.Column('default_currency', sa.String(length=3), nullable=False),
+            sa.Column('notifications_enabled', sa.Boolean(), nullable=True),
+            sa.Column('data_version', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('username'),
+        )
+
+    if 'categories' not in existing:
+        op.create_table(
+            'categories',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=80), nullable=False),
+            sa.Column('color', sa.String(length=7), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    if 'subscriptions' not in existing:
+        op.create_table(
+            'subscriptions',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('category_id', sa.Integer(), nullable=True),
+            sa.Column('name', sa.String(length=120), nullable=False),
+            sa.Column('icon', sa.Text(), nullable=True),
+            sa.Column('logo_url', sa.String(length=512), nullable=True),
+            sa.Column('color', sa.String(length=7), nullable=True),
+            sa.Column('price', sa.Float(), nullable=False),
+            sa.Column('currency', sa.String(length=3), nullable=True),
+            sa.Column('frequency', sa.Integer(), nullable=True),
+            sa.Column('cycle', sa.String(length=10), nullable=True),
+            sa.Column('start_date', sa.Date(), nullable=True),
+            sa.Column('trial_enabled', sa.Boolean(), nullable=True),
+            sa.Column('trial_price', sa.Float(), nullable=True),
+            sa.Column('trial_use_main_cycle', sa.Boolean(), nullable=True),
+            sa.Column('trial_frequency', sa.Integer(), nullable=True),
+            sa.Column('trial_cycle', sa.String(length=10), nullable=True),
+            sa.Column('trial_end_date', sa.Date(), nullable=True),
+            sa.Column('notify_enabled', sa.Boolean(), nullable=True),
+            sa.Column('remind_value', sa.Integer(), nullable=True),
+            sa.Column('remind_unit', sa.String(length=5), nullable=True),
+            sa.Column('disabled', sa.Boolean(), nullable=False, server_default=sa.false()),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['category_id'], ['categories.id']),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    if 'exchange_rates' not in existing:
+        op.create_table(
+            'exchange_rates',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('base', sa.String(length=3), nullable=False),
+            sa.Column('target', sa.String(length=3), nullable=False),
+            sa.Column('rate', sa.Float(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+
+def downgrade():
+    op.drop_table('exchange_rates')
+    op.drop_table('subscriptions')
+    op.drop_table('categories')
+    op.drop_table('users')
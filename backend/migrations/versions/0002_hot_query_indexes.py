@@ -0,0 +1,53 @@
+"""indexes for hot query shapes
+
+Adds composite indexes for the subscription list and stats filters, the
+category list, and a unique (user_id, base, target) index on exchange_rates
+so the rate upsert can be a single INSERT ... ON CONFLICT statement.
+Duplicate exchange rate rows, which the old select-then-insert upsert could
+leave behind, are collapsed to the most recent one first.
+
+Revision ID: 0002_hot_query_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_hot_query_indexes'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_subscriptions_user_disabled_category', 'subscriptions', ['user_id', 'disabled', 'category_id'], False),
+    ('ix_subscriptions_user_created', 'subscriptions', ['user_id', 'created_at'], False),
+    ('ix_subscriptions_user_category_created', 'subscriptions', ['user_id', 'category_id', 'created_at'], False),
+    ('ix_categories_user_name', 'categories', ['user_id', 'name'], False),
+    ('uq_exchange_rates_user_base_target', 'exchange_rates', ['user_id', 'base', 'target'], True),
+]
+
+
+def _existing_indexes(inspector, table):
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    op.execute(
+        'DELETE FROM exchange_rates WHERE id NOT IN ('
+        'SELECT MAX(id) FROM exchange_rates GROUP BY user_id, base, target)'
+    )
+
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns, unique in INDEXES:
+        # Databases created by db.create_all() already carry the model-declared indexes.
+        if name not in _existing_indexes(inspector, table):
+            op.create_index(name, table, columns, unique=unique)
+
+
+def downgrade():
+    for name, table, _columns, _unique in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,41 @@
+"""favicon cache table
+
+Revision ID: 0003_favicon_cache
+Revises: 0002_hot_query_indexes
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_favicon_cache'
+down_revision = '0002_hot_query_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'favicon_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('domain', sa.String(length=255), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('content_type', sa.String(length=100), nullable=True),
+        sa.Column('data', sa.LargeBinary(), nullable=True),
+        sa.Column('color', sa.String(length=7), nullable=True),
+        sa.Column('failed', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('fetched_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('last_accessed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('uq_favicon_cache_domain_size', 'favicon_cache', ['domain', 'size'], unique=True)
+    op.create_index('ix_favicon_cache_last_accessed', 'favicon_cache', ['last_accessed_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_favicon_cache_last_accessed', table_name='favicon_cache')
+    op.drop_index('uq_favicon_cache_domain_size', table_name='favicon_cache')
+    op.drop_table('favicon_cache')
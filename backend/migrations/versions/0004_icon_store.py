@@ -0,0 +1,107 @@
+"""content-addressed icon store
+
+Creates the icons table and moves data-URL icons out of subscriptions.icon:
+each image is stored once under its SHA-256 and the subscription keeps an
+``icon:<hash>`` reference.
+
+Revision ID: 0004_icon_store
+Revises: 0003_favicon_cache
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+import base64
+import binascii
+import hashlib
+from datetime import datetime
+from urllib.parse import unquote_to_bytes
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_icon_store'
+down_revision = '0003_favicon_cache'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 200
+
+subscriptions = sa.table(
+    'subscriptions',
+    sa.column('id', sa.Integer),
+    sa.column('icon', sa.Text),
+)
+icons = sa.table(
+    'icons',
+    sa.column('hash', sa.String),
+    sa.column('content_type', sa.String),
+    sa.column('data', sa.LargeBinary),
+    sa.column('created_at', sa.DateTime),
+)
+
+
+def _parse_data_url(value):
+    header, sep, payload = value[5:].partition(',')
+    if not sep:
+        return None
+    params = header.split(';')
+    try:
+        if 'base64' in params[1:]:
+            data = base64.b64decode(payload)
+        else:
+            data = unquote_to_bytes(payload)
+    except (binascii.Error, ValueError):
+        return None
+    return params[0] or 'text/plain', data
+
+
+def upgrade():
+    op.create_table(
+        'icons',
+        sa.Column('hash', sa.String(length=64), nullable=False),
+        sa.Column('content_type', sa.String(length=100), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('hash'),
+    )
+
+    bind = op.get_bind()
+    stored = set()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(subscriptions.c.id, subscriptions.c.icon)
+            .where(subscriptions.c.id > last_id, subscriptions.c.icon.like('data:%'))
+            .order_by(subscriptions.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        for sid, value in rows:
+            last_id = sid
+            parsed = _parse_data_url(value)
+            if parsed is None:
+                continue
+            content_type, data = parsed
+            digest = hashlib.sha256(data).hexdigest()
+            if digest not in stored:
+                bind.execute(icons.insert().values(
+                    hash=digest, content_type=content_type, data=data, created_at=datetime.utcnow(),
+                ))
+                stored.add(digest)
+            bind.execute(
+                subscriptions.update().where(subscriptions.c.id == sid).values(icon=f'icon:{digest}')
+            )
+
+
+def downgrade():
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(subscriptions.c.id, icons.c.content_type, icons.c.data)
+        .select_from(subscriptions.join(icons, subscriptions.c.icon == sa.literal('icon:') + icons.c.hash))
+    ).fetchall()
+    for sid, content_type, data in rows:
+        data_url = f"data:{content_type};base64,{base64.b64encode(data).decode('ascii')}"
+        bind.execute(subscriptions.update().where(subscriptions.c.id == sid).values(icon=data_url))
+    op.drop_table('icons')
@@ -0,0 +1,26 @@
+"""icon thumbnail variants
+
+Revision ID: 0005_icon_thumbnails
+Revises: 0004_icon_store
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_icon_thumbnails'
+down_revision = '0004_icon_store'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('icons') as batch_op:
+        batch_op.add_column(sa.Column('thumbnail_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('icons') as batch_op:
+        batch_op.drop_column('thumbnail_hash')
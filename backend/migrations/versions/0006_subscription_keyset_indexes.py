@@ -0,0 +1,36 @@
+"""subscription list indexes cover the keyset order
+
+Appends ``id`` to the two list indexes so a page ordered by
+(created_at, id) desc and resumed from a cursor is a single range scan.
+
+Revision ID: 0006_subscription_keyset_indexes
+Revises: 0005_icon_thumbnails
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_subscription_keyset_indexes'
+down_revision = '0005_icon_thumbnails'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_subscriptions_user_created', ['user_id', 'created_at']),
+    ('ix_subscriptions_user_category_created', ['user_id', 'category_id', 'created_at']),
+]
+
+
+def upgrade():
+    for name, columns in INDEXES:
+        op.drop_index(name, table_name='subscriptions')
+        op.create_index(name, 'subscriptions', columns + ['id'], unique=False)
+
+
+def downgrade():
+    for name, columns in INDEXES:
+        op.drop_index(name, table_name='subscriptions')
+        op.create_index(name, 'subscriptions', columns, unique=False)
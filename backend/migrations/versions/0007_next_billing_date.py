@@ -0,0 +1,74 @@
+"""persisted next billing date
+
+Adds subscriptions.next_billing_date with indexes for per-user renewal range
+scans and for the maintenance pass, and fills it in for existing rows with
+the same start_date + floor(k * cycle_days) schedule as services/billing.py.
+
+Revision ID: 0007_next_billing_date
+Revises: 0006_subscription_keyset_indexes
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+import math
+from datetime import date, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_next_billing_date'
+down_revision = '0006_subscription_keyset_indexes'
+branch_labels = None
+depends_on = None
+
+UNIT_DAYS = {'day': 1.0, 'week': 7.0, 'month': 30.4375, 'quarter': 91.3125, 'year': 365.25}
+
+subscriptions = sa.table(
+    'subscriptions',
+    sa.column('id', sa.Integer),
+    sa.column('start_date', sa.Date),
+    sa.column('frequency', sa.Integer),
+    sa.column('cycle', sa.String),
+    sa.column('next_billing_date', sa.Date),
+)
+
+
+def _next_billing_date(start, frequency, cycle, today):
+    start = start or today
+    cycle_days = max(1.0, UNIT_DAYS.get((cycle or 'month').lower(), UNIT_DAYS['month']) * max(1, int(frequency or 1)))
+    offset = (today - start).days
+    if offset <= 0:
+        return start
+    index = math.ceil(offset / cycle_days)
+    while index > 0 and math.floor((index - 1) * cycle_days) >= offset:
+        index -= 1
+    while math.floor(index * cycle_days) < offset:
+        index += 1
+    return start + timedelta(days=math.floor(index * cycle_days))
+
+
+def upgrade():
+    with op.batch_alter_table('subscriptions') as batch_op:
+        batch_op.add_column(sa.Column('next_billing_date', sa.Date(), nullable=True))
+    op.create_index('ix_subscriptions_user_next_billing', 'subscriptions', ['user_id', 'next_billing_date'], unique=False)
+    op.create_index('ix_subscriptions_next_billing', 'subscriptions', ['next_billing_date'], unique=False)
+
+    bind = op.get_bind()
+    today = date.today()
+    rows = bind.execute(sa.select(
+        subscriptions.c.id, subscriptions.c.start_date, subscriptions.c.frequency, subscriptions.c.cycle,
+    )).fetchall()
+    for row in rows:
+        bind.execute(
+            subscriptions.update()
+            .where(subscriptions.c.id == row.id)
+            .values(next_billing_date=_next_billing_date(row.start_date, row.frequency, row.cycle, today))
+        )
+
+
+def downgrade():
+    op.drop_index('ix_subscriptions_next_billing', table_name='subscriptions')
+    op.drop_index('ix_subscriptions_user_next_billing', table_name='subscriptions')
+    with op.batch_alter_table('subscriptions') as batch_op:
+        batch_op.drop_column('next_billing_date')
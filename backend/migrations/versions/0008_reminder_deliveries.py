@@ -0,0 +1,35 @@
+"""reminder delivery log
+
+Revision ID: 0008_reminder_deliveries
+Revises: 0007_next_billing_date
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_reminder_deliveries'
+down_revision = '0007_next_billing_date'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'reminder_deliveries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('subscription_id', sa.Integer(), nullable=False),
+        sa.Column('billing_date', sa.Date(), nullable=False),
+        sa.Column('delivered_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'uq_reminder_deliveries_sub_billing', 'reminder_deliveries', ['subscription_id', 'billing_date'], unique=True
+    )
+
+
+def downgrade():
+    op.drop_index('uq_reminder_deliveries_sub_billing', table_name='reminder_deliveries')
+    op.drop_table('reminder_deliveries')
@@ -0,0 +1,49 @@
+"""monthly spend rollups
+
+Creates the per-subscription monthly spend table and the per-user watermark.
+Rows are filled by ``flask rollups backfill`` or lazily on the first
+history request.
+
+Revision ID: 0009_spend_rollups
+Revises: 0008_reminder_deliveries
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_spend_rollups'
+down_revision = '0008_reminder_deliveries'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'spend_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('subscription_id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('currency', sa.String(length=3), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('uq_spend_rollups_sub_month', 'spend_rollups', ['subscription_id', 'month'], unique=True)
+    op.create_index('ix_spend_rollups_user_month', 'spend_rollups', ['user_id', 'month'], unique=False)
+    op.create_table(
+        'spend_rollup_state',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('through_month', sa.Date(), nullable=False),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+
+
+def downgrade():
+    op.drop_table('spend_rollup_state')
+    op.drop_index('ix_spend_rollups_user_month', table_name='spend_rollups')
+    op.drop_index('uq_spend_rollups_sub_month', table_name='spend_rollups')
+    op.drop_table('spend_rollups')
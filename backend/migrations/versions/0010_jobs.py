@@ -0,0 +1,48 @@
+"""background job queue
+
+Revision ID: 0010_jobs
+Revises: 0009_spend_rollups
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010_jobs'
+down_revision = '0009_spend_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=64), nullable=False),
+        sa.Column('key', sa.String(length=255), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_after', sa.DateTime(), nullable=False),
+        sa.Column('locked_by', sa.String(length=64), nullable=True),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('result', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_jobs_status_run_after', 'jobs', ['status', 'run_after', 'id'])
+    op.create_index('ix_jobs_key_status', 'jobs', ['key', 'status'])
+    op.create_index('ix_jobs_user_created', 'jobs', ['user_id', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_jobs_user_created', table_name='jobs')
+    op.drop_index('ix_jobs_key_status', table_name='jobs')
+    op.drop_index('ix_jobs_status_run_after', table_name='jobs')
+    op.drop_table('jobs')
@@ -0,0 +1,49 @@
+"""subscriptions.created_at is required
+
+Rows written before created_at had a default can hold NULL, which the keyset
+cursor (created_at, id) cannot encode. They get their start date at midnight,
+or the migration time when that is missing too, and the column becomes
+NOT NULL.
+
+Revision ID: 0011_subscription_created_at_not_null
+Revises: 0010_jobs
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from datetime import datetime, time
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011_subscription_created_at_not_null'
+down_revision = '0010_jobs'
+branch_labels = None
+depends_on = None
+
+subscriptions = sa.table(
+    'subscriptions',
+    sa.column('id', sa.Integer),
+    sa.column('start_date', sa.Date),
+    sa.column('created_at', sa.DateTime),
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    now = datetime.utcnow()
+    rows = bind.execute(
+        sa.select(subscriptions.c.id, subscriptions.c.start_date).where(subscriptions.c.created_at.is_(None))
+    ).fetchall()
+    for row in rows:
+        created_at = datetime.combine(row.start_date, time.min) if row.start_date else now
+        bind.execute(subscriptions.update().where(subscriptions.c.id == row.id).values(created_at=created_at))
+
+    with op.batch_alter_table('subscriptions') as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('subscriptions') as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
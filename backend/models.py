@@ -19,6 +19,8 @@ class User(db.Model):
     password_hash = db.Column(db.String(200), nullable=False)
     default_currency = db.Column(db.String(3), default="USD", nullable=False)
     notifications_enabled = db.Column(db.Boolean, default=True)
+    # Incremented by every write that changes what the user's read endpoints return.
+    data_version = db.Column(db.Integer, default=0, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     categories = db.relationship("Category", backref="user", lazy=True)
@@ -33,6 +35,9 @@ class User(db.Model):
 
 class Category(db.Model):
     __tablename__ = "categories"
+    __table_args__ = (
+        db.Index("ix_categories_user_name", "user_id", "name"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     name = db.Column(db.String(80), nullable=False)
@@ -44,12 +49,24 @@ class Category(db.Model):
 
 class Subscription(db.Model):
     __tablename__ = "subscriptions"
+    __table_args__ = (
+        # Stats: filter_by(user_id, disabled[, category_id])
+        db.Index("ix_subscriptions_user_disabled_category", "user_id", "disabled", "category_id"),
+        # List: filter_by(user_id) ordered by (created_at, id) desc, keyset pages
+        db.Index("ix_subscriptions_user_created", "user_id", "created_at", "id"),
+        # Category list: filter_by(user_id, category_id) ordered by (created_at, id) desc
+        db.Index("ix_subscriptions_user_category_created", "user_id", "category_id", "created_at", "id"),
+        # Renewals: filter_by(user_id) and a next_billing_date range
+        db.Index("ix_subscriptions_user_next_billing", "user_id", "next_billing_date"),
+        # Maintenance pass: next_billing_date < today across all users
+        db.Index("ix_subscriptions_next_billing", "next_billing_date"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey("categories.id"), nullable=True)
 
     name = db.Column(db.String(120), nullable=False)
-    icon = db.Column(db.Text, default="💡")  # emoji, data URL, or token
+    icon = db.Column(db.Text, default="💡")  # emoji or "icon:<sha256>" reference into the icon store
     logo_url = db.Column(db.String(512), nullable=True)
     color = db.Column(db.String(7), default="#6b7280")
 
@@ -70,15 +87,109 @@ class Subscription(db.Model):
     remind_value = db.Column(db.Integer, default=1)  # e.g., 1..6
     remind_unit = db.Column(db.String(5), default="days")  # days/weeks
     disabled = db.Column(db.Boolean, default=False, nullable=False)
+    # First billing date on or after the day it was last computed; see services/renewals.py
+    next_billing_date = db.Column(db.Date, nullable=True)
 
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)  # keyset cursor key
 
 
 class ExchangeRate(db.Model):
     __tablename__ = "exchange_rates"
+    __table_args__ = (
+        db.Index("uq_exchange_rates_user_base_target", "user_id", "base", "target", unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     base = db.Column(db.String(3), nullable=False)
     target = db.Column(db.String(3), nullable=False)
     rate = db.Column(db.Float, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class FaviconCacheEntry(db.Model):
+    __tablename__ = "favicon_cache"
+    __table_args__ = (
+        db.Index("uq_favicon_cache_domain_size", "domain", "size", unique=True),
+        db.Index("ix_favicon_cache_last_accessed", "last_accessed_at"),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    domain = db.Column(db.String(255), nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    content_type = db.Column(db.String(100), nullable=True)
+    data = db.Column(db.LargeBinary, nullable=True)
+    color = db.Column(db.String(7), nullable=True)  # dominant color, decoded once at fetch time
+    failed = db.Column(db.Boolean, default=False, nullable=False)  # negative cache entry
+    fetched_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    last_accessed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class Icon(db.Model):
+    __tablename__ = "icons"
+    hash = db.Column(db.String(64), primary_key=True)  # sha256 of data; content-addressed
+    content_type = db.Column(db.String(100), nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+    thumbnail_hash = db.Column(db.String(64), nullable=True)  # smaller variant of a normalized icon
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class ReminderDelivery(db.Model):
+    __tablename__ = "reminder_deliveries"
+    __table_args__ = (
+        # One reminder per billing date, whichever worker claims it first.
+        db.Index("uq_reminder_deliveries_sub_billing", "subscription_id", "billing_date", unique=True),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    subscription_id = db.Column(db.Integer, nullable=False)  # no FK: history outlives deleted subscriptions
+    billing_date = db.Column(db.Date, nullable=False)
+    delivered_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class SpendRollup(db.Model):
+    """Amount billed per subscription and calendar month; see services/rollups.py."""
+    __tablename__ = "spend_rollups"
+    __table_args__ = (
+        db.Index("uq_spend_rollups_sub_month", "subscription_id", "month", unique=True),
+        # History: filter_by(user_id) and a month range, grouped by category and currency
+        db.Index("ix_spend_rollups_user_month", "user_id", "month"),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    subscription_id = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Date, nullable=False)  # first day of the month
+    category_id = db.Column(db.Integer, nullable=True)
+    currency = db.Column(db.String(3), nullable=False)
+    amount = db.Column(db.Float, nullable=False)
+
+
+class SpendRollupState(db.Model):
+    __tablename__ = "spend_rollup_state"
+    user_id = db.Column(db.Integer, primary_key=True)
+    through_month = db.Column(db.Date, nullable=False)  # every subscription is rolled up to this month
+
+
+class Job(db.Model):
+    """A unit of background work; see services/jobs.py."""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Claim: the oldest queued job that is due
+        db.Index("ix_jobs_status_run_after", "status", "run_after", "id"),
+        # Deduplication: a queued job with the same key
+        db.Index("ix_jobs_key_status", "key", "status"),
+        db.Index("ix_jobs_user_created", "user_id", "created_at"),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(64), nullable=False)
+    key = db.Column(db.String(255), nullable=True)
+    user_id = db.Column(db.Integer, nullable=True)
+    payload = db.Column(db.Text, nullable=False, default="{}")  # JSON
+    status = db.Column(db.String(16), nullable=False, default="queued")  # queued/running/done/failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(64), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    result = db.Column(db.Text, nullable=True)  # JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = db.Column(db.DateTime, nullable=True)
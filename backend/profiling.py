@@ -0,0 +1,156 @@
+"""Opt-in cProfile of single requests, with dumps kept in a rotating directory.
+
+A request is profiled when
+
+- it carries PROFILING_TOKEN in an ``X-Profile`` header or a ``_profile``
+  query parameter (on demand), or
+- it is picked by PROFILING_SAMPLE_RATE; its dump is only kept when it took at
+  least PROFILING_THRESHOLD_MS, so the directory collects the slow ones.
+
+Each dump is a ``.prof`` file in PROFILING_DIR (open it with ``pstats`` or
+snakeviz). The oldest are deleted beyond PROFILING_MAX_DUMPS. On-demand
+responses name their dump in ``X-Profile-Dump``. GET /api/profiles lists the
+recent dumps and GET /api/profiles/<name> downloads one; both take the token
+in an ``X-Profile-Token`` header or a ``token`` query parameter.
+
+The interpreter allows one active profiler at a time, so a request that
+arrives while another is being profiled simply runs unprofiled.
+"""
+import cProfile
+import hmac
+import os
+import random
+import re
+import time
+from datetime import datetime
+from threading import Lock
+
+from flask import g, request
+
+DUMP_SUFFIX = ".prof"
+TOKEN_HEADER = "X-Profile"
+TOKEN_PARAM = "_profile"
+# <timestamp>_<METHOD>_<route slug>_<milliseconds>ms_<pid>.prof
+_DUMP_NAME = re.compile(r"^(\d{8}T\d{6}\d{6})_([A-Z]+)_(.*)_(\d+)ms_(\d+)\.prof$")
+
+
+class Profiler:
+    def __init__(self):
+        self._active = Lock()
+        self._rotate = Lock()
+        self.directory = None
+        self.token = ""
+        self.sample_rate = 0.0
+        self.threshold = 0.0
+        self.max_dumps = 0
+
+    def init_app(self, app) -> None:
+        app.extensions["profiler"] = self
+        self.token = app.config.get("PROFILING_TOKEN") or ""
+        self.sample_rate = float(app.config.get("PROFILING_SAMPLE_RATE", 0.0))
+        self.threshold = float(app.config.get("PROFILING_THRESHOLD_MS", 500)) / 1000
+        self.max_dumps = int(app.config.get("PROFILING_MAX_DUMPS", 50))
+        self.directory = app.config.get("PROFILING_DIR")
+        if not self.token and self.sample_rate <= 0:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def authorized(self, value: str | None) -> bool:
+        return bool(self.token) and value is not None and hmac.compare_digest(value.encode(), self.token.encode())
+
+    # -- request hooks ----------------------------------------------------------
+
+    def _before_request(self) -> None:
+        on_demand = self.authorized(request.headers.get(TOKEN_HEADER) or request.args.get(TOKEN_PARAM))
+        if not on_demand and not (self.sample_rate > 0 and random.random() < self.sample_rate):
+            return
+        if not self._active.acquire(blocking=False):
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another tool (a debugger, coverage) holds the profiling hook.
+            self._active.release()
+            return
+        g.profile = (profile, time.perf_counter(), on_demand)
+
+    def _after_request(self, response):
+        state = g.pop("profile", None)
+        if state is None:
+            return response
+        profile, started, on_demand = state
+        self._stop(profile)
+        elapsed = time.perf_counter() - started
+        if on_demand or elapsed >= self.threshold:
+            name = self._dump(profile, elapsed)
+            if on_demand:
+                response.headers["X-Profile-Dump"] = name
+        return response
+
+    def _teardown_request(self, exc=None) -> None:
+        # after_request did not run (the response was never built).
+        state = g.pop("profile", None)
+        if state is not None:
+            self._stop(state[0])
+
+    def _stop(self, profile) -> None:
+        profile.disable()
+        self._active.release()
+
+    # -- dumps ------------------------------------------------------------------------
+
+    def _dump(self, profile, elapsed: float) -> str:
+        rule = request.url_rule.rule if request.url_rule is not None else request.path
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", rule).strip("-") or "root"
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+        name = f"{stamp}_{request.method}_{slug}_{round(elapsed * 1000)}ms_{os.getpid()}{DUMP_SUFFIX}"
+        path = os.path.join(self.directory, name)
+        profile.dump_stats(path + ".tmp")
+        os.replace(path + ".tmp", path)
+        self._prune()
+        return name
+
+    def _prune(self) -> None:
+        with self._rotate:
+            names = sorted(name for name in os.listdir(self.directory) if name.endswith(DUMP_SUFFIX))
+            for name in names[:max(0, len(names) - self.max_dumps)]:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass  # pruned by another worker
+
+    def list_dumps(self) -> list[dict]:
+        """Recent dumps, newest first."""
+        dumps = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            match = _DUMP_NAME.match(name)
+            if not match:
+                continue
+            stamp, method, route, duration_ms, pid = match.groups()
+            try:
+                size = os.path.getsize(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            dumps.append({
+                "name": name,
+                "created_at": datetime.strptime(stamp, "%Y%m%dT%H%M%S%f").isoformat() + "Z",
+                "method": method,
+                "route": route,
+                "duration_ms": int(duration_ms),
+                "pid": int(pid),
+                "size": size,
+            })
+        return dumps
+
+    def dump_path(self, name: str) -> str | None:
+        if not _DUMP_NAME.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+
+profiler = Profiler()
@@ -0,0 +1,116 @@
+from typing import Tuple
+
+from flask import abort, current_app, g, request, session
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy.exc import IntegrityError
+
+from ..db import db
+from ..models import User
+from .user import DEMO_USERNAME, get_or_create_demo_user, has_registered_users, load_user
+
+TOKEN_SALT = "roo-auth-token"
+# The SECRET_KEY default in app.py; anyone can sign tokens and cookies with it.
+DEFAULT_SECRET_KEY = "change-me"
+
+
+def _serializer() -> URLSafeTimedSerializer:
+    return URLSafeTimedSerializer(current_app.config["SECRET_KEY"], salt=TOKEN_SALT)
+
+
+def can_issue_credentials() -> bool:
+    return current_app.config.get("SECRET_KEY") not in (None, "", DEFAULT_SECRET_KEY)
+
+
+def issue_token(user: User) -> str:
+    if not can_issue_credentials():
+        raise RuntimeError("SECRET_KEY is not configured; refusing to issue tokens")
+    return _serializer().dumps({"uid": user.id})
+
+
+def _token_user_id(token: str) -> int | None:
+    try:
+        payload = _serializer().loads(token, max_age=current_app.config.get("AUTH_TOKEN_MAX_AGE"))
+    except BadSignature:
+        return None
+    return payload.get("uid") if isinstance(payload, dict) else None
+
+
+def _request_identity() -> Tuple[bool, int | None]:
+    """Return (credentials_presented, user_id) for the current request.
+
+    Under the default SECRET_KEY anyone can sign a token or session cookie, so
+    presented credentials identify nobody.
+    """
+    header = request.headers.get("Authorization", "")
+    if header.lower().startswith("bearer "):
+        if not can_issue_credentials():
+            return True, None
+        return True, _token_user_id(header[7:].strip())
+    if "user_id" in session:
+        if not can_issue_credentials():
+            return True, None
+        return True, session.get("user_id")
+    return False, None
+
+
+def current_user() -> User:
+    """Return the user for this request, loading it at most once into ``flask.g``.
+
+    A bearer token or the session cookie identifies the user. Requests without
+    credentials fall back to the demo user until someone registers, unless
+    AUTH_REQUIRED is set.
+    """
+    user = g.get("user")
+    if user is not None:
+        return user
+
+    presented, user_id = _request_identity()
+    user = load_user(user_id) if user_id else None
+    if user is None:
+        if presented or current_app.config.get("AUTH_REQUIRED") or has_registered_users():
+            abort(401)
+        user = get_or_create_demo_user()
+    g.user = user
+    return user
+
+
+def login_user(user: User) -> dict:
+    session["user_id"] = user.id
+    g.user = user
+    return {"token": issue_token(user), "user_id": user.id}
+
+
+def logout_user() -> None:
+    session.pop("user_id", None)
+    g.pop("user", None)
+
+
+def authenticate(username: str, password: str) -> User | None:
+    user = User.query.filter_by(username=(username or "").strip()).first()
+    if not user or not user.check_password(password or ""):
+        return None
+    return user
+
+
+def register_user(data: dict) -> Tuple[dict | User, int]:
+    errors: dict[str, str] = {}
+    username = (data.get("username") or "").strip()
+    password = data.get("password") or ""
+    if not username:
+        errors["username"] = "Username is required."
+    elif username == DEMO_USERNAME:
+        errors["username"] = "Username already taken."
+    if len(password) < 8:
+        errors["password"] = "Password must be at least 8 characters."
+    if errors:
+        return {"errors": errors}, 400
+
+    user = User(username=username, default_currency=(data.get("default_currency") or "USD").upper())
+    user.set_password(password)
+    db.session.add(user)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return {"errors": {"username": "Username already taken."}}, 400
+    return user, 201
@@ -0,0 +1,94 @@
+"""Arithmetic billing schedule shared by stats and renewal features.
+
+A subscription bills on ``start_date + floor(k * cycle_days)`` for k = 0, 1, 2, ...
+where ``cycle_days`` uses the same day-based averages as the rest of the app
+(30.4375 days per month, 91.3125 per quarter, 365.25 per year). Every question
+about the schedule is answered from that formula, so counting or locating
+billing dates costs O(1) regardless of how many cycles lie in between.
+"""
+import math
+from datetime import date, timedelta
+from typing import Iterator
+
+from ..models import PeriodUnit
+
+
+UNIT_DAYS = {
+    PeriodUnit.DAY.value: 1.0,
+    PeriodUnit.WEEK.value: 7.0,
+    PeriodUnit.MONTH.value: 30.4375,
+    PeriodUnit.QUARTER.value: 91.3125,
+    PeriodUnit.YEAR.value: 365.25,
+}
+
+
+def cycle_length_days(frequency, cycle) -> float:
+    """Return the number of days in one billing cycle of ``frequency`` x ``cycle``."""
+    freq = max(1, int(frequency or 1))
+    unit_lc = (cycle or PeriodUnit.MONTH.value).lower()
+    return UNIT_DAYS.get(unit_lc, UNIT_DAYS[PeriodUnit.MONTH.value]) * freq
+
+
+class BillingSchedule:
+    def __init__(self, start: date, cycle_days: float):
+        self.start = start
+        self.cycle_days = max(1.0, float(cycle_days))
+
+    def date_at(self, index: int) -> date:
+        return self.start + timedelta(days=math.floor(index * self.cycle_days))
+
+    def index_on_or_after(self, day: date) -> int:
+        """Index of the first billing date on or after ``day``."""
+        offset = (day - self.start).days
+        if offset <= 0:
+            return 0
+        index = math.ceil(offset / self.cycle_days)
+        # Guard against float rounding at exact cycle boundaries.
+        while index > 0 and math.floor((index - 1) * self.cycle_days) >= offset:
+            index -= 1
+        while math.floor(index * self.cycle_days) < offset:
+            index += 1
+        return index
+
+    def next_on_or_after(self, day: date) -> date:
+        return self.date_at(self.index_on_or_after(day))
+
+    def count_between(self, begin: date, end: date) -> int:
+        """Number of billing dates in ``[begin, end)``."""
+        if end <= begin:
+            return 0
+        return self.index_on_or_after(end) - self.index_on_or_after(begin)
+
+    def split_at(self, begin: date, end: date, boundary: date) -> tuple[int, int]:
+        """Count billing dates in ``[begin, end)`` on or before ``boundary`` and after it."""
+        cutoff = min(end, max(begin, boundary + timedelta(days=1)))
+        before = self.count_between(begin, cutoff)
+        return before, self.count_between(cutoff, end)
+
+    def iter_from(self, day: date) -> Iterator[date]:
+        """Lazily yield billing dates on or after ``day``, jumping straight to the first one."""
+        index = self.index_on_or_after(day)
+        while True:
+            yield self.date_at(index)
+            index += 1
+
+
+def schedule_for(sub, today: date | None = None) -> BillingSchedule:
+    start = sub.start_date or today or date.today()
+    return BillingSchedule(start, cycle_length_days(sub.frequency, sub.cycle))
+
+
+def next_billing_date(sub, today: date | None = None) -> date:
+    today = today or date.today()
+    return schedule_for(sub, today).next_on_or_after(today)
+
+
+def in_trial_on(sub, day: date) -> bool:
+    """Whether a billing date on ``day`` is charged the trial price (through trial_end_date)."""
+    if not sub.trial_enabled or sub.trial_price is None:
+        return False
+    return sub.trial_end_date is None or day <= sub.trial_end_date
+
+
+def price_on(sub, day: date) -> float:
+    return sub.trial_price if in_trial_on(sub, day) else sub.price
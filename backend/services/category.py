@@ -2,6 +2,8 @@ from flask import abort
 
 from ..db import db
 from ..models import Category, Subscription
+from . import rollups
+from .user import bump_data_version
 
 
 def list_categories(user):
@@ -15,6 +17,7 @@ def create_category(user, data: dict) -> Category:
         color=data.get("color", "#6b7280"),
     )
     db.session.add(category)
+    bump_data_version(user)
     db.session.commit()
     return category
 
@@ -24,8 +27,11 @@ def delete_category(user, cid: int) -> None:
     if not category:
         abort(404)
     try:
-        Subscription.query.filter_by(user_id=user.id, category_id=cid).delete(synchronize_session=False)
+        in_category = Subscription.query.filter_by(user_id=user.id, category_id=cid)
+        rollups.mark_deleted(sid for (sid,) in in_category.with_entities(Subscription.id))
+        in_category.delete(synchronize_session=False)
         db.session.delete(category)
+        bump_data_version(user)
         db.session.commit()
     except Exception:
         db.session.rollback()
@@ -0,0 +1,79 @@
+"""Dominant color extraction for favicons and uploaded logos.
+
+The image is downsampled with Pillow, transparent and near-white/near-black
+pixels are dropped, and the remaining pixels are quantized to 4 bits per
+channel. The most populated bucket wins and its mean color is returned.
+Results are memoized by a hash of the image bytes.
+"""
+import hashlib
+import io
+from collections import OrderedDict
+from threading import Lock
+
+import numpy as np
+from PIL import Image
+
+SAMPLE_SIZE = 64
+ALPHA_THRESHOLD = 125
+# Generous thresholds so JPEG ringing around white or black backgrounds is ignored too.
+WHITE_THRESHOLD = 215  # every channel above this counts as near-white
+BLACK_THRESHOLD = 40  # every channel below this counts as near-black
+QUANT_SHIFT = 4  # 8 bits -> 4 bits per channel, 4096 buckets
+MEMO_SIZE = 2048
+
+_memo: OrderedDict[bytes, str | None] = OrderedDict()
+_memo_lock = Lock()
+
+
+def _sample_pixels(data: bytes) -> np.ndarray:
+    with Image.open(io.BytesIO(data)) as img:
+        # For JPEG, draft() lets the decoder scale down while decoding.
+        img.draft("RGB", (SAMPLE_SIZE, SAMPLE_SIZE))
+        img = img.convert("RGBA")
+        if img.width > SAMPLE_SIZE or img.height > SAMPLE_SIZE:
+            img.thumbnail((SAMPLE_SIZE, SAMPLE_SIZE), Image.Resampling.BILINEAR)
+        return np.asarray(img, dtype=np.uint8).reshape(-1, 4)
+
+
+def compute_dominant_color(data: bytes) -> str | None:
+    """Uncached extraction; returns a ``#rrggbb`` string or None if nothing is visible."""
+    pixels = _sample_pixels(data)
+    rgb = pixels[pixels[:, 3] >= ALPHA_THRESHOLD, :3]
+    if not len(rgb):
+        return None
+
+    lo = rgb.min(axis=1)
+    hi = rgb.max(axis=1)
+    colored = rgb[(lo <= WHITE_THRESHOLD) & (hi >= BLACK_THRESHOLD)]
+    if len(colored):
+        # Monochrome icons keep their black or white pixels.
+        rgb = colored
+
+    quantized = (rgb >> QUANT_SHIFT).astype(np.int32)
+    bits = 8 - QUANT_SHIFT
+    buckets = (quantized[:, 0] << (2 * bits)) | (quantized[:, 1] << bits) | quantized[:, 2]
+    best = np.bincount(buckets, minlength=1 << (3 * bits)).argmax()
+    r, g, b = np.rint(rgb[buckets == best].mean(axis=0)).astype(int)
+    return "#%02x%02x%02x" % (r, g, b)
+
+
+def dominant_color(data: bytes) -> str | None:
+    """Memoized dominant color of an encoded image; None when it cannot be decoded."""
+    if not data:
+        return None
+    key = hashlib.sha256(data).digest()
+    with _memo_lock:
+        if key in _memo:
+            _memo.move_to_end(key)
+            return _memo[key]
+
+    try:
+        color = compute_dominant_color(data)
+    except Exception:  # pragma: no cover - depends on pillow decoding support
+        color = None
+
+    with _memo_lock:
+        _memo[key] = color
+        while len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+    return color
@@ -0,0 +1,37 @@
+"""Conditional GET for per-user read endpoints.
+
+Responses carry a weak ETag derived from the user's ``data_version`` and the
+request (path and query string). A request whose If-None-Match matches is
+answered with 304 before the response body is built, so no subscription rows
+are read. ``per_day`` adds today's date, for responses that change with the
+calendar (trial state, upcoming renewals) even when the data does not.
+"""
+import hashlib
+from datetime import date
+
+from flask import current_app, make_response, request
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def data_etag(user, per_day: bool = False) -> str:
+    key = [request.path, *sorted(request.args.items(multi=True))]
+    if per_day:
+        key.append(date.today().isoformat())
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+    return f"{user.id}-{user.data_version}-{digest}"
+
+
+def versioned_response(user, build, per_day: bool = False):
+    """Return 304 when the client's copy is current, else ``build()`` with an ETag."""
+    etag = data_etag(user, per_day)
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = make_response(build())
+        if response.status_code != 200:
+            return response
+    response.set_etag(etag, weak=True)
+    # Browsers revalidate on every use, which costs a 304 when nothing changed.
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
@@ -1,5 +1,11 @@
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql, sqlite
+
 from ..db import db
 from ..models import ExchangeRate
+from .rates import invalidate_rates
+from .user import bump_data_version
 
 
 def list_exchange_rates(user):
@@ -11,13 +17,29 @@ def upsert_exchange_rate(user, data: dict) -> None:
     target = (data.get("target") or user.default_currency).upper()
     rate = float(data.get("rate", 1))
 
-    row = ExchangeRate.query.filter_by(user_id=user.id, base=base, target=target).first()
-    if not row:
-        row = ExchangeRate(user_id=user.id, base=base, target=target, rate=rate)
-        db.session.add(row)
+    dialect = db.engine.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        # Single-statement upsert backed by uq_exchange_rates_user_base_target.
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        now = datetime.utcnow()
+        stmt = insert(ExchangeRate).values(
+            user_id=user.id, base=base, target=target, rate=rate, updated_at=now
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ExchangeRate.user_id, ExchangeRate.base, ExchangeRate.target],
+            set_={"rate": stmt.excluded.rate, "updated_at": now},
+        )
+        db.session.execute(stmt)
     else:
-        row.rate = rate
+        row = ExchangeRate.query.filter_by(user_id=user.id, base=base, target=target).first()
+        if not row:
+            row = ExchangeRate(user_id=user.id, base=base, target=target, rate=rate)
+            db.session.add(row)
+        else:
+            row.rate = rate
+    bump_data_version(user)
     db.session.commit()
+    invalidate_rates(user.id)
 
 
 def serialize_exchange_rate(rate: ExchangeRate) -> dict:
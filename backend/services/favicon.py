@@ -1,9 +1,14 @@
 import base64
-import io
+from concurrent.futures import ThreadPoolExecutor, wait
+from threading import Lock
 from urllib.parse import urlparse
 
 import requests
-from colorthief import ColorThief
+from flask import current_app
+from requests.adapters import HTTPAdapter
+
+from .color import dominant_color
+from .favicon_cache import get_cached_favicon, store_failure, store_favicon
 
 
 class FaviconError(Exception):
@@ -18,6 +23,26 @@ class FetchFailedError(FaviconError):
     pass
 
 
+FETCH_TIMEOUT_SECONDS = 5
+
+_session: requests.Session | None = None
+_lock = Lock()
+
+
+def _http_session() -> requests.Session:
+    """Process-wide Session so favicon lookups reuse keep-alive connections."""
+    global _session
+    with _lock:
+        if _session is None:
+            pool_size = current_app.config["FAVICON_POOL_SIZE"]
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
 def _normalize_url(raw: str) -> str:
     if not raw:
         return ""
@@ -31,39 +56,99 @@ def _normalize_url(raw: str) -> str:
     return f"{scheme}://{parsed.netloc}"
 
 
-def fetch_favicon_payload(site_url: str, size: int = 128, fallback_color: str | None = None) -> dict:
+def _build_payload(domain, favicon_url, normalized, content_type, content, color, fallback_color) -> dict:
+    b64 = base64.b64encode(content).decode("ascii")
+    data_url = f"data:{content_type};base64,{b64}"
+    return {
+        "domain": domain,
+        "favicon_url": favicon_url,
+        "favicon_data": data_url,
+        "color": color or fallback_color,
+        "normalized_url": normalized,
+    }
+
+
+def fetch_favicon_payload(
+    site_url: str, size: int = 128, fallback_color: str | None = None, timeout: float = FETCH_TIMEOUT_SECONDS
+) -> dict:
     normalized = _normalize_url(site_url)
     if not normalized:
         raise InvalidURLError("invalid url")
 
     domain = urlparse(normalized).netloc
-    favicon_url = f"https://www.google.com/s2/favicons?sz={size}&domain={domain}"
+    favicon_url = current_app.config["FAVICON_SERVICE_URL"].format(size=size, domain=domain)
+
+    cached = get_cached_favicon(domain, size)
+    if cached is not None:
+        if cached.failed:
+            raise FetchFailedError("fetch failed (cached)")
+        return _build_payload(
+            domain, favicon_url, normalized, cached.content_type, cached.data, cached.color, fallback_color
+        )
+
     try:
-        response = requests.get(favicon_url, timeout=5)
+        response = _http_session().get(favicon_url, timeout=timeout)
         response.raise_for_status()
     except Exception as exc:  # pragma: no cover - network dependent
+        store_failure(domain, size)
         raise FetchFailedError("fetch failed") from exc
 
     content_type = response.headers.get("Content-Type", "image/png")
-    buffer = io.BytesIO(response.content)
-    dominant_hex = None
-    try:
-        buffer.seek(0)
-        thief = ColorThief(buffer)
-        rgb = thief.get_color(quality=1)
-        if rgb and len(rgb) == 3:
-            dominant_hex = "#%02x%02x%02x" % rgb
-    except Exception:  # pragma: no cover - depends on pillow decoding support
-        dominant_hex = None
-    finally:
-        buffer.seek(0)
-
-    b64 = base64.b64encode(buffer.read()).decode("ascii")
-    data_url = f"data:{content_type};base64,{b64}"
-    return {
-        "domain": domain,
-        "favicon_url": favicon_url,
-        "favicon_data": data_url,
-        "color": dominant_hex or fallback_color,
-        "normalized_url": normalized,
-    }
+    dominant_hex = dominant_color(response.content)
+    store_favicon(domain, size, content_type, response.content, dominant_hex)
+    return _build_payload(
+        domain, favicon_url, normalized, content_type, response.content, dominant_hex, fallback_color
+    )
+
+
+def _error_kind(exc: Exception) -> str:
+    if isinstance(exc, InvalidURLError):
+        return "invalid_url"
+    return "fetch_failed"
+
+
+def resolve_favicons(urls: list, fallback_color: str | None = None, size: int = 128) -> list[dict]:
+    """Resolve many favicons concurrently on a worker pool owned by this batch.
+
+    Each URL gets its own result entry, in input order. Lookups still running
+    when FAVICON_BATCH_DEADLINE expires are reported as ``timeout`` so one slow
+    domain cannot hold the whole batch. Socket timeouts are capped at the
+    deadline, so abandoned threads end soon after and never hold up later batches.
+    """
+    app = current_app._get_current_object()
+    deadline = app.config["FAVICON_BATCH_DEADLINE"]
+    timeout = min(FETCH_TIMEOUT_SECONDS, deadline)
+
+    def resolve(site_url):
+        with app.app_context():
+            return fetch_favicon_payload(site_url, size=size, fallback_color=fallback_color, timeout=timeout)
+
+    unique = list(dict.fromkeys(site_url for site_url in urls if isinstance(site_url, str)))
+    futures = {}
+    if unique:
+        executor = ThreadPoolExecutor(
+            max_workers=min(app.config["FAVICON_BATCH_WORKERS"], len(unique)),
+            thread_name_prefix="favicon",
+        )
+        try:
+            futures = {site_url: executor.submit(resolve, site_url) for site_url in unique}
+            wait(futures.values(), timeout=deadline)
+        finally:
+            # Lookups not started yet are dropped; running ones end within their socket timeout.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for site_url in urls:
+        future = futures.get(site_url) if isinstance(site_url, str) else None
+        if future is None:
+            results.append({"url": site_url, "error": "invalid_url"})
+        elif not future.done() or future.cancelled():
+            results.append({"url": site_url, "error": "timeout"})
+        elif future.exception() is not None:
+            exc = future.exception()
+            if not isinstance(exc, FaviconError):
+                app.logger.warning("Favicon lookup for %s failed: %r", site_url, exc)
+            results.append({"url": site_url, "error": _error_kind(exc)})
+        else:
+            results.append({"url": site_url, **future.result()})
+    return results
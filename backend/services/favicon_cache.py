@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from ..db import db
+from ..models import FaviconCacheEntry
+
+# Hits only refresh last_accessed_at when it is older than this, so a hot domain
+# does not turn every read into a write.
+ACCESS_TOUCH_INTERVAL = timedelta(hours=1)
+
+
+def _config(key: str):
+    return current_app.config[key]
+
+
+def get_cached_favicon(domain: str, size: int) -> FaviconCacheEntry | None:
+    """Return a live cache entry (positive or negative) for ``domain``/``size``."""
+    entry = FaviconCacheEntry.query.filter_by(domain=domain, size=size).first()
+    if entry is None:
+        return None
+    now = datetime.utcnow()
+    if entry.expires_at <= now:
+        return None
+    if now - entry.last_accessed_at > ACCESS_TOUCH_INTERVAL:
+        entry.last_accessed_at = now
+        db.session.commit()
+    return entry
+
+
+def _store(domain: str, size: int, ttl_seconds: int, **fields) -> None:
+    now = datetime.utcnow()
+    values = {
+        "content_type": None,
+        "data": None,
+        "color": None,
+        "failed": False,
+        **fields,
+        "fetched_at": now,
+        "expires_at": now + timedelta(seconds=ttl_seconds),
+        "last_accessed_at": now,
+    }
+    entry = FaviconCacheEntry.query.filter_by(domain=domain, size=size).first()
+    if entry is None:
+        entry = FaviconCacheEntry(domain=domain, size=size)
+        db.session.add(entry)
+    for key, value in values.items():
+        setattr(entry, key, value)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker cached the same domain concurrently; keep its entry.
+        db.session.rollback()
+        return
+    _evict_over_limit()
+
+
+def store_favicon(domain: str, size: int, content_type: str, data: bytes, color: str | None) -> None:
+    _store(
+        domain, size, _config("FAVICON_CACHE_TTL"),
+        content_type=content_type, data=data, color=color,
+    )
+
+
+def store_failure(domain: str, size: int) -> None:
+    _store(domain, size, _config("FAVICON_NEGATIVE_TTL"), failed=True)
+
+
+def _evict_over_limit() -> None:
+    limit = _config("FAVICON_CACHE_MAX_ENTRIES")
+    excess = FaviconCacheEntry.query.count() - limit
+    if excess <= 0:
+        return
+    stale_ids = (
+        db.session.query(FaviconCacheEntry.id)
+        .order_by(FaviconCacheEntry.last_accessed_at.asc())
+        .limit(excess)
+        .subquery()
+    )
+    FaviconCacheEntry.query.filter(FaviconCacheEntry.id.in_(db.select(stale_ids.c.id))).delete(
+        synchronize_session=False
+    )
+    db.session.commit()
@@ -0,0 +1,64 @@
+"""Resize and transcode uploaded logos into small, bounded variants."""
+import io
+
+from PIL import Image, features
+
+VARIANT_SIZES = (128, 64)
+WEBP_QUALITY = 85
+
+
+class ImageDecodeError(Exception):
+    pass
+
+
+def _output_format() -> tuple[str, str]:
+    if features.check("webp"):
+        return "WEBP", "image/webp"
+    return "PNG", "image/png"
+
+
+def _encode(img: Image.Image) -> tuple[str, bytes]:
+    fmt, content_type = _output_format()
+    buffer = io.BytesIO()
+    if fmt == "WEBP":
+        img.save(buffer, fmt, quality=WEBP_QUALITY, method=4)
+    else:
+        img.save(buffer, fmt, optimize=True)
+    return content_type, buffer.getvalue()
+
+
+def make_variants(data: bytes) -> dict[int, tuple[str, bytes]]:
+    """Return ``{size: (content_type, bytes)}`` for every size in VARIANT_SIZES.
+
+    Images are only ever scaled down, keep their aspect ratio and alpha channel,
+    and are re-encoded as WebP (or optimized PNG when WebP is unavailable).
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            source.draft("RGB", (VARIANT_SIZES[0], VARIANT_SIZES[0]))
+            base = source.convert("RGBA")
+    except Exception as exc:
+        raise ImageDecodeError("unsupported image") from exc
+
+    variants = {}
+    for size in VARIANT_SIZES:
+        img = base.copy()
+        img.thumbnail((size, size), Image.Resampling.LANCZOS)
+        variants[size] = _encode(img)
+    return variants
+
+
+def probe_image(data: bytes) -> tuple[int, int, str]:
+    """Return (width, height, content type) from the image header without decoding pixels.
+
+    Only raster formats Pillow can open pass, so SVG (which can carry script)
+    is rejected here.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            content_type = Image.MIME.get(img.format)
+            if content_type is None:
+                raise ImageDecodeError("unsupported image")
+            return img.size[0], img.size[1], content_type
+    except Exception as exc:
+        raise ImageDecodeError("unsupported image") from exc
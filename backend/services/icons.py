@@ -0,0 +1,183 @@
+import base64
+import binascii
+import hashlib
+from datetime import datetime
+from urllib.parse import unquote_to_bytes
+
+from flask import current_app
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ..db import db
+from ..models import Icon, Subscription, User
+from .icon_processing import VARIANT_SIZES, ImageDecodeError, make_variants, probe_image
+from .jobs import PermanentJobError, enqueue, job_handler
+
+ICON_REF_PREFIX = "icon:"
+ICON_URL_PREFIX = "/api/icons/"
+MAIN_SIZE, THUMBNAIL_SIZE = VARIANT_SIZES
+
+
+class IconError(Exception):
+    pass
+
+
+class IconTooLargeError(IconError):
+    pass
+
+
+class InvalidIconError(IconError):
+    pass
+
+
+def parse_data_url(value: str) -> tuple[str, bytes] | None:
+    """Split ``data:<type>[;base64],<payload>`` into (content type, bytes)."""
+    if not isinstance(value, str) or not value.startswith("data:"):
+        return None
+    header, sep, payload = value[5:].partition(",")
+    if not sep:
+        return None
+    params = header.split(";")
+    content_type = params[0] or "text/plain"
+    try:
+        if "base64" in params[1:]:
+            data = base64.b64decode(payload, validate=False)
+        else:
+            data = unquote_to_bytes(payload)
+    except (binascii.Error, ValueError):
+        return None
+    return content_type, data
+
+
+def store_icon(content_type: str, data: bytes, thumbnail_hash: str | None = None) -> str:
+    """Store image bytes once under their SHA-256 and return the hash."""
+    digest = hashlib.sha256(data).hexdigest()
+    if db.session.get(Icon, digest) is not None:
+        return digest
+
+    dialect = db.engine.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        # Another request may store the same image concurrently; identical content, so ignore.
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        db.session.execute(
+            insert(Icon)
+            .values(
+                hash=digest,
+                content_type=content_type,
+                data=data,
+                thumbnail_hash=thumbnail_hash,
+                created_at=datetime.utcnow(),
+            )
+            .on_conflict_do_nothing(index_elements=[Icon.hash])
+        )
+    else:
+        db.session.add(Icon(hash=digest, content_type=content_type, data=data, thumbnail_hash=thumbnail_hash))
+    return digest
+
+
+def normalize_icon(data: bytes) -> str:
+    """Store the MAIN_SIZE and THUMBNAIL_SIZE variants of an image; return the main hash."""
+    try:
+        variants = make_variants(data)
+    except ImageDecodeError as exc:
+        raise InvalidIconError("invalid icon") from exc
+    thumb_type, thumb_data = variants[THUMBNAIL_SIZE]
+    main_type, main_data = variants[MAIN_SIZE]
+    thumbnail_hash = None
+    if thumb_data != main_data:
+        thumbnail_hash = store_icon(thumb_type, thumb_data)
+    return store_icon(main_type, main_data, thumbnail_hash=thumbnail_hash)
+
+
+def store_uploaded_icon(content_type: str, data: bytes) -> str:
+    """Validate an uploaded raster image and store it in bounded form; return its hash.
+
+    SVG and other formats Pillow cannot decode raise InvalidIconError. Small
+    images are normalized right away. Larger ones are stored as sent and an
+    ``icons.normalize`` job resizes them after the commit, off the request
+    thread.
+    """
+    config = current_app.config
+    if len(data) > config["ICON_MAX_BYTES"]:
+        raise IconTooLargeError("icon too large")
+    try:
+        # The type sniffed from the bytes, not the declared one, is what gets served.
+        width, height, content_type = probe_image(data)
+    except ImageDecodeError as exc:
+        raise InvalidIconError("invalid icon") from exc
+    if width * height > config["ICON_MAX_PIXELS"]:
+        raise IconTooLargeError("icon too large")
+
+    if len(data) <= config["ICON_INLINE_MAX_BYTES"]:
+        return normalize_icon(data)
+    digest = store_icon(content_type, data)
+    enqueue("icons.normalize", {"digest": digest}, key=f"icons.normalize:{digest}")
+    return digest
+
+
+@job_handler("icons.normalize")
+def _replace_with_normalized(payload: dict) -> None:
+    digest = payload["digest"]
+    icon = db.session.get(Icon, digest)
+    if icon is None:
+        return
+    try:
+        normalized = normalize_icon(icon.data)
+    except InvalidIconError as exc:
+        raise PermanentJobError("invalid icon") from exc
+    if normalized == digest:
+        return
+
+    old_ref = ICON_REF_PREFIX + digest
+    new_ref = ICON_REF_PREFIX + normalized
+    user_ids = db.session.query(Subscription.user_id).filter(Subscription.icon == old_ref).distinct()
+    User.query.filter(User.id.in_(user_ids.scalar_subquery())).update(
+        {User.data_version: User.data_version + 1}, synchronize_session=False
+    )
+    Subscription.query.filter(Subscription.icon == old_ref).update(
+        {Subscription.icon: new_ref}, synchronize_session=False
+    )
+    Icon.query.filter(Icon.hash == digest).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def icon_reference(value):
+    """Normalize an incoming icon value into what Subscription.icon stores.
+
+    Data URLs are normalized into the icon store and become ``icon:<hash>``;
+    icon URLs handed back by the API map to the same reference when that icon
+    exists; emoji pass through. Raises IconTooLargeError or InvalidIconError
+    for bad images and unknown icons.
+    """
+    if not isinstance(value, str):
+        return value
+    if value.startswith(ICON_URL_PREFIX):
+        digest = value[len(ICON_URL_PREFIX):].partition("?")[0]
+        if db.session.get(Icon, digest) is None:
+            raise InvalidIconError("unknown icon")
+        return ICON_REF_PREFIX + digest
+    if value.startswith("data:"):
+        # Reject oversized uploads before decoding: base64 needs 4 chars per 3 bytes.
+        if len(value) > current_app.config["ICON_MAX_BYTES"] * 4 // 3 + 256:
+            raise IconTooLargeError("icon too large")
+    parsed = parse_data_url(value)
+    if parsed is None:
+        return value
+    return ICON_REF_PREFIX + store_uploaded_icon(*parsed)
+
+
+def icon_url(value, size: int | None = None):
+    """Public form of a stored icon value: references become ``/api/icons/<hash>``.
+
+    With ``size`` the URL asks for the smallest stored variant covering it.
+    """
+    if isinstance(value, str) and value.startswith(ICON_REF_PREFIX):
+        url = ICON_URL_PREFIX + value[len(ICON_REF_PREFIX):]
+        return f"{url}?size={size}" if size else url
+    return value
+
+
+def get_icon(digest: str, size: int | None = None) -> Icon | None:
+    icon = db.session.get(Icon, digest)
+    if icon is not None and size and size <= THUMBNAIL_SIZE and icon.thumbnail_hash:
+        return db.session.get(Icon, icon.thumbnail_hash) or icon
+    return icon
@@ -0,0 +1,309 @@
+"""Background jobs stored in the ``jobs`` table.
+
+A write that needs slow follow-up work (fetching a favicon, normalizing a
+large icon) calls enqueue() before it commits, so the job becomes visible
+exactly when the write does and the request returns without waiting.
+Handlers are registered per kind with ``@job_handler(kind)``.
+
+- Deduplication: a job with a ``key`` replaces the payload of a queued job
+  with the same key instead of adding another. This is best effort across
+  workers, so handlers must be idempotent and re-check the current state.
+- Claiming: a worker picks the oldest due queued job and moves it to
+  ``running`` with an UPDATE guarded by ``status = 'queued'``; only one
+  worker's UPDATE matches. A job whose lease (JOB_LEASE_SECONDS) runs out,
+  because its worker died, is queued again.
+- Retries: an exception re-queues the job after the kind's retry delay
+  (exponential from JOB_RETRY_BASE_SECONDS by default) until max_attempts.
+  PermanentJobError fails it at once.
+
+Each app process that serves requests starts JOB_WORKERS threads with its
+first request; with 0 the jobs are left to another process, such as
+``flask jobs run``. Other CLI commands never start workers. Finished jobs are
+deleted after JOB_RETENTION_SECONDS.
+"""
+import json
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from itertools import count
+from threading import Condition, Lock, Thread
+
+from flask import current_app
+from sqlalchemy import event, func, or_
+
+from ..db import db
+from ..models import Job
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+STATUSES = (QUEUED, RUNNING, DONE, FAILED)
+MAINTENANCE_SECONDS = 60
+ERROR_MAX_CHARS = 2000
+
+_handlers: dict[str, "JobKind"] = {}
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying cannot help."""
+
+
+class JobKind:
+    def __init__(self, fn, max_attempts: int, retry_delay):
+        self.fn = fn
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def delay_for(self, attempt: int) -> float:
+        if self.retry_delay is not None:
+            return self.retry_delay(attempt)
+        return current_app.config.get("JOB_RETRY_BASE_SECONDS", 30) * 2 ** (attempt - 1)
+
+
+def job_handler(kind: str, max_attempts: int = 3, retry_delay=None):
+    """Register ``fn(payload)`` for ``kind``; ``retry_delay(attempt)`` gives seconds."""
+    def register(fn):
+        _handlers[kind] = JobKind(fn, max_attempts, retry_delay)
+        return fn
+
+    return register
+
+
+def enqueue(kind: str, payload: dict, *, key: str | None = None, user_id: int | None = None,
+            delay: float = 0) -> Job:
+    """Add a job to the current transaction; it is picked up after the commit."""
+    run_after = datetime.utcnow() + timedelta(seconds=delay)
+    encoded = json.dumps(payload)
+    db.session.info["jobs_enqueued"] = True
+    if key is not None:
+        existing = Job.query.filter_by(key=key, status=QUEUED).first()
+        if existing is not None:
+            existing.payload = encoded
+            existing.run_after = run_after
+            return existing
+    kind_info = _handlers.get(kind)
+    job = Job(
+        kind=kind,
+        key=key,
+        user_id=user_id,
+        payload=encoded,
+        status=QUEUED,
+        attempts=0,
+        max_attempts=kind_info.max_attempts if kind_info else 1,
+        run_after=run_after,
+    )
+    db.session.add(job)
+    return job
+
+
+def job_to_dict(job: Job) -> dict:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "key": job.key,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "run_after": job.run_after.isoformat() + "Z" if job.run_after else None,
+        "created_at": job.created_at.isoformat() + "Z" if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() + "Z" if job.finished_at else None,
+        "last_error": job.last_error,
+        "result": json.loads(job.result) if job.result else None,
+    }
+
+
+class JobRunner:
+    def __init__(self):
+        self._cond = Condition()
+        self._maintenance_lock = Lock()
+        self._threads: list[Thread] = []
+        self._stopped = False
+        self._hooks_installed = False
+        self._start_lock = Lock()
+        self._next_maintenance = 0.0
+        self._ids = count(1)
+        self._app = None
+        self.processed = 0
+        self.retried = 0
+        self.failed = 0
+
+    def init_app(self, app) -> None:
+        app.extensions["jobs"] = self
+        self._app = app
+        if not self._hooks_installed:
+            event.listen(db.session, "after_commit", self._after_commit)
+            event.listen(db.session, "after_rollback", self._after_rollback)
+            self._hooks_installed = True
+        if app.config.get("JOB_WORKERS", 2) > 0:
+            # Not at import: create_app() also backs CLI commands, which must not process jobs.
+            app.before_request(self._start_for_requests)
+
+    def _start_for_requests(self) -> None:
+        if not self._threads:
+            self.start(self._app.config.get("JOB_WORKERS", 2))
+
+    def _after_commit(self, session) -> None:
+        if session.info.pop("jobs_enqueued", None):
+            self.wake()
+
+    def _after_rollback(self, session) -> None:
+        session.info.pop("jobs_enqueued", None)
+
+    def wake(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
+
+    # -- worker threads -----------------------------------------------------------
+
+    def start(self, workers: int) -> None:
+        with self._start_lock:
+            if self._threads:
+                return
+            self._stopped = False
+            for index in range(workers):
+                thread = Thread(target=self._run, name=f"jobs-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def _worker_id(self) -> str:
+        return f"{socket.gethostname()}:{os.getpid()}:{next(self._ids)}"
+
+    def _run(self) -> None:
+        worker_id = self._worker_id()
+        poll = self._app.config.get("JOB_POLL_SECONDS", 1.0)
+        while not self._stopped:
+            ran = False
+            with self._app.app_context():
+                try:
+                    self._maintain()
+                    ran = self.run_one(worker_id)
+                except Exception:
+                    db.session.rollback()
+                    self._app.logger.exception("Job worker pass failed")
+                finally:
+                    db.session.remove()
+            if not ran:
+                with self._cond:
+                    if not self._stopped:
+                        self._cond.wait(poll)
+
+    def drain(self) -> int:
+        """Run due jobs in this thread until none are left; returns how many ran."""
+        worker_id = self._worker_id()
+        ran = 0
+        self._maintain()
+        while self.run_one(worker_id):
+            ran += 1
+        return ran
+
+    # -- claiming and running ---------------------------------------------------
+
+    def _claim(self, worker_id: str) -> Job | None:
+        while True:
+            now = datetime.utcnow()
+            candidate = (
+                db.session.query(Job.id)
+                .filter(Job.status == QUEUED, Job.run_after <= now)
+                .order_by(Job.run_after, Job.id)
+                .limit(1)
+                .scalar()
+            )
+            if candidate is None:
+                db.session.commit()
+                return None
+            claimed = Job.query.filter(Job.id == candidate, Job.status == QUEUED).update(
+                {
+                    Job.status: RUNNING,
+                    Job.attempts: Job.attempts + 1,
+                    Job.locked_by: worker_id,
+                    Job.locked_at: now,
+                },
+                synchronize_session=False,
+            )
+            db.session.commit()
+            if claimed:
+                return db.session.get(Job, candidate)
+            # Another worker claimed it first; look again.
+
+    def run_one(self, worker_id: str) -> bool:
+        job = self._claim(worker_id)
+        if job is None:
+            return False
+        job_id, kind, attempts, max_attempts = job.id, job.kind, job.attempts, job.max_attempts
+        payload = json.loads(job.payload or "{}")
+        kind_info = _handlers.get(kind)
+        try:
+            if kind_info is None:
+                raise PermanentJobError(f"no handler for job kind {kind!r}")
+            result = kind_info.fn(payload)
+        except Exception as exc:
+            db.session.rollback()
+            error = f"{type(exc).__name__}: {exc}"[:ERROR_MAX_CHARS]
+            if isinstance(exc, PermanentJobError) or attempts >= max_attempts:
+                self.failed += 1
+                self._app.logger.warning("Job %s (%s) failed: %s", job_id, kind, error)
+                self._finish(job_id, worker_id, FAILED, last_error=error)
+            else:
+                self.retried += 1
+                run_after = datetime.utcnow() + timedelta(seconds=kind_info.delay_for(attempts))
+                self._finish(job_id, worker_id, QUEUED, last_error=error, run_after=run_after)
+            return True
+
+        self.processed += 1
+        self._finish(job_id, worker_id, DONE, result=json.dumps(result) if result is not None else None)
+        return True
+
+    def _finish(self, job_id: int, worker_id: str, status: str, **fields) -> None:
+        values = {Job.status: status, Job.locked_by: None, Job.locked_at: None}
+        if status in (DONE, FAILED):
+            values[Job.finished_at] = datetime.utcnow()
+        values.update({getattr(Job, name): value for name, value in fields.items()})
+        # Guarded by the lock: if the lease ran out and another worker took over, its outcome wins.
+        Job.query.filter(Job.id == job_id, Job.locked_by == worker_id).update(values, synchronize_session=False)
+        db.session.commit()
+
+    # -- maintenance ----------------------------------------------------------------
+
+    def _maintain(self) -> None:
+        """Re-queue jobs with expired leases and delete old finished ones, once a minute."""
+        if not self._maintenance_lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() < self._next_maintenance:
+                return
+            self._next_maintenance = time.monotonic() + MAINTENANCE_SECONDS
+            config = self._app.config
+            now = datetime.utcnow()
+            Job.query.filter(
+                Job.status == RUNNING,
+                Job.locked_at < now - timedelta(seconds=config.get("JOB_LEASE_SECONDS", 300)),
+            ).update({Job.status: QUEUED, Job.locked_by: None, Job.locked_at: None}, synchronize_session=False)
+            Job.query.filter(
+                or_(Job.status == DONE, Job.status == FAILED),
+                Job.finished_at < now - timedelta(seconds=config.get("JOB_RETENTION_SECONDS", 86400)),
+            ).delete(synchronize_session=False)
+            db.session.commit()
+        finally:
+            self._maintenance_lock.release()
+
+    def info(self) -> dict:
+        counts = dict(db.session.query(Job.status, func.count(Job.id)).group_by(Job.status).all())
+        oldest = db.session.query(func.min(Job.run_after)).filter(Job.status == QUEUED).scalar()
+        return {
+            "workers": len(self._threads),
+            "counts": {status: counts.get(status, 0) for status in STATUSES},
+            "oldest_queued": oldest.isoformat() + "Z" if oldest else None,
+            "processed": self.processed,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+
+job_runner = JobRunner()
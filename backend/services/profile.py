@@ -4,6 +4,7 @@ from sqlalchemy.exc import IntegrityError
 
 from ..db import db
 from ..models import User
+from .user import bump_data_version
 
 
 def serialize_profile(user: User) -> dict:
@@ -41,8 +42,8 @@ def update_profile(user: User, data: dict) -> Tuple[dict, int]:
             user.set_password(new_password)
 
     if "default_currency" in data:
-        currency_value = data.get("default_currency") or user.default_currency
-        user.default_currency = currency_value.upper()
+        currency_value = (data.get("default_currency") or user.default_currency).upper()
+        user.default_currency = currency_value
 
     if "notifications_enabled" in data:
         user.notifications_enabled = bool(data["notifications_enabled"])
@@ -52,6 +53,8 @@ def update_profile(user: User, data: dict) -> Tuple[dict, int]:
         return {"errors": errors}, 400
 
     try:
+        # Every profile field is served by GET /api/profile, so any write moves the version.
+        bump_data_version(user)
         db.session.commit()
     except IntegrityError:
         db.session.rollback()
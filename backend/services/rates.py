@@ -0,0 +1,95 @@
+from threading import Lock
+
+from ..instrumentation import timed
+from ..models import ExchangeRate
+
+
+class RateMatrix:
+    """In-memory view of one user's exchange rates.
+
+    Pairs are resolved in order of preference: a stored rate, the inverse of a
+    stored rate, then a one-hop cross rate through any other known currency
+    (USD→EUR via USD→GBP→EUR). Resolved pairs are memoized so repeated
+    conversions during a stats request are dictionary lookups.
+    """
+
+    def __init__(self, rows):
+        self._direct: dict[tuple[str, str], float] = {}
+        self._neighbors: dict[str, set[str]] = {}
+        for base, target, rate in rows:
+            base = (base or "").upper()
+            target = (target or "").upper()
+            if not base or not target or not rate:
+                continue
+            self._direct[(base, target)] = float(rate)
+            self._neighbors.setdefault(base, set()).add(target)
+            self._neighbors.setdefault(target, set()).add(base)
+        self._resolved: dict[tuple[str, str], float | None] = {}
+
+    def _edge(self, source: str, target: str) -> float | None:
+        rate = self._direct.get((source, target))
+        if rate is not None:
+            return rate
+        inverse = self._direct.get((target, source))
+        if inverse:
+            return 1.0 / inverse
+        return None
+
+    def rate(self, source: str, target: str) -> float | None:
+        source = (source or "").upper()
+        target = (target or "").upper()
+        if source == target:
+            return 1.0
+        key = (source, target)
+        if key in self._resolved:
+            return self._resolved[key]
+
+        rate = self._edge(source, target)
+        if rate is None:
+            for via in sorted(self._neighbors.get(source, ())):
+                if via == target:
+                    continue
+                second = self._edge(via, target)
+                if second is None:
+                    continue
+                rate = self._edge(source, via) * second
+                break
+
+        self._resolved[key] = rate
+        return rate
+
+    def convert(self, amount: float, source: str, target: str) -> float:
+        rate = self.rate(source, target)
+        if rate is None:
+            return amount
+        return amount * rate
+
+
+# user_id -> (data_version, matrix). Keying on the data version lets other worker
+# processes notice rate changes without a query per lookup.
+_matrices: dict[int, tuple[int, RateMatrix]] = {}
+_lock = Lock()
+
+
+@timed
+def get_rate_matrix(user) -> RateMatrix:
+    version = user.data_version or 0
+    with _lock:
+        cached = _matrices.get(user.id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    rows = (
+        ExchangeRate.query.with_entities(ExchangeRate.base, ExchangeRate.target, ExchangeRate.rate)
+        .filter_by(user_id=user.id)
+        .all()
+    )
+    matrix = RateMatrix(rows)
+    with _lock:
+        _matrices[user.id] = (version, matrix)
+    return matrix
+
+
+def invalidate_rates(user_id: int) -> None:
+    with _lock:
+        _matrices.pop(user_id, None)
@@ -0,0 +1,59 @@
+"""Where due reminders are delivered.
+
+REMINDER_SINK selects one:
+
+- ``log`` (default): one line per reminder on stderr, through the
+  ``roo.reminders`` logger, whatever LOG_LEVEL is
+- ``file:<path>``: one JSON object per line appended to ``path``
+- ``package.module:name``: ``name`` is a sink object with ``deliver``, or a
+  factory called with the app that returns one
+
+A sink's ``deliver(reminder)`` gets a plain dict and raises to report failure;
+the scheduler then releases the claim and retries later.
+"""
+import importlib
+import json
+import logging
+from threading import Lock
+
+LOGGER_NAME = "roo.reminders"
+
+
+class LogSink:
+    def __init__(self, app):
+        # Its own logger and handler: a reminder is marked delivered before it is
+        # logged, so the line must not depend on the app logger's level.
+        self.logger = logging.getLogger(LOGGER_NAME)
+        self.logger.setLevel(logging.INFO)
+        if not self.logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter("[%(asctime)s] %(levelname)s in %(name)s: %(message)s"))
+            self.logger.addHandler(handler)
+            self.logger.propagate = False
+
+    def deliver(self, reminder: dict) -> None:
+        self.logger.info("Reminder: %s", json.dumps(reminder, ensure_ascii=False))
+
+
+class FileSink:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = Lock()
+
+    def deliver(self, reminder: dict) -> None:
+        line = json.dumps(reminder, ensure_ascii=False) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(line)
+
+
+def load_sink(spec: str, app):
+    spec = (spec or "log").strip()
+    if spec == "log":
+        return LogSink(app)
+    if spec.startswith("file:"):
+        return FileSink(spec[len("file:"):])
+    module_name, sep, attr = spec.partition(":")
+    if not sep:
+        raise ValueError(f"Unknown REMINDER_SINK {spec!r}")
+    target = getattr(importlib.import_module(module_name), attr)
+    return target if hasattr(target, "deliver") else target(app)
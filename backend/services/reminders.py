@@ -0,0 +1,299 @@
+"""Background reminder scheduler.
+
+Every subscription with ``notify_enabled`` (for a user with
+``notifications_enabled``) has one pending reminder: the next billing date
+minus ``remind_value`` days or weeks, at REMINDER_HOUR. Pending reminders sit
+in a min-heap keyed by due time and the worker thread sleeps until the
+earliest one. Stale heap entries are skipped lazily instead of being removed.
+
+The heap is refreshed per user rather than by rescanning subscriptions:
+
+- writes in this process mark their users dirty when they commit
+  (bump_data_version records the user, an ``after_commit`` hook passes it on);
+- as a safety net for writes made by other workers, every
+  REMINDER_RESYNC_SECONDS (an hour by default) the worker compares
+  ``users.data_version`` with what it last loaded and reloads only the users
+  that moved. Delivery re-reads the subscription, so a reminder changed
+  elsewhere is never sent stale, at worst a newly enabled one is late.
+
+Each app worker that serves requests runs a scheduler, started with its first
+request; CLI commands never do. Before delivering, a worker claims the
+reminder by inserting (subscription_id, billing_date) into
+reminder_deliveries; the unique index lets exactly one claim succeed.
+"""
+import heapq
+import itertools
+import time
+from datetime import date, datetime, timedelta
+from datetime import time as dtime
+from threading import Condition, Lock, Thread
+
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from ..db import db
+from ..models import ReminderDelivery, Subscription, User
+from .billing import next_billing_date, price_on
+from .reminder_sinks import load_sink
+
+RETRY_DELAY = timedelta(minutes=5)
+REFRESH_CHUNK = 500
+
+
+def remind_lead(sub) -> timedelta:
+    value = max(0, int(sub.remind_value or 1))
+    unit = (sub.remind_unit or "days").lower()
+    return timedelta(weeks=value) if unit.startswith("week") else timedelta(days=value)
+
+
+class ReminderScheduler:
+    def __init__(self):
+        self._heap: list = []
+        self._entries: dict[int, tuple[datetime, date]] = {}  # subscription id -> (due, billing date)
+        self._by_user: dict[int, set[int]] = {}
+        self._versions: dict[int, int] = {}
+        self._last_billed: dict[int, date] = {}  # billing dates already handled, per subscription
+        self._dirty_users: set[int] = set()
+        self._seq = itertools.count()
+        self._cond = Condition()
+        self._thread: Thread | None = None
+        self._stopped = False
+        self._hooks_installed = False
+        self._start_lock = Lock()
+        self._app = None
+        self.sink = None
+        self.delivered = 0
+        self.duplicates = 0
+        self.failures = 0
+
+    def init_app(self, app) -> None:
+        app.extensions["reminders"] = self
+        if not app.config.get("REMINDERS_ENABLED"):
+            return
+        self._app = app
+        self.sink = load_sink(app.config.get("REMINDER_SINK", "log"), app)
+        if not self._hooks_installed:
+            event.listen(db.session, "after_commit", self._after_commit)
+            event.listen(db.session, "after_rollback", self._after_rollback)
+            self._hooks_installed = True
+        # Not at import: a short-lived CLI process could exit between claiming a
+        # reminder and delivering it, which would lose it.
+        app.before_request(self._start_for_requests)
+
+    def _start_for_requests(self) -> None:
+        if self._thread is None:
+            self.start()
+
+    # -- change notifications -------------------------------------------------
+
+    def _after_commit(self, session) -> None:
+        users = session.info.pop("touched_users", None)
+        if users:
+            self.mark_dirty(users)
+
+    def _after_rollback(self, session) -> None:
+        session.info.pop("touched_users", None)
+
+    def mark_dirty(self, user_ids) -> None:
+        with self._cond:
+            self._dirty_users.update(user_ids)
+            self._cond.notify()
+
+    # -- worker thread --------------------------------------------------------
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._stopped = False
+                self._thread = Thread(target=self._run, name="reminders", daemon=True)
+                self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        resync_every = self._app.config.get("REMINDER_RESYNC_SECONDS", 60)
+        next_resync = 0.0
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                timeout = min(next_resync - time.monotonic(), self._seconds_until_due())
+                if not self._dirty_users and timeout > 0:
+                    self._cond.wait(timeout)
+                if self._stopped:
+                    return
+                dirty, self._dirty_users = self._dirty_users, set()
+
+            with self._app.app_context():
+                try:
+                    if time.monotonic() >= next_resync:
+                        self._resync()
+                        next_resync = time.monotonic() + resync_every
+                    if dirty:
+                        self._refresh_users(dirty)
+                    self._fire_due()
+                except Exception:
+                    db.session.rollback()
+                    self._app.logger.exception("Reminder scheduler pass failed")
+                finally:
+                    db.session.remove()
+
+    def _seconds_until_due(self) -> float:
+        self._drop_stale()
+        if not self._heap:
+            return float("inf")
+        return self._heap[0][0] - time.time()
+
+    def _drop_stale(self) -> None:
+        while self._heap:
+            _, _, sid, due, billing = self._heap[0]
+            if self._entries.get(sid) == (due, billing):
+                return
+            heapq.heappop(self._heap)
+
+    # -- heap maintenance -----------------------------------------------------
+
+    def _push(self, sid: int, due: datetime, billing: date) -> None:
+        with self._cond:
+            self._entries[sid] = (due, billing)
+            heapq.heappush(self._heap, (due.timestamp(), next(self._seq), sid, due, billing))
+
+    def _forget(self, sid: int) -> None:
+        with self._cond:
+            self._entries.pop(sid, None)
+
+    def _entry_for(self, sub, now: datetime) -> tuple[datetime, date]:
+        today = now.date()
+        after = self._last_billed.get(sub.id)
+        start_from = max(today, after + timedelta(days=1)) if after else today
+        billing = next_billing_date(sub, start_from)
+        due = datetime.combine(billing - remind_lead(sub), dtime(hour=self._app.config.get("REMINDER_HOUR", 9)))
+        # A reminder whose time has already passed is sent right away, once.
+        return max(due, now), billing
+
+    def _notify_query(self):
+        return (
+            db.session.query(Subscription, User.data_version)
+            .join(User, User.id == Subscription.user_id)
+            .filter(
+                Subscription.notify_enabled.is_(True),
+                Subscription.disabled.is_(False),
+                User.notifications_enabled.is_(True),
+            )
+        )
+
+    def _resync(self) -> None:
+        """Refresh users whose data_version moved since they were last loaded."""
+        versions = dict(db.session.query(User.id, User.data_version).all())
+        changed = {uid for uid, version in versions.items() if self._versions.get(uid) != version}
+        for uid in set(self._by_user) - set(versions):
+            self._drop_user(uid)
+        if changed:
+            self._refresh_users(changed, versions)
+
+    def _drop_user(self, uid: int) -> None:
+        for sid in self._by_user.pop(uid, set()):
+            self._forget(sid)
+        self._versions.pop(uid, None)
+
+    def _refresh_users(self, user_ids, versions: dict | None = None) -> None:
+        now = datetime.now()
+        user_ids = list(user_ids)
+        for offset in range(0, len(user_ids), REFRESH_CHUNK):
+            chunk = user_ids[offset:offset + REFRESH_CHUNK]
+            for uid in chunk:
+                for sid in self._by_user.pop(uid, set()):
+                    self._forget(sid)
+            if versions is None:
+                chunk_versions = dict(db.session.query(User.id, User.data_version).filter(User.id.in_(chunk)))
+            else:
+                chunk_versions = {uid: versions[uid] for uid in chunk if uid in versions}
+            self._versions.update(chunk_versions)
+            for sub, _ in self._notify_query().filter(Subscription.user_id.in_(chunk)):
+                due, billing = self._entry_for(sub, now)
+                self._push(sub.id, due, billing)
+                self._by_user.setdefault(sub.user_id, set()).add(sub.id)
+
+    # -- delivery ------------------------------------------------------------
+
+    def _fire_due(self) -> None:
+        while True:
+            with self._cond:
+                self._drop_stale()
+                if not self._heap or self._heap[0][0] > time.time():
+                    return
+                _, _, sid, due, billing = heapq.heappop(self._heap)
+                self._forget(sid)
+            self._fire(sid, billing)
+
+    def _fire(self, sid: int, billing: date) -> None:
+        now = datetime.now()
+        row = self._notify_query().filter(Subscription.id == sid).first()
+        if row is None:
+            return  # notifications were turned off or the subscription is gone
+        sub = row[0]
+        due, current_billing = self._entry_for(sub, now)
+        if current_billing != billing or due > now:
+            # Changed by another worker since it was scheduled.
+            self._push(sid, due, current_billing)
+            return
+
+        db.session.add(ReminderDelivery(subscription_id=sid, billing_date=billing))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            self.duplicates += 1
+            self._schedule_next(sub, billing, now)
+            return
+
+        try:
+            self.sink.deliver(self._payload(sub, billing))
+        except Exception:
+            self.failures += 1
+            self._app.logger.exception("Delivering reminder for subscription %s failed", sid)
+            ReminderDelivery.query.filter_by(subscription_id=sid, billing_date=billing).delete()
+            db.session.commit()
+            self._push(sid, now + RETRY_DELAY, billing)
+            return
+        self.delivered += 1
+        self._schedule_next(sub, billing, now)
+
+    def _schedule_next(self, sub, billing: date, now: datetime) -> None:
+        self._last_billed[sub.id] = billing
+        due, next_billing = self._entry_for(sub, now)
+        self._push(sub.id, due, next_billing)
+
+    def _payload(self, sub, billing: date) -> dict:
+        return {
+            "subscription_id": sub.id,
+            "user_id": sub.user_id,
+            "name": sub.name,
+            "billing_date": billing.isoformat(),
+            "amount": price_on(sub, billing),
+            "currency": sub.currency,
+            "remind_value": sub.remind_value,
+            "remind_unit": sub.remind_unit,
+        }
+
+    def info(self) -> dict:
+        with self._cond:
+            self._drop_stale()
+            next_due = datetime.fromtimestamp(self._heap[0][0]).isoformat() if self._heap else None
+            return {
+                "enabled": self._thread is not None,
+                "pending": len(self._entries),
+                "next_due": next_due,
+                "delivered": self.delivered,
+                "duplicates": self.duplicates,
+                "failures": self.failures,
+            }
+
+
+reminder_scheduler = ReminderScheduler()
@@ -0,0 +1,105 @@
+"""Upcoming renewals from the persisted ``Subscription.next_billing_date``.
+
+apply_subscription_data recomputes the column on every write. As days pass,
+stored dates fall behind; advance_billing_dates moves exactly those rows
+forward (an indexed ``next_billing_date < today`` lookup) and runs via
+``flask renewals advance``. Reads never write: upcoming_renewals computes the
+next date of a stale row in memory for its response.
+"""
+from datetime import date, timedelta
+
+from sqlalchemy import or_
+from sqlalchemy.orm import load_only
+
+from ..db import db
+from ..instrumentation import timed
+from ..models import Subscription
+from .billing import in_trial_on, next_billing_date, price_on, schedule_for
+from .helpers import currency_symbol
+from .icons import THUMBNAIL_SIZE, icon_url
+from .rates import get_rate_matrix
+
+DEFAULT_DAYS = 14
+MAX_DAYS = 366
+ADVANCE_BATCH_SIZE = 500
+
+
+def advance_billing_dates(today: date | None = None, user_id: int | None = None) -> int:
+    """Recompute next_billing_date where it is missing or already past; returns rows moved."""
+    today = today or date.today()
+    q = Subscription.query.filter(
+        or_(Subscription.next_billing_date < today, Subscription.next_billing_date.is_(None))
+    )
+    if user_id is not None:
+        q = q.filter(Subscription.user_id == user_id)
+    q = q.options(load_only(
+        Subscription.id, Subscription.start_date, Subscription.frequency, Subscription.cycle,
+        Subscription.next_billing_date,
+    ))
+
+    moved = 0
+    for sub in q.yield_per(ADVANCE_BATCH_SIZE):
+        sub.next_billing_date = next_billing_date(sub, today)
+        moved += 1
+    if moved:
+        db.session.commit()
+    return moved
+
+
+@timed
+def upcoming_renewals(user, days: int = DEFAULT_DAYS, today: date | None = None) -> dict:
+    """Billing dates in the ``days`` days from ``today`` on, with trial-aware and converted amounts."""
+    today = today or date.today()
+    days = max(1, min(days, MAX_DAYS))
+    end = today + timedelta(days=days)  # exclusive
+
+    # Rows whose stored date already passed are candidates too; their real next
+    # date is worked out below without writing it back.
+    subs = (
+        Subscription.query.filter(
+            Subscription.user_id == user.id,
+            or_(Subscription.next_billing_date < end, Subscription.next_billing_date.is_(None)),
+            Subscription.disabled.is_(False),
+        )
+        .order_by(Subscription.next_billing_date, Subscription.id)
+        .all()
+    )
+
+    target_currency = user.default_currency
+    rates = get_rate_matrix(user)
+    renewals = []
+    total = 0.0
+    for sub in subs:
+        first = sub.next_billing_date
+        if first is None or first < today:
+            first = next_billing_date(sub, today)
+        # Short cycles renew more than once inside a long window.
+        for day in schedule_for(sub, today).iter_from(first):
+            if day >= end:
+                break
+            amount = price_on(sub, day)
+            converted = rates.convert(amount, sub.currency or target_currency, target_currency)
+            total += converted
+            renewals.append({
+                "id": sub.id,
+                "name": sub.name,
+                "icon": icon_url(sub.icon, size=THUMBNAIL_SIZE),
+                "color": sub.color,
+                "category_id": sub.category_id,
+                "date": day.isoformat(),
+                "amount": amount,
+                "currency": sub.currency,
+                "converted_amount": round(converted, 2),
+                "trial": in_trial_on(sub, day),
+            })
+    renewals.sort(key=lambda item: (item["date"], item["id"]))
+
+    return {
+        "currency": target_currency,
+        "currency_symbol": currency_symbol(target_currency),
+        "from": today.isoformat(),
+        "to": (end - timedelta(days=1)).isoformat(),
+        "days": days,
+        "total": round(total, 2),
+        "renewals": renewals,
+    }
@@ -0,0 +1,244 @@
+"""Monthly spend rollups behind GET /api/stats/history.
+
+spend_rollups holds, per subscription and calendar month, the amount billed:
+billing dates come from the closed-form schedule in billing.py and each one
+is charged the trial price through trial_end_date, as in the stats weighting.
+Rows run from the subscription's start month through the current month.
+
+Rows are re-derived for one subscription at a time:
+
+- ORM writes are picked up by session hooks: ``before_flush`` notes
+  subscriptions whose billing-relevant columns changed, ``before_commit``
+  re-derives them in the same transaction;
+- set-based UPDATE/DELETE statements bypass those hooks, so their callers
+  use mark_stale / mark_deleted.
+
+spend_rollup_state records the month each user was fully rolled up through.
+When the month turns, the first history request extends that user's rows.
+"""
+from datetime import date, timedelta
+
+from sqlalchemy import event, func, inspect
+from sqlalchemy.exc import IntegrityError
+
+from ..db import db
+from ..instrumentation import timed
+from ..models import SpendRollup, SpendRollupState, Subscription
+from .billing import schedule_for
+from .helpers import currency_symbol
+from .rates import get_rate_matrix
+
+DEFAULT_MONTHS = 24
+MAX_MONTHS = 120
+ROLLUP_COLUMNS = (
+    "user_id", "category_id", "currency", "price", "frequency", "cycle", "start_date", "disabled",
+    "trial_enabled", "trial_price", "trial_end_date",
+)
+
+_hooks_installed = False
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_amounts(sub, through: date) -> dict[date, float]:
+    """Amount billed per month from the start month through ``through`` (a month start)."""
+    if sub.disabled or not sub.start_date:
+        return {}
+    schedule = schedule_for(sub)
+    trial_end = None
+    if sub.trial_enabled and sub.trial_price is not None:
+        # No end date means every billing date is a trial one.
+        trial_end = sub.trial_end_date or date.max - timedelta(days=1)
+
+    amounts = {}
+    month = month_start(sub.start_date)
+    while month <= through:
+        following = add_months(month, 1)
+        if trial_end is None:
+            trial_count, regular_count = 0, schedule.count_between(month, following)
+        else:
+            trial_count, regular_count = schedule.split_at(month, following, trial_end)
+        amount = trial_count * (sub.trial_price or 0.0) + regular_count * (sub.price or 0.0)
+        if trial_count or regular_count:
+            amounts[month] = amount
+        month = following
+    return amounts
+
+
+def rederive(sub, through: date | None = None) -> None:
+    """Replace one subscription's rollup rows; the caller commits."""
+    through = through or month_start(date.today())
+    SpendRollup.query.filter_by(subscription_id=sub.id).delete(synchronize_session=False)
+    currency = (sub.currency or "USD").upper()
+    db.session.bulk_insert_mappings(SpendRollup, [
+        {
+            "user_id": sub.user_id,
+            "subscription_id": sub.id,
+            "month": month,
+            "category_id": sub.category_id,
+            "currency": currency,
+            "amount": amount,
+        }
+        for month, amount in month_amounts(sub, through).items()
+    ])
+
+
+def rollup_user(user_id: int, through: date | None = None) -> int:
+    """Re-derive every subscription of a user and move the watermark; returns subscriptions done."""
+    through = through or month_start(date.today())
+    subs = Subscription.query.filter_by(user_id=user_id).all()
+    SpendRollup.query.filter(
+        SpendRollup.user_id == user_id,
+        SpendRollup.subscription_id.notin_([sub.id for sub in subs]),
+    ).delete(synchronize_session=False)
+    for sub in subs:
+        rederive(sub, through)
+    state = db.session.get(SpendRollupState, user_id)
+    if state is None:
+        db.session.add(SpendRollupState(user_id=user_id, through_month=through))
+    else:
+        state.through_month = through
+    return len(subs)
+
+
+def ensure_current(user_id: int) -> None:
+    """Roll the user up through this month if nobody has yet.
+
+    Concurrent first requests race for the state row: an existing row is
+    claimed with a guarded UPDATE, so only one request rewrites the rows, and
+    a request that loses the insert of a new row keeps the winner's work.
+    """
+    through = month_start(date.today())
+    state = db.session.get(SpendRollupState, user_id)
+    if state is not None and state.through_month >= through:
+        return
+    if state is not None:
+        claimed = SpendRollupState.query.filter(
+            SpendRollupState.user_id == user_id, SpendRollupState.through_month < through,
+        ).update({SpendRollupState.through_month: through}, synchronize_session=False)
+        if not claimed:
+            db.session.rollback()
+            return
+    rollup_user(user_id, through)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+
+
+# -- write hooks ----------------------------------------------------------------
+
+def mark_stale(sub_ids) -> None:
+    """Re-derive these subscriptions at commit (after set-based UPDATEs)."""
+    db.session.info.setdefault("rollup_stale", set()).update(sub_ids)
+
+
+def mark_deleted(sub_ids) -> None:
+    """Drop these subscriptions' rows at commit (after set-based DELETEs)."""
+    db.session.info.setdefault("rollup_deleted", set()).update(sub_ids)
+
+
+def _changed(sub) -> bool:
+    state = inspect(sub)
+    return any(state.attrs[column].history.has_changes() for column in ROLLUP_COLUMNS)
+
+
+def _before_flush(session, flush_context, instances) -> None:
+    stale = [obj for obj in session.new if isinstance(obj, Subscription)]
+    stale += [obj for obj in session.dirty if isinstance(obj, Subscription) and _changed(obj)]
+    if stale:
+        session.info.setdefault("rollup_objects", []).extend(stale)
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, Subscription)]
+    if deleted:
+        session.info.setdefault("rollup_deleted", set()).update(deleted)
+
+
+def _before_commit(session) -> None:
+    if not any(key in session.info for key in ("rollup_objects", "rollup_stale", "rollup_deleted")):
+        return
+    session.flush()
+    objects = session.info.pop("rollup_objects", [])
+    stale_ids = session.info.pop("rollup_stale", set())
+    deleted = session.info.pop("rollup_deleted", set())
+
+    done = set()
+    for sub in objects:
+        if sub.id in deleted or sub.id in done or inspect(sub).was_deleted:
+            continue
+        rederive(sub)
+        done.add(sub.id)
+    pending = stale_ids - deleted - done
+    if pending:
+        for sub in Subscription.query.filter(Subscription.id.in_(pending)):
+            rederive(sub)
+    if deleted:
+        SpendRollup.query.filter(SpendRollup.subscription_id.in_(deleted)).delete(synchronize_session=False)
+
+
+def _after_rollback(session) -> None:
+    # The rolled-back rows' rollups were never written either.
+    for key in ("rollup_objects", "rollup_stale", "rollup_deleted"):
+        session.info.pop(key, None)
+
+
+def init_app(app) -> None:
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    event.listen(db.session, "before_flush", _before_flush)
+    event.listen(db.session, "before_commit", _before_commit)
+    event.listen(db.session, "after_rollback", _after_rollback)
+    _hooks_installed = True
+
+
+# -- reads ------------------------------------------------------------------------
+
+@timed
+def spend_history(user, months: int = DEFAULT_MONTHS, category_id=None) -> dict:
+    """Monthly spend for the last ``months`` months (current one included), from the rollup only.
+
+    ``category_id`` is an int or None for every category.
+    """
+    months = max(1, min(months, MAX_MONTHS))
+    ensure_current(user.id)
+    last = month_start(date.today())
+    first = add_months(last, -(months - 1))
+
+    q = (
+        db.session.query(SpendRollup.month, SpendRollup.category_id, SpendRollup.currency, func.sum(SpendRollup.amount))
+        .filter(SpendRollup.user_id == user.id, SpendRollup.month >= first, SpendRollup.month <= last)
+    )
+    if category_id is not None:
+        q = q.filter(SpendRollup.category_id == category_id)
+    rows = q.group_by(SpendRollup.month, SpendRollup.category_id, SpendRollup.currency).all()
+
+    target_currency = user.default_currency
+    rates = get_rate_matrix(user)
+    series = {add_months(first, i): {"total": 0.0, "by_category": {}} for i in range(months)}
+    for month, cat_id, currency, amount in rows:
+        converted = rates.convert(amount, currency or target_currency, target_currency)
+        bucket = series[month]
+        bucket["total"] += converted
+        key = str(cat_id) if cat_id is not None else "none"
+        bucket["by_category"][key] = bucket["by_category"].get(key, 0.0) + converted
+
+    return {
+        "currency": target_currency,
+        "currency_symbol": currency_symbol(target_currency),
+        "months": months,
+        "series": [
+            {
+                "month": month.strftime("%Y-%m"),
+                "total": round(bucket["total"], 2),
+                "by_category": {key: round(value, 2) for key, value in bucket["by_category"].items()},
+            }
+            for month, bucket in series.items()
+        ],
+    }
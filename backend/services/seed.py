@@ -1,5 +1,6 @@
 from ..db import db
 from ..models import Category, Subscription, PeriodUnit
+from .user import bump_data_version
 
 
 def seed_defaults(user):
@@ -49,4 +50,5 @@ def seed_defaults(user):
         ),
     ]
     db.session.add_all(subscriptions)
+    bump_data_version(user)
     db.session.commit()
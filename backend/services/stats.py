@@ -1,20 +1,18 @@
 from collections import defaultdict
 from datetime import date, timedelta
 
-from ..models import Subscription, Category, ExchangeRate, PeriodUnit
+from flask import current_app
+
+from ..instrumentation import timed
+from ..models import Subscription, Category
+from .billing import schedule_for
 from .helpers import normalize_to_period, currency_symbol
+from .rates import RateMatrix, get_rate_matrix
 from .subscription import is_trial_active
 
 
-def _convert_amount(user, amount: float, currency: str, target_currency: str) -> float:
-    source = currency.upper()
-    target = target_currency.upper()
-    if source == target:
-        return amount
-    rate_row = ExchangeRate.query.filter_by(user_id=user.id, base=source, target=target).first()
-    if rate_row:
-        return amount * rate_row.rate
-    return amount
+def _convert_amount(rates: RateMatrix, amount: float, currency: str, target_currency: str) -> float:
+    return rates.convert(amount, currency or target_currency, target_currency)
 
 
 def _days_in_period(period: str) -> float:
@@ -31,24 +29,7 @@ def _days_in_period(period: str) -> float:
     return 30.4375
 
 
-def _subscription_cycle_days(sub: Subscription) -> float:
-    """Calculate the number of days in one subscription cycle."""
-    freq = max(1, int(sub.frequency or 1))
-    unit_lc = (sub.cycle or PeriodUnit.MONTH.value).lower()
-
-    if unit_lc == PeriodUnit.DAY.value:
-        return float(freq)
-    elif unit_lc == PeriodUnit.WEEK.value:
-        return 7.0 * freq
-    elif unit_lc == PeriodUnit.MONTH.value:
-        return 30.4375 * freq
-    elif unit_lc == PeriodUnit.QUARTER.value:
-        return 91.3125 * freq
-    elif unit_lc == PeriodUnit.YEAR.value:
-        return 365.25 * freq
-    return 30.4375 * freq
-
-
+@timed(name="weighted_price")
 def _calculate_weighted_price(sub: Subscription, period: str, today: date | None = None) -> float:
     """
     Calculate the subscription price for a given period, accounting for trial periods
@@ -82,7 +63,6 @@ def _calculate_weighted_price(sub: Subscription, period: str, today: date | None
     period_days = _days_in_period(period)
     period_start = today
     period_end = today + timedelta(days=period_days)
-    cycle_days = _subscription_cycle_days(sub)
 
     # If trial ends before the period starts, no trial cycles
     if sub.trial_end_date < period_start:
@@ -92,55 +72,42 @@ def _calculate_weighted_price(sub: Subscription, period: str, today: date | None
     if sub.trial_end_date >= period_end:
         return normalize_to_period(sub.trial_price, sub.frequency, sub.cycle, period)
 
-    # Trial ends during the period - count billing cycles at each price
-    # Start from the subscription start date (or today if subscription started earlier)
-    billing_anchor = sub.start_date if sub.start_date else today
-
-    # Adjust billing anchor to be within our calculation period
-    if billing_anchor < period_start:
-        # Find the first billing date on or after period_start
-        days_diff = (period_start - billing_anchor).days
-        cycles_passed = int(days_diff / cycle_days)
-        billing_anchor = billing_anchor + timedelta(days=cycles_passed * cycle_days)
-        if billing_anchor < period_start:
-            billing_anchor = billing_anchor + timedelta(days=cycle_days)
+    # Trial ends during the period - count billing dates at each price.
+    # Billing dates on or before trial_end_date are charged the trial price.
+    schedule = schedule_for(sub, today)
+    trial_cycles, regular_cycles = schedule.split_at(period_start, period_end, sub.trial_end_date)
+    return trial_cycles * sub.trial_price + regular_cycles * sub.price
 
-    total_cost = 0.0
-    current_billing_date = billing_anchor
 
-    # Iterate through each billing cycle in the period
-    while current_billing_date < period_end:
-        # Determine which price applies to this billing cycle
-        if current_billing_date <= sub.trial_end_date:
-            # This billing cycle is during the trial period
-            price = sub.trial_price
-        else:
-            # This billing cycle is after the trial period
-            price = sub.price
+def _stats_engine() -> str:
+    return (current_app.config.get("STATS_ENGINE") or "python").lower()
 
-        # Add the full price for this billing cycle
-        total_cost += price
 
-        # Move to next billing date
-        current_billing_date = current_billing_date + timedelta(days=cycle_days)
+@timed
+def build_summary(user, period: str, category_id: str | None):
+    if _stats_engine() == "numpy":
+        from .stats_vectorized import build_summary_vectorized
 
-    return total_cost
+        return build_summary_vectorized(user, period, category_id)
+    if _stats_engine() == "sql":
+        from .stats_sql import build_summary_sql
 
+        return build_summary_sql(user, period, category_id)
 
-def build_summary(user, period: str, category_id: str | None):
     subs_q = Subscription.query.filter_by(user_id=user.id, disabled=False)
     if category_id and category_id != "all":
         subs_q = subs_q.filter_by(category_id=int(category_id))
-    subs = subs_q.all()
+    subs = subs_q.order_by(Subscription.id).all()
 
     target_currency = user.default_currency
+    rates = get_rate_matrix(user)
     total = 0.0
     breakdown = []
     for sub in subs:
         # Calculate weighted price for the period (accounting for trial)
         normalized = _calculate_weighted_price(sub, period)
         # Convert to target currency
-        normalized = _convert_amount(user, normalized, sub.currency, target_currency)
+        normalized = _convert_amount(rates, normalized, sub.currency, target_currency)
         total += normalized
         breakdown.append({
             "id": sub.id,
@@ -159,16 +126,27 @@ def build_summary(user, period: str, category_id: str | None):
     }
 
 
+@timed
 def stats_by_category(user, period: str):
-    subs = Subscription.query.filter_by(user_id=user.id, disabled=False).all()
+    if _stats_engine() == "numpy":
+        from .stats_vectorized import stats_by_category_vectorized
+
+        return stats_by_category_vectorized(user, period)
+    if _stats_engine() == "sql":
+        from .stats_sql import stats_by_category_sql
+
+        return stats_by_category_sql(user, period)
+
+    subs = Subscription.query.filter_by(user_id=user.id, disabled=False).order_by(Subscription.id).all()
     target_currency = user.default_currency
+    rates = get_rate_matrix(user)
 
     totals = defaultdict(lambda: {"value": 0.0, "color": None})
     for sub in subs:
         # Calculate weighted price for the period (accounting for trial)
         normalized = _calculate_weighted_price(sub, period)
         # Convert to target currency
-        normalized = _convert_amount(user, normalized, sub.currency, target_currency)
+        normalized = _convert_amount(rates, normalized, sub.currency, target_currency)
         key = sub.category_id or 0
         entry = totals[key]
         entry["value"] += normalized
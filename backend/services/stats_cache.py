@@ -0,0 +1,75 @@
+from collections import OrderedDict
+from datetime import date
+from threading import Lock
+
+
+class StatsCache:
+    """Bounded LRU cache for stats payloads.
+
+    Keys include the user's data version, so any write makes older entries
+    unreachable, and today's date, because trial weighting depends on
+    ``date.today()``. When the date rolls over every entry is dropped at once.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._day: date | None = None
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def init_app(self, app) -> None:
+        self.max_entries = int(app.config.get("STATS_CACHE_SIZE", self.max_entries))
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._day = None
+
+    def _roll_over(self, today: date) -> None:
+        if self._day != today:
+            self.evictions += len(self._entries)
+            self._entries.clear()
+            self._day = today
+
+    def get_or_compute(self, user, kind: str, period: str, category_id, compute):
+        if self.max_entries <= 0:
+            return compute()
+
+        today = date.today()
+        key = (user.id, user.data_version or 0, kind, period, category_id, today)
+        with self._lock:
+            self._roll_over(today)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            self._roll_over(today)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def info(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+stats_cache = StatsCache()
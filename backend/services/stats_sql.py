@@ -0,0 +1,200 @@
+"""SQL-side implementation of the stats endpoints, selected with STATS_ENGINE=sql.
+
+The non-trial branch of ``normalize_to_period`` is expressed as CASE expressions
+over ``cycle`` and ``frequency`` so the database computes (and for categories,
+groups) the per-period values. Only subscriptions whose trial ends inside the
+requested period come back as rows for ``_calculate_weighted_price``.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+from sqlalchemy import Float, and_, case, cast, func, literal, or_
+
+from ..db import db
+from ..models import Subscription, Category, PeriodUnit
+from .helpers import currency_symbol
+from .rates import get_rate_matrix
+from .stats import _calculate_weighted_price, _days_in_period
+
+
+UNIT_DAYS = {
+    PeriodUnit.DAY.value: 1.0,
+    PeriodUnit.WEEK.value: 7.0,
+    PeriodUnit.MONTH.value: 30.4375,
+    PeriodUnit.QUARTER.value: 91.3125,
+    PeriodUnit.YEAR.value: 365.25,
+}
+PERIOD_DAYS = {"week": 7.0, "month": 30.4375, "quarter": 91.3125, "year": 365.25}
+
+
+def _period_expressions(period: str, today: date):
+    """Return (value, needs_python) column expressions for the given period."""
+    cycle = func.lower(func.coalesce(Subscription.cycle, PeriodUnit.MONTH.value))
+    # Unknown units divide by frequency only, as helpers.normalize_to_period does.
+    cycle_days = case(UNIT_DAYS, value=cycle, else_=1.0)
+    frequency = func.coalesce(Subscription.frequency, 1)
+    frequency = case((frequency < 1, 1), else_=frequency)
+
+    trial_end = Subscription.trial_end_date
+    period_end = today + timedelta(days=_days_in_period(period))
+    trial_active = and_(
+        Subscription.trial_enabled.is_(True),
+        Subscription.trial_price.isnot(None),
+        or_(trial_end.is_(None), trial_end >= today),
+    )
+    full_trial = and_(trial_active, or_(trial_end.is_(None), trial_end >= period_end))
+    needs_python = and_(trial_active, trial_end.isnot(None), trial_end < period_end)
+
+    charged = cast(
+        case((full_trial, Subscription.trial_price), else_=func.coalesce(Subscription.price, 0.0)),
+        Float,
+    )
+    target_days = PERIOD_DAYS.get((period or PeriodUnit.MONTH.value).lower())
+    if target_days is None:
+        value = charged
+    else:
+        value = charged / (cycle_days * frequency) * literal(target_days)
+    return value, needs_python
+
+
+def _enabled_subscriptions(user):
+    return db.session.query().select_from(Subscription).filter(
+        Subscription.user_id == user.id,
+        Subscription.disabled.is_(False),
+    )
+
+
+def build_summary_sql(user, period: str, category_id: str | None):
+    today = date.today()
+    value, needs_python = _period_expressions(period, today)
+    q = _enabled_subscriptions(user).add_columns(
+        Subscription.id,
+        Subscription.name,
+        Subscription.category_id,
+        Subscription.color,
+        Subscription.currency,
+        Subscription.price,
+        Subscription.frequency,
+        Subscription.cycle,
+        Subscription.start_date,
+        Subscription.trial_enabled,
+        Subscription.trial_price,
+        Subscription.trial_end_date,
+        value.label("value"),
+        needs_python.label("needs_python"),
+    )
+    if category_id and category_id != "all":
+        q = q.filter(Subscription.category_id == int(category_id))
+
+    target_currency = user.default_currency
+    rates = get_rate_matrix(user)
+    total = 0.0
+    breakdown = []
+    for row in q.order_by(Subscription.id):
+        normalized = _calculate_weighted_price(row, period, today) if row.needs_python else row.value
+        normalized = rates.convert(normalized, row.currency or target_currency, target_currency)
+        total += normalized
+        breakdown.append({
+            "id": row.id,
+            "name": row.name,
+            "category_id": row.category_id,
+            "color": row.color,
+            "value": normalized,
+        })
+
+    return {
+        "currency": target_currency,
+        "currency_symbol": currency_symbol(target_currency),
+        "period": period,
+        "total": round(total, 2),
+        "breakdown": breakdown,
+    }
+
+
+def stats_by_category_sql(user, period: str):
+    today = date.today()
+    value, needs_python = _period_expressions(period, today)
+    category_key = func.coalesce(Subscription.category_id, 0)
+
+    grouped = (
+        _enabled_subscriptions(user)
+        .add_columns(
+            category_key.label("category_id"),
+            Subscription.currency,
+            func.sum(value).label("value"),
+            func.min(Subscription.id).label("first_id"),
+        )
+        .filter(~needs_python)
+        .group_by(category_key, Subscription.currency)
+        .all()
+    )
+    trial_rows = (
+        _enabled_subscriptions(user)
+        .add_columns(
+            Subscription.id,
+            category_key.label("category_id"),
+            Subscription.currency,
+            Subscription.price,
+            Subscription.frequency,
+            Subscription.cycle,
+            Subscription.start_date,
+            Subscription.trial_enabled,
+            Subscription.trial_price,
+            Subscription.trial_end_date,
+        )
+        .filter(needs_python)
+        .all()
+    )
+
+    target_currency = user.default_currency
+    rates = get_rate_matrix(user)
+    totals = defaultdict(float)
+    first_seen = {}
+
+    def add(cid, currency, amount, row_id):
+        totals[cid] += rates.convert(amount, currency or target_currency, target_currency)
+        first_seen[cid] = min(first_seen.get(cid, row_id), row_id)
+
+    for row in grouped:
+        add(row.category_id, row.currency, row.value or 0.0, row.first_id)
+    for row in trial_rows:
+        add(row.category_id, row.currency, _calculate_weighted_price(row, period, today), row.id)
+
+    categories = {c.id: c for c in Category.query.filter_by(user_id=user.id).all()}
+    items = []
+    # Order categories by their first subscription, like the row-by-row implementation.
+    for cid in sorted(totals, key=first_seen.get):
+        category = categories.get(cid)
+        if category:
+            name, color = category.name, category.color
+        else:
+            name = "Uncategorized"
+            color = _first_subscription_color(user, cid) or "#6b7280"
+        items.append({
+            "category_id": cid,
+            "name": name,
+            "color": color,
+            "value": round(totals[cid], 2),
+        })
+
+    return {
+        "currency": target_currency,
+        "currency_symbol": currency_symbol(target_currency),
+        "period": period,
+        "items": items,
+    }
+
+
+def _first_subscription_color(user, cid: int):
+    return (
+        _enabled_subscriptions(user)
+        .add_columns(Subscription.color)
+        .filter(
+            func.coalesce(Subscription.category_id, 0) == cid,
+            Subscription.color.isnot(None),
+            Subscription.color != "",
+        )
+        .order_by(Subscription.id)
+        .limit(1)
+        .scalar()
+    )
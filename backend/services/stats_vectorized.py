@@ -0,0 +1,163 @@
+"""Columnar (NumPy) implementation of the stats endpoints, selected with STATS_ENGINE=numpy.
+
+Returns the same payloads as ``stats.build_summary`` and ``stats.stats_by_category``.
+Only subscriptions whose trial ends inside the requested period fall back to the
+per-row ``_calculate_weighted_price``.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+
+from ..models import Subscription, Category, PeriodUnit
+from .helpers import currency_symbol
+from .rates import get_rate_matrix
+from .stats import _calculate_weighted_price, _days_in_period
+
+
+CYCLE_CODES = {
+    PeriodUnit.DAY.value: 0,
+    PeriodUnit.WEEK.value: 1,
+    PeriodUnit.MONTH.value: 2,
+    PeriodUnit.QUARTER.value: 3,
+    PeriodUnit.YEAR.value: 4,
+}
+UNKNOWN_CYCLE = len(CYCLE_CODES)
+# Days per cycle unit, indexed by cycle code. Unknown units divide by frequency only,
+# mirroring helpers.normalize_to_period.
+CYCLE_DAYS = np.array([1.0, 7.0, 30.4375, 91.3125, 365.25, 1.0])
+PERIOD_DAYS = {"week": 7.0, "month": 30.4375, "quarter": 91.3125, "year": 365.25}
+
+COLUMNS = (
+    Subscription.id,
+    Subscription.name,
+    Subscription.category_id,
+    Subscription.color,
+    Subscription.price,
+    Subscription.currency,
+    Subscription.frequency,
+    Subscription.cycle,
+    Subscription.start_date,
+    Subscription.trial_enabled,
+    Subscription.trial_price,
+    Subscription.trial_end_date,
+)
+
+
+def _load_rows(user, category_id=None):
+    q = Subscription.query.with_entities(*COLUMNS).filter_by(user_id=user.id, disabled=False)
+    if category_id is not None:
+        q = q.filter_by(category_id=category_id)
+    return q.order_by(Subscription.id).all()
+
+
+def _cycle_code(cycle) -> int:
+    return CYCLE_CODES.get((cycle or PeriodUnit.MONTH.value).lower(), UNKNOWN_CYCLE)
+
+
+def _normalize(amounts, freq, cycle_days, period: str):
+    target_days = PERIOD_DAYS.get((period or PeriodUnit.MONTH.value).lower())
+    if target_days is None:
+        return amounts.copy()
+    return amounts / (cycle_days * freq) * target_days
+
+
+def _weighted_values(rows, period: str, today: date):
+    """Vectorized equivalent of calling ``_calculate_weighted_price`` on each row."""
+    count = len(rows)
+    price = np.fromiter((r.price or 0.0 for r in rows), dtype=float, count=count)
+    trial_price = np.fromiter(
+        (np.nan if r.trial_price is None else r.trial_price for r in rows), dtype=float, count=count
+    )
+    freq = np.fromiter((max(1, int(r.frequency or 1)) for r in rows), dtype=float, count=count)
+    codes = np.fromiter((_cycle_code(r.cycle) for r in rows), dtype=np.int8, count=count)
+    trial_enabled = np.fromiter((bool(r.trial_enabled) for r in rows), dtype=bool, count=count)
+    trial_end = np.fromiter(
+        (r.trial_end_date.toordinal() if r.trial_end_date else 0 for r in rows), dtype=np.int64, count=count
+    )
+    cycle_days = CYCLE_DAYS[codes]
+
+    has_end = trial_end > 0
+    trial_on = trial_enabled & ~np.isnan(trial_price) & ~(has_end & (trial_end < today.toordinal()))
+    period_end = (today + timedelta(days=_days_in_period(period))).toordinal()
+    full_trial = trial_on & (~has_end | (trial_end >= period_end))
+    partial_trial = trial_on & ~full_trial
+
+    charged = np.where(full_trial, trial_price, price)
+    values = _normalize(charged, freq, cycle_days, period)
+    for idx in np.flatnonzero(partial_trial):
+        values[idx] = _calculate_weighted_price(rows[idx], period, today)
+    return values
+
+
+def _conversion_factors(rows, rates, target_currency: str):
+    currencies = [(r.currency or target_currency).upper() for r in rows]
+    unique, inverse = np.unique(np.array(currencies, dtype=object), return_inverse=True)
+    factors = np.array([rates.rate(code, target_currency) or 1.0 for code in unique], dtype=float)
+    return factors[inverse]
+
+
+def _converted_values(user, rows, period: str, target_currency: str):
+    if not rows:
+        return np.zeros(0)
+    values = _weighted_values(rows, period, date.today())
+    return values * _conversion_factors(rows, get_rate_matrix(user), target_currency)
+
+
+def build_summary_vectorized(user, period: str, category_id: str | None):
+    cid = int(category_id) if category_id and category_id != "all" else None
+    rows = _load_rows(user, cid)
+    target_currency = user.default_currency
+    values = _converted_values(user, rows, period, target_currency)
+
+    breakdown = [
+        {
+            "id": row.id,
+            "name": row.name,
+            "category_id": row.category_id,
+            "color": row.color,
+            "value": value,
+        }
+        for row, value in zip(rows, values.tolist())
+    ]
+    return {
+        "currency": target_currency,
+        "currency_symbol": currency_symbol(target_currency),
+        "period": period,
+        "total": round(float(values.sum()), 2),
+        "breakdown": breakdown,
+    }
+
+
+def stats_by_category_vectorized(user, period: str):
+    rows = _load_rows(user)
+    target_currency = user.default_currency
+    values = _converted_values(user, rows, period, target_currency)
+
+    keys = np.fromiter((r.category_id or 0 for r in rows), dtype=np.int64, count=len(rows))
+    unique, first_index, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    sums = np.bincount(inverse, weights=values, minlength=len(unique))
+
+    categories = {c.id: c for c in Category.query.filter_by(user_id=user.id).all()}
+    items = []
+    # Keep first-seen order so the payload matches the row-by-row implementation.
+    for slot in np.argsort(first_index, kind="stable"):
+        cid = int(unique[slot])
+        category = categories.get(cid)
+        if category:
+            name, color = category.name, category.color
+        else:
+            name = "Uncategorized"
+            color = next((r.color for r in rows if (r.category_id or 0) == cid and r.color), None) or "#6b7280"
+        items.append({
+            "category_id": cid,
+            "name": name,
+            "color": color,
+            "value": round(float(sums[slot]), 2),
+        })
+
+    return {
+        "currency": target_currency,
+        "currency_symbol": currency_symbol(target_currency),
+        "period": period,
+        "items": items,
+    }
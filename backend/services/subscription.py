@@ -1,9 +1,13 @@
-from datetime import date
+import base64
+import json
+from datetime import date, datetime
 from typing import Iterable
 
-from flask import abort
+from flask import abort, current_app
+from sqlalchemy import tuple_
 
 from ..db import db
+from ..instrumentation import timed
 from ..models import Subscription, PeriodUnit
 from .helpers import (
     currency_symbol,
@@ -12,6 +16,15 @@ from .helpers import (
     to_int,
     to_float,
 )
+from .billing import next_billing_date
+from .favicon import InvalidURLError, fetch_favicon_payload
+from .icons import THUMBNAIL_SIZE, IconError, icon_reference, icon_url
+from .jobs import PermanentJobError, enqueue, job_handler
+from .user import bump_data_version
+
+LOGO_JOB = "subscriptions.logo"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
 
 
 def is_trial_active(sub: Subscription, today: date | None = None) -> bool:
@@ -29,39 +42,61 @@ def current_subscription_price(sub: Subscription, today: date | None = None) ->
     return sub.trial_price if is_trial_active(sub, today) else sub.price
 
 
-def subscription_to_dict(sub: Subscription, detail: bool = False) -> dict:
-    trial_active = is_trial_active(sub)
-    data = {
-        "id": sub.id,
-        "name": sub.name,
-        "icon": sub.icon,
-        "logo_url": sub.logo_url,
-        "color": sub.color,
-        "price": sub.price,
-        "currency": sub.currency,
-        "currency_symbol": currency_symbol(sub.currency),
-        "frequency": sub.frequency,
-        "cycle": sub.cycle,
-        "period_label": period_label(sub.frequency, sub.cycle),
-        "category_id": sub.category_id,
-        "disabled": bool(sub.disabled),
-        "display_price": current_subscription_price(sub),
-        "trial_active": trial_active,
-    }
-    if detail:
-        data.update({
-            "start_date": sub.start_date.isoformat() if sub.start_date else None,
-            "trial_enabled": sub.trial_enabled,
-            "trial_price": sub.trial_price,
-            "trial_use_main_cycle": sub.trial_use_main_cycle,
-            "trial_frequency": sub.trial_frequency,
-            "trial_cycle": sub.trial_cycle,
-            "trial_end_date": sub.trial_end_date.isoformat() if sub.trial_end_date else None,
-            "notify_enabled": sub.notify_enabled,
-            "remind_value": sub.remind_value,
-            "remind_unit": sub.remind_unit,
-        })
-    return data
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+# Serialized keys and how to compute them; ``fields=`` picks a subset.
+LIST_FIELDS = {
+    "id": lambda sub: sub.id,
+    "name": lambda sub: sub.name,
+    "icon": lambda sub: icon_url(sub.icon, size=THUMBNAIL_SIZE),
+    "logo_url": lambda sub: sub.logo_url,
+    "color": lambda sub: sub.color,
+    "price": lambda sub: sub.price,
+    "currency": lambda sub: sub.currency,
+    "currency_symbol": lambda sub: currency_symbol(sub.currency),
+    "frequency": lambda sub: sub.frequency,
+    "cycle": lambda sub: sub.cycle,
+    "period_label": lambda sub: period_label(sub.frequency, sub.cycle),
+    "category_id": lambda sub: sub.category_id,
+    "disabled": lambda sub: bool(sub.disabled),
+    "display_price": lambda sub: current_subscription_price(sub),
+    "trial_active": lambda sub: is_trial_active(sub),
+}
+DETAIL_FIELDS = {
+    **LIST_FIELDS,
+    "icon": lambda sub: icon_url(sub.icon),
+    "start_date": lambda sub: _iso(sub.start_date),
+    "trial_enabled": lambda sub: sub.trial_enabled,
+    "trial_price": lambda sub: sub.trial_price,
+    "trial_use_main_cycle": lambda sub: sub.trial_use_main_cycle,
+    "trial_frequency": lambda sub: sub.trial_frequency,
+    "trial_cycle": lambda sub: sub.trial_cycle,
+    "trial_end_date": lambda sub: _iso(sub.trial_end_date),
+    "notify_enabled": lambda sub: sub.notify_enabled,
+    "remind_value": lambda sub: sub.remind_value,
+    "remind_unit": lambda sub: sub.remind_unit,
+}
+
+
+def parse_fields(raw: str | None) -> list[str] | None:
+    """Turn a ``fields=a,b`` parameter into known list keys; None means all.
+
+    Unknown names are ignored and ``id`` is always included.
+    """
+    if not raw:
+        return None
+    requested = {name.strip() for name in raw.split(",")}
+    return [name for name in LIST_FIELDS if name == "id" or name in requested]
+
+
+@timed(name="serialize")
+def subscription_to_dict(sub: Subscription, detail: bool = False, fields: list[str] | None = None) -> dict:
+    getters = DETAIL_FIELDS if detail else LIST_FIELDS
+    if fields is None:
+        return {name: getter(sub) for name, getter in getters.items()}
+    return {name: getters[name](sub) for name in fields}
 
 
 def _normalize_category_id(category_id):
@@ -80,7 +115,7 @@ def apply_subscription_data(sub: Subscription, data: dict, *, default_currency:
         sub.name = data.get("name", sub.name or "Unnamed")
 
     if should("icon"):
-        sub.icon = data.get("icon", sub.icon or "💡")
+        sub.icon = icon_reference(data.get("icon", sub.icon or "💡"))
 
     if should("logo_url"):
         raw_logo = data.get("logo_url")
@@ -175,18 +210,110 @@ def apply_subscription_data(sub: Subscription, data: dict, *, default_currency:
         if not sub.remind_unit:
             sub.remind_unit = "days"
 
+    # O(1) from the billing formula, so it is simply recomputed on every write.
+    sub.next_billing_date = next_billing_date(sub)
+
+
+def queue_logo_fetch(sub: Subscription, data: dict, previous_logo: str | None = None) -> None:
+    """Fetch the favicon of a new or changed ``logo_url`` after the commit, unless an icon was uploaded."""
+    if not sub.logo_url or sub.logo_url == previous_logo:
+        return
+    icon = data.get("icon")
+    if isinstance(icon, str) and icon.startswith("data:"):
+        return
+    if sub.id is None:
+        db.session.flush()
+    enqueue(
+        LOGO_JOB,
+        {
+            "subscription_id": sub.id,
+            "logo_url": sub.logo_url,
+            # What the job may overwrite; an edit made after this write wins.
+            "icon": sub.icon,
+            "color": sub.color,
+            "set_color": "color" not in data,
+        },
+        key=f"{LOGO_JOB}:{sub.id}",
+        user_id=sub.user_id,
+    )
+
+
+# Failed lookups are cached for FAVICON_NEGATIVE_TTL, so retrying sooner would only hit the cache.
+@job_handler(LOGO_JOB, retry_delay=lambda attempt: current_app.config["FAVICON_NEGATIVE_TTL"] * attempt)
+def fill_logo(payload: dict) -> dict:
+    sub = db.session.get(Subscription, payload["subscription_id"])
+    if sub is None or sub.logo_url != payload["logo_url"]:
+        return {"skipped": True}  # deleted, or the URL changed and a newer job covers it
+    if "icon" in payload and sub.icon != payload["icon"]:
+        return {"skipped": True}  # the icon was set explicitly since
+    try:
+        favicon = fetch_favicon_payload(sub.logo_url, fallback_color=sub.color)
+        sub.icon = icon_reference(favicon["favicon_data"])
+    except (InvalidURLError, IconError) as exc:
+        raise PermanentJobError(str(exc)) from exc
+    color_untouched = "color" not in payload or sub.color == payload["color"]
+    if payload.get("set_color") and color_untouched and favicon["color"]:
+        sub.color = favicon["color"]
+    bump_data_version(sub.user)
+    db.session.commit()
+    return {"icon": icon_url(sub.icon), "color": sub.color}
+
 
-def list_subscriptions(user, category_id=None) -> Iterable[Subscription]:
+class InvalidCursorError(Exception):
+    pass
+
+
+def encode_cursor(sub: Subscription) -> str:
+    raw = json.dumps([sub.created_at.isoformat(), sub.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, sid = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(sid)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursorError("invalid cursor") from exc
+
+
+def _list_query(user, category_id=None):
     q = Subscription.query.filter_by(user_id=user.id)
     if category_id and category_id != "all":
         q = q.filter_by(category_id=_normalize_category_id(category_id))
-    return q.order_by(Subscription.created_at.desc()).all()
+    return q.order_by(Subscription.created_at.desc(), Subscription.id.desc())
+
+
+@timed
+def list_subscriptions(user, category_id=None) -> Iterable[Subscription]:
+    return _list_query(user, category_id).all()
+
+
+@timed
+def page_subscriptions(user, category_id=None, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None):
+    """One keyset page of the list, newest first, and the cursor for the next page.
+
+    The cursor encodes the (created_at, id) of the last row returned, so a page
+    is an index range scan however deep the client has scrolled.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    q = _list_query(user, category_id)
+    if cursor:
+        created_at, sid = decode_cursor(cursor)
+        # Row-value comparison so the index is range-scanned from the cursor on.
+        q = q.filter(tuple_(Subscription.created_at, Subscription.id) < tuple_(created_at, sid))
+    rows = q.limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
 
 
+@timed
 def create_subscription(user, data: dict) -> Subscription:
     sub = Subscription(user_id=user.id)
     apply_subscription_data(sub, data, default_currency=user.default_currency, partial=False)
     db.session.add(sub)
+    queue_logo_fetch(sub, data)
+    bump_data_version(user)
     db.session.commit()
     return sub
 
@@ -198,9 +325,13 @@ def get_subscription(user, sid: int) -> Subscription:
     return sub
 
 
+@timed
 def update_subscription(user, sid: int, data: dict, partial: bool = False) -> Subscription:
     sub = get_subscription(user, sid)
+    previous_logo = sub.logo_url
     apply_subscription_data(sub, data, default_currency=user.default_currency, partial=partial)
+    queue_logo_fetch(sub, data, previous_logo)
+    bump_data_version(user)
     db.session.commit()
     return sub
 
@@ -208,4 +339,5 @@ def update_subscription(user, sid: int, data: dict, partial: bool = False) -> Su
 def delete_subscription(user, sid: int) -> None:
     sub = get_subscription(user, sid)
     db.session.delete(sub)
+    bump_data_version(user)
     db.session.commit()
@@ -0,0 +1,162 @@
+"""Apply many subscription operations in one transaction.
+
+An operation is ``{"op": "create", "data": {...}}``, ``{"op": "update",
+"id" | "ids": ..., "data": {...}}`` or ``{"op": "delete", "id" | "ids": ...}``.
+Updates that only touch SIMPLE_FIELDS and deletes run as one set-based
+UPDATE / DELETE per distinct change; other updates load their rows in a single
+query and go through apply_subscription_data. Either every operation applies,
+with one commit and one data_version bump, or none does.
+"""
+from flask import current_app
+
+from ..db import db
+from ..instrumentation import timed
+from ..models import Subscription
+from . import rollups
+from .helpers import to_bool
+from .icons import IconTooLargeError, InvalidIconError
+from .subscription import _normalize_category_id, apply_subscription_data, queue_logo_fetch, subscription_to_dict
+from .user import bump_data_version
+
+OPERATIONS = ("create", "update", "delete")
+SIMPLE_FIELDS = {
+    "disabled": lambda value: to_bool(value, False),
+    "category_id": _normalize_category_id,
+    "color": lambda value: str(value) if value else "#6b7280",
+    "name": lambda value: str(value) if value else "Unnamed",
+}
+
+
+class BatchError(Exception):
+    def __init__(self, index: int, code: str, status: int = 400):
+        super().__init__(code)
+        self.index = index
+        self.code = code
+        self.status = status
+
+
+def _target_ids(index: int, op: dict) -> list[int]:
+    raw = op.get("ids") if "ids" in op else [op.get("id")]
+    if not isinstance(raw, list) or not raw:
+        raise BatchError(index, "ids_required")
+    try:
+        return [int(value) for value in raw]
+    except (TypeError, ValueError):
+        raise BatchError(index, "invalid_id")
+
+
+def _parse(operations) -> list[tuple[str, list[int], dict]]:
+    if not isinstance(operations, list) or not operations:
+        raise BatchError(-1, "operations_required")
+    if len(operations) > current_app.config["SUBSCRIPTION_BATCH_MAX_OPERATIONS"]:
+        raise BatchError(-1, "too_many_operations")
+
+    parsed = []
+    claimed = {}
+    for index, op in enumerate(operations):
+        if not isinstance(op, dict) or op.get("op") not in OPERATIONS:
+            raise BatchError(index, "invalid_operation")
+        kind = op["op"]
+        data = op.get("data") or {}
+        if kind != "delete" and not isinstance(data, dict):
+            raise BatchError(index, "invalid_data")
+        ids = [] if kind == "create" else _target_ids(index, op)
+        for sid in ids:
+            # Set-based statements do not run in request order, so each row may be touched once.
+            if claimed.setdefault(sid, index) != index:
+                raise BatchError(index, "conflicting_operations")
+        parsed.append((kind, ids, data))
+    return parsed
+
+
+def _check_owned(user, parsed) -> None:
+    wanted = {sid for _, ids, _ in parsed for sid in ids}
+    if not wanted:
+        return
+    owned = {
+        sid for (sid,) in db.session.query(Subscription.id)
+        .filter(Subscription.user_id == user.id, Subscription.id.in_(wanted))
+    }
+    for index, (_, ids, _) in enumerate(parsed):
+        if any(sid not in owned for sid in ids):
+            raise BatchError(index, "not_found", 404)
+
+
+def _apply(user, parsed) -> list[dict]:
+    results = [None] * len(parsed)
+    set_updates = {}
+    orm_updates = {}
+    deletes = []
+
+    for index, (kind, ids, data) in enumerate(parsed):
+        if kind == "create":
+            sub = Subscription(user_id=user.id)
+            try:
+                apply_subscription_data(sub, data, default_currency=user.default_currency, partial=False)
+            except (IconTooLargeError, InvalidIconError) as exc:
+                raise _icon_error(index, exc)
+            db.session.add(sub)
+            queue_logo_fetch(sub, data)
+            results[index] = {"status": "created", "subscription": sub}
+        elif kind == "delete":
+            deletes.extend(ids)
+            results[index] = {"status": "deleted", "ids": ids}
+        else:
+            if data and set(data) <= set(SIMPLE_FIELDS):
+                values = tuple(sorted((field, SIMPLE_FIELDS[field](value)) for field, value in data.items()))
+                set_updates.setdefault(values, []).extend(ids)
+            elif data:
+                for sid in ids:
+                    orm_updates[sid] = (index, data)
+            results[index] = {"status": "updated", "ids": ids}
+
+    if orm_updates:
+        rows = Subscription.query.filter(
+            Subscription.user_id == user.id, Subscription.id.in_(orm_updates)
+        ).all()
+        for sub in rows:
+            index, data = orm_updates[sub.id]
+            previous_logo = sub.logo_url
+            try:
+                apply_subscription_data(sub, data, default_currency=user.default_currency, partial=True)
+            except (IconTooLargeError, InvalidIconError) as exc:
+                raise _icon_error(index, exc)
+            queue_logo_fetch(sub, data, previous_logo)
+
+    for values, ids in set_updates.items():
+        Subscription.query.filter(Subscription.user_id == user.id, Subscription.id.in_(ids)).update(
+            {getattr(Subscription, field): value for field, value in values}, synchronize_session=False
+        )
+        if any(field in rollups.ROLLUP_COLUMNS for field, _ in values):
+            rollups.mark_stale(ids)
+    if deletes:
+        Subscription.query.filter(Subscription.user_id == user.id, Subscription.id.in_(deletes)).delete(
+            synchronize_session=False
+        )
+        rollups.mark_deleted(deletes)
+    return results
+
+
+def _icon_error(index: int, exc: Exception) -> BatchError:
+    if isinstance(exc, IconTooLargeError):
+        return BatchError(index, "icon_too_large", 413)
+    return BatchError(index, "invalid_icon")
+
+
+@timed
+def apply_batch(user, operations) -> list[dict]:
+    """Run ``operations`` atomically; raises BatchError (after rollback) on the first bad one."""
+    try:
+        parsed = _parse(operations)
+        _check_owned(user, parsed)
+        results = _apply(user, parsed)
+    except BatchError:
+        db.session.rollback()
+        raise
+
+    bump_data_version(user)
+    db.session.commit()
+    for result in results:
+        if "subscription" in result:
+            result["subscription"] = subscription_to_dict(result["subscription"], detail=True)
+    return results
@@ -0,0 +1,142 @@
+"""Synthetic users and subscriptions for benchmarks (``flask synthetic generate``).
+
+Rows follow a realistic mix: mostly monthly and yearly cycles, a few foreign
+currencies with saved exchange rates, trials (open-ended, running and
+finished), disabled subscriptions, and emoji or uploaded data-URL icons.
+Icons go through the normal upload path, so they are stored and normalized
+once per distinct image. Subscriptions are bulk-inserted, which skips the
+per-write hooks: next_billing_date is filled in here and spend rollups are
+built on the first history request (or by ``flask rollups backfill``).
+
+The same seed always produces the same data. Synthetic users get an unusable
+password hash, so nobody can log in as one; benchmarks sign tokens for them.
+"""
+import base64
+import io
+import random
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+from PIL import Image, ImageDraw
+
+from ..db import db
+from ..models import Category, ExchangeRate, PeriodUnit, Subscription, User
+from .billing import next_billing_date
+from .icons import icon_reference
+
+INSERT_CHUNK = 5000
+# Not a werkzeug hash, so check_password_hash is False for every password.
+UNUSABLE_PASSWORD_HASH = "!synthetic"
+ICON_POOL_SIZE = 24
+CATEGORIES = (
+    ("Entertainment", "#ef4444"),
+    ("Productivity", "#22c55e"),
+    ("Education", "#3b82f6"),
+    ("Cloud", "#8b5cf6"),
+    ("Utilities", "#f59e0b"),
+    ("Health", "#ec4899"),
+)
+NAMES = (
+    "Netflix", "Spotify", "Notion", "Coursera", "GitHub", "iCloud", "Dropbox", "Figma", "Slack",
+    "YouTube Premium", "Disney+", "1Password", "Duolingo", "Headspace", "AWS", "Linear", "Zoom",
+)
+EMOJI = ("🎬", "🎵", "🗒️", "📚", "💻", "☁️", "📦", "🎨", "💬", "📺", "🔐", "🦉", "🧘", "💡")
+# (cycle, frequency, weight)
+CYCLES = (
+    (PeriodUnit.MONTH.value, 1, 60),
+    (PeriodUnit.YEAR.value, 1, 18),
+    (PeriodUnit.QUARTER.value, 1, 8),
+    (PeriodUnit.MONTH.value, 6, 4),
+    (PeriodUnit.WEEK.value, 1, 4),
+    (PeriodUnit.WEEK.value, 2, 3),
+    (PeriodUnit.DAY.value, 30, 3),
+)
+# currency -> (weight, rate to USD)
+CURRENCIES = {"USD": (60, 1.0), "EUR": (20, 1.08), "GBP": (10, 1.27), "JPY": (5, 0.0067), "CAD": (5, 0.73)}
+
+
+def icon_pool(rng: random.Random, size: int = ICON_POOL_SIZE) -> list[str]:
+    """Distinct small PNG logos as data URLs."""
+    pool = []
+    for index in range(size):
+        side = rng.choice((64, 128, 256))
+        color = tuple(rng.randrange(256) for _ in range(3))
+        img = Image.new("RGBA", (side, side), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(img)
+        draw.ellipse((side // 8, side // 8, side * 7 // 8, side * 7 // 8), fill=color + (255,))
+        draw.text((side // 3, side // 3), chr(ord("A") + index % 26), fill=(255, 255, 255, 255))
+        buffer = io.BytesIO()
+        img.save(buffer, "PNG")
+        pool.append("data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode("ascii"))
+    return pool
+
+
+def _subscription_row(rng: random.Random, user_id: int, category_ids: list[int], icons: list[str], today: date,
+                      icon_ratio: float) -> dict:
+    cycle, frequency, _ = rng.choices(CYCLES, weights=[weight for *_, weight in CYCLES])[0]
+    currency = rng.choices(list(CURRENCIES), weights=[weight for weight, _ in CURRENCIES.values()])[0]
+    start = today - timedelta(days=rng.randrange(3 * 365))
+    price = round(rng.uniform(1, 30) * (12 if cycle == PeriodUnit.YEAR.value else 1), 2)
+    if currency == "JPY":
+        price = round(price * 150)
+
+    row = {
+        "user_id": user_id,
+        "category_id": rng.choice(category_ids) if rng.random() < 0.9 else None,
+        "name": rng.choice(NAMES),
+        "icon": rng.choice(icons) if icons and rng.random() < icon_ratio else rng.choice(EMOJI),
+        "color": "#%06x" % rng.randrange(0x1000000),
+        "price": price,
+        "currency": currency,
+        "frequency": frequency,
+        "cycle": cycle,
+        "start_date": start,
+        "trial_enabled": False,
+        "trial_price": None,
+        "trial_end_date": None,
+        "notify_enabled": rng.random() < 0.3,
+        "remind_value": rng.randint(1, 6),
+        "remind_unit": rng.choice(("days", "weeks")),
+        "disabled": rng.random() < 0.05,
+        "created_at": datetime.combine(start, datetime.min.time()) + timedelta(seconds=rng.randrange(86400)),
+    }
+    if rng.random() < 0.15:
+        row["trial_enabled"] = True
+        row["trial_price"] = rng.choice((0.0, round(price / 2, 2)))
+        if rng.random() < 0.8:
+            row["trial_end_date"] = today + timedelta(days=rng.randint(-120, 120))
+    row["next_billing_date"] = next_billing_date(SimpleNamespace(**row), today)
+    return row
+
+
+def generate(users: int = 1, subscriptions: int = 100, seed: int = 0, icon_ratio: float = 0.3,
+             prefix: str = "synthetic") -> list[int]:
+    """Create ``users`` users with ``subscriptions`` subscriptions each; returns the user ids."""
+    rng = random.Random(seed)
+    today = date.today()
+    icons = [icon_reference(url) for url in icon_pool(rng)] if icon_ratio > 0 else []
+    user_ids = []
+    for index in range(users):
+        user = User(username=f"{prefix}-{seed}-{index}", default_currency="USD")
+        user.password_hash = UNUSABLE_PASSWORD_HASH
+        db.session.add(user)
+        db.session.flush()
+        user_ids.append(user.id)
+
+        categories = [Category(user_id=user.id, name=name, color=color) for name, color in CATEGORIES]
+        db.session.add_all(categories)
+        db.session.add_all(
+            ExchangeRate(user_id=user.id, base=code, target="USD", rate=rate)
+            for code, (_, rate) in CURRENCIES.items() if code != "USD"
+        )
+        db.session.flush()
+        category_ids = [category.id for category in categories]
+
+        for offset in range(0, subscriptions, INSERT_CHUNK):
+            count = min(INSERT_CHUNK, subscriptions - offset)
+            db.session.bulk_insert_mappings(Subscription, [
+                _subscription_row(rng, user.id, category_ids, icons, today, icon_ratio) for _ in range(count)
+            ])
+            db.session.commit()
+        db.session.commit()
+    return user_ids
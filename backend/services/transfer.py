@@ -0,0 +1,284 @@
+"""Bulk import and export of a user's subscriptions as CSV or NDJSON.
+
+Imports read the request body one row at a time and commit in batches of
+IMPORT_BATCH_SIZE, so a large file costs a handful of transactions instead of
+one per row. Exports stream rows from a server-side cursor. Categories travel
+by name and stored icons as data URLs, so an export can be imported into
+another instance.
+"""
+import base64
+import csv
+import io
+import json
+from typing import Iterable, Iterator
+
+from ..db import db
+from ..instrumentation import timed
+from ..models import Category, Icon, Subscription
+from .helpers import to_float, to_int
+from .icons import ICON_REF_PREFIX, IconTooLargeError, InvalidIconError
+from .subscription import apply_subscription_data, queue_logo_fetch
+from .user import bump_data_version
+
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+IMPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_ROWS = 200
+MAX_REPORTED_ERRORS = 100
+
+EXPORT_COLUMNS = [
+    "name",
+    "category",
+    "icon",
+    "logo_url",
+    "color",
+    "price",
+    "currency",
+    "frequency",
+    "cycle",
+    "start_date",
+    "trial_enabled",
+    "trial_price",
+    "trial_use_main_cycle",
+    "trial_frequency",
+    "trial_cycle",
+    "trial_end_date",
+    "notify_enabled",
+    "remind_value",
+    "remind_unit",
+    "disabled",
+]
+
+
+# Types a field may arrive as: CSV gives strings, NDJSON any JSON value.
+TEXT_FIELDS = (
+    "name", "category", "icon", "logo_url", "color", "currency", "cycle", "start_date", "trial_cycle",
+    "trial_end_date", "remind_unit",
+)
+NUMBER_FIELDS = ("category_id", "price", "frequency", "trial_price", "trial_frequency", "remind_value")
+FLAG_FIELDS = ("trial_enabled", "trial_use_main_cycle", "notify_enabled", "disabled")
+
+
+class RowError(Exception):
+    pass
+
+
+class ImportStreamError(Exception):
+    """The body stopped being readable; rows before ``row`` were imported as usual."""
+
+    def __init__(self, code: str, row: int, report: dict):
+        super().__init__(code)
+        self.code = code
+        self.row = row
+        self.report = report
+
+
+def detect_format(requested: str | None, content_type: str | None) -> str | None:
+    if requested:
+        return requested.lower() if requested.lower() in FORMATS else None
+    mimetype = (content_type or "").split(";")[0].strip().lower()
+    if mimetype in ("text/csv", "application/csv"):
+        return "csv"
+    if mimetype in ("application/x-ndjson", "application/jsonl", "application/json-seq"):
+        return "ndjson"
+    return None
+
+
+def _csv_rows(text: io.TextIOBase) -> Iterator[dict | Exception]:
+    for row in csv.DictReader(text):
+        # Empty cells mean "not given", so the same defaults apply as for JSON.
+        yield {key: value for key, value in row.items() if key and value not in (None, "")}
+
+
+def _ndjson_rows(text: io.TextIOBase) -> Iterator[dict | Exception]:
+    for line in text:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield RowError("invalid_json")
+
+
+def _validate(row) -> dict:
+    if isinstance(row, Exception):
+        raise row
+    if not isinstance(row, dict):
+        raise RowError("invalid_row")
+    for field in TEXT_FIELDS:
+        if row.get(field) is not None and not isinstance(row[field], str):
+            raise RowError(f"invalid_{field}")
+    for field in NUMBER_FIELDS:
+        if row.get(field) is not None and (isinstance(row[field], bool) or not isinstance(row[field], (str, int, float))):
+            raise RowError(f"invalid_{field}")
+    for field in FLAG_FIELDS:
+        if row.get(field) is not None and not isinstance(row[field], (str, int, bool)):
+            raise RowError(f"invalid_{field}")
+    name = row.get("name")
+    if not isinstance(name, str) or not name.strip():
+        raise RowError("name_required")
+    if row.get("price") not in (None, "") and to_float(row["price"]) is None:
+        raise RowError("invalid_price")
+    return row
+
+
+class _CategoryResolver:
+    """Map imported category names to the user's categories, creating missing ones."""
+
+    def __init__(self, user):
+        self.user = user
+        self.ids = set()
+        self.by_name = {}
+        for category in Category.query.filter_by(user_id=user.id):
+            self.ids.add(category.id)
+            self.by_name.setdefault(category.name.strip().lower(), category.id)
+
+    def check(self, row: dict) -> None:
+        raw = row.get("category_id")
+        if raw in (None, "", "all"):
+            return
+        if to_int(raw) not in self.ids:
+            raise RowError("unknown_category")
+
+    def assign(self, sub: Subscription, name) -> None:
+        if sub.category_id is not None or not isinstance(name, str) or not name.strip():
+            return
+        key = name.strip().lower()
+        if key not in self.by_name:
+            category = Category(user_id=self.user.id, name=name.strip())
+            db.session.add(category)
+            db.session.flush()
+            self.ids.add(category.id)
+            self.by_name[key] = category.id
+        sub.category_id = self.by_name[key]
+
+
+def _commit_batch(user) -> None:
+    bump_data_version(user)
+    db.session.commit()
+
+
+@timed
+def import_subscriptions(user, stream, fmt: str) -> dict:
+    """Create a subscription per row of ``stream``; returns counts and per-row errors.
+
+    Rows are numbered from 1 (the CSV header is not counted). Valid rows are
+    kept even when others fail. A body that is not UTF-8 or not parseable CSV
+    raises ImportStreamError once the rows before the bad spot are committed.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    rows: Iterable = _csv_rows(text) if fmt == "csv" else _ndjson_rows(text)
+    categories = _CategoryResolver(user)
+
+    imported = 0
+    pending = 0
+    failed = 0
+    errors = []
+    number = 0
+    try:
+        for number, row in enumerate(rows, start=1):
+            try:
+                data = _validate(row)
+                category_name = data.pop("category", None)
+                categories.check(data)
+                sub = Subscription(user_id=user.id)
+                apply_subscription_data(sub, data, default_currency=user.default_currency, partial=False)
+                categories.assign(sub, category_name)
+            except (RowError, IconTooLargeError, InvalidIconError, TypeError, ValueError) as exc:
+                failed += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"row": number, "error": _error_code(exc)})
+                continue
+            db.session.add(sub)
+            queue_logo_fetch(sub, data)
+            pending += 1
+            if pending >= IMPORT_BATCH_SIZE:
+                _commit_batch(user)
+                imported += pending
+                pending = 0
+    except (UnicodeDecodeError, csv.Error) as exc:
+        stream_error = "invalid_encoding" if isinstance(exc, UnicodeDecodeError) else "invalid_csv"
+    else:
+        stream_error = None
+
+    if pending:
+        _commit_batch(user)
+        imported += pending
+    report = {"imported": imported, "failed": failed, "errors": errors}
+    if stream_error:
+        raise ImportStreamError(stream_error, number + 1, report)
+    return report
+
+
+def _error_code(exc: Exception) -> str:
+    if isinstance(exc, IconTooLargeError):
+        return "icon_too_large"
+    if isinstance(exc, InvalidIconError):
+        return "invalid_icon"
+    if not isinstance(exc, RowError):
+        return "invalid_row"
+    return str(exc)
+
+
+class _IconInliner:
+    """Turn ``icon:<hash>`` references into data URLs, loading each image once."""
+
+    def __init__(self):
+        self.cache = {}
+
+    def __call__(self, value):
+        if not isinstance(value, str) or not value.startswith(ICON_REF_PREFIX):
+            return value
+        digest = value[len(ICON_REF_PREFIX):]
+        if digest not in self.cache:
+            icon = db.session.get(Icon, digest)
+            self.cache[digest] = (
+                f"data:{icon.content_type};base64,{base64.b64encode(icon.data).decode('ascii')}" if icon else None
+            )
+        return self.cache[digest]
+
+
+def _export_row(sub: Subscription, category_names: dict, inline_icon) -> dict:
+    # "category" is the relationship on the model; reading it would lazy-load a row per subscription.
+    row = {column: getattr(sub, column, None) for column in EXPORT_COLUMNS if column != "category"}
+    row["category"] = category_names.get(sub.category_id)
+    row["icon"] = inline_icon(sub.icon)
+    for column in ("start_date", "trial_end_date"):
+        row[column] = row[column].isoformat() if row[column] else None
+    return row
+
+
+def export_subscriptions(user, fmt: str) -> Iterator[str]:
+    """Yield the user's subscriptions as CSV or NDJSON text chunks.
+
+    Rows come from a server-side cursor (``yield_per``), so memory stays flat
+    whatever the size of the account.
+    """
+    category_names = dict(
+        db.session.query(Category.id, Category.name).filter(Category.user_id == user.id).all()
+    )
+    inline_icon = _IconInliner()
+    result = db.session.execute(
+        db.select(Subscription)
+        .filter_by(user_id=user.id)
+        .order_by(Subscription.id)
+        .execution_options(yield_per=EXPORT_CHUNK_ROWS)
+    ).scalars()
+
+    buffer = io.StringIO()
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+        writer.writeheader()
+    for count, sub in enumerate(result, start=1):
+        row = _export_row(sub, category_names, inline_icon)
+        if writer is not None:
+            writer.writerow(row)
+        else:
+            buffer.write(json.dumps(row, ensure_ascii=False) + "\n")
+        if count % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -1,12 +1,55 @@
+from sqlalchemy.orm import load_only
+
 from ..db import db
 from ..models import User
 
+# Columns read by the controllers, stats and serializers on every request. Anything
+# else (e.g. password_hash) is loaded on first access.
+REQUEST_USER_COLUMNS = (
+    User.id,
+    User.username,
+    User.default_currency,
+    User.notifications_enabled,
+    User.data_version,
+)
+# Reserved for the account anonymous requests use while nobody has registered.
+DEMO_USERNAME = "demo"
+
+
+def load_user(user_id: int) -> User | None:
+    return db.session.get(User, user_id, options=[load_only(*REQUEST_USER_COLUMNS)])
+
 
 def get_or_create_demo_user() -> User:
-    user = User.query.get(1)
+    user = (
+        User.query.options(load_only(*REQUEST_USER_COLUMNS))
+        .filter_by(username=DEMO_USERNAME)
+        .first()
+    )
     if not user:
-        user = User(username="demo")
+        user = User(username=DEMO_USERNAME)
         user.set_password("demo")
         db.session.add(user)
         db.session.commit()
     return user
+
+
+def has_registered_users() -> bool:
+    """True once any account other than the demo one exists."""
+    return db.session.query(User.id).filter(User.username != DEMO_USERNAME).first() is not None
+
+
+def bump_data_version(user: User) -> None:
+    """Mark the user's data as changed; call before committing a write.
+
+    Every write path that changes what a read endpoint returns must call this:
+    cached stats and the ETags of conditional GETs are keyed on the version.
+
+    The increment runs in SQL so concurrent writers from different workers never
+    end up sharing a version. The in-memory attribute is refreshed after commit.
+    """
+    User.query.filter_by(id=user.id).update(
+        {User.data_version: User.data_version + 1}, synchronize_session=False
+    )
+    # Picked up after commit by listeners such as the reminder scheduler.
+    db.session.info.setdefault("touched_users", set()).add(user.id)
@@ -68,7 +68,7 @@ export default {
 
     const hasImage = computed(() => {
       const icon = props.sub?.icon || '';
-      return typeof icon === 'string' && (icon.startsWith('data:') || icon.startsWith('http'));
+      return typeof icon === 'string' && (icon.startsWith('data:') || icon.startsWith('http') || icon.startsWith('/api/icons/'));
     });
     const iconSrc = computed(() => (hasImage.value ? props.sub.icon : null));
     const iconText = computed(() => (hasImage.value ? '' : (props.sub?.icon || '✨')));
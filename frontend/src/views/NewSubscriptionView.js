@@ -67,7 +67,7 @@ export default {
       { label: 'week(s)', value: 'weeks' },
     ];
 
-    const previewIsImage = computed(() => typeof form.icon === 'string' && (form.icon.startsWith('data:') || form.icon.startsWith('http')));
+    const previewIsImage = computed(() => typeof form.icon === 'string' && (form.icon.startsWith('data:') || form.icon.startsWith('http') || form.icon.startsWith('/api/icons/')));
     const previewIconText = computed(() => {
       if (previewIsImage.value) return '';
       if (form.icon && form.icon !== '✨') return form.icon;
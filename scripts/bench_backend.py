@@ -0,0 +1,261 @@
+"""Benchmark the backend's read and write paths at several data sizes.
+
+For each size a fresh SQLite database gets one synthetic user with that many
+subscriptions (see backend/services/synthetic.py). Every service function and
+API endpoint below then runs --repeat times after one warm-up call. Each case
+reports latency percentiles, SQL statements per call and peak Python memory
+(tracemalloc, measured in a separate call). The stats cache is disabled, so
+stats timings are the computation itself.
+
+Results go to --output as JSON; --compare prints the change against an
+earlier file.
+
+    python -m scripts.bench_backend [--sizes 10,1000,10000,100000] [--repeat 10]
+        [--only stats] [--output bench.json] [--compare previous.json]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from sqlalchemy import event
+
+DEFAULT_SIZES = "10,1000,10000,100000"
+NEW_SUBSCRIPTION = {"name": "Bench", "price": 9.99, "currency": "EUR", "frequency": 1, "cycle": "month"}
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def service_cases(created: list[int]):
+    from backend.services.renewals import upcoming_renewals
+    from backend.services.rollups import spend_history
+    from backend.services.stats import build_summary, stats_by_category
+    from backend.services.subscription import (
+        create_subscription,
+        delete_subscription,
+        list_subscriptions,
+        page_subscriptions,
+        subscription_to_dict,
+        update_subscription,
+    )
+    from backend.services.subscription_batch import apply_batch
+
+    def create(user):
+        created.append(create_subscription(user, NEW_SUBSCRIPTION).id)
+
+    def batch(user):
+        ids = created[-50:]
+        apply_batch(user, [{"op": "update", "ids": ids, "data": {"color": "#123456"}}])
+
+    return [
+        ("list_subscriptions", lambda user: [subscription_to_dict(sub) for sub in list_subscriptions(user)]),
+        ("page_subscriptions", lambda user: [subscription_to_dict(sub) for sub in page_subscriptions(user, limit=50)[0]]),
+        ("build_summary", lambda user: build_summary(user, "month", None)),
+        ("stats_by_category", lambda user: stats_by_category(user, "month")),
+        ("upcoming_renewals", lambda user: upcoming_renewals(user, 30)),
+        ("spend_history", lambda user: spend_history(user)),
+        ("create_subscription", create),
+        ("update_subscription", lambda user: update_subscription(user, created[0], {"price": 12.5}, partial=True)),
+        ("apply_batch(50 updates)", batch),
+        ("delete_subscription", lambda user: delete_subscription(user, created.pop())),
+    ]
+
+
+def endpoint_cases(created: list[int]):
+    def create(client):
+        created.append(client.post("/api/subscriptions", json=NEW_SUBSCRIPTION).json["id"])
+
+    return [
+        ("GET /api/subscriptions", lambda client: client.get("/api/subscriptions")),
+        ("GET /api/subscriptions?limit=50", lambda client: client.get("/api/subscriptions?limit=50")),
+        ("GET /api/stats/summary", lambda client: client.get("/api/stats/summary?period=month")),
+        ("GET /api/stats/by-category", lambda client: client.get("/api/stats/by-category?period=month")),
+        ("GET /api/renewals", lambda client: client.get("/api/renewals?days=30")),
+        ("GET /api/stats/history", lambda client: client.get("/api/stats/history")),
+        ("POST /api/subscriptions", create),
+        ("PATCH /api/subscriptions/<id>", lambda client: client.patch(f"/api/subscriptions/{created[0]}", json={"price": 3})),
+        ("DELETE /api/subscriptions/<id>", lambda client: client.delete(f"/api/subscriptions/{created.pop()}")),
+    ]
+
+
+def _measure(run, repeat: int, counter: StatementCounter) -> dict:
+    run()  # warm-up: imports, rate matrix, lazy rollups
+    samples = []
+    statements = 0
+    for _ in range(repeat):
+        before = counter.count
+        started = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - started)
+        statements += counter.count - before
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "runs": repeat,
+        "p50_ms": statistics.median(samples) * 1000,
+        "p90_ms": _percentile(samples, 0.90) * 1000,
+        "p99_ms": _percentile(samples, 0.99) * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "max_ms": max(samples) * 1000,
+        "statements": statements / repeat,
+        "peak_kib": peak / 1024,
+    }
+
+
+def run_size(size: int, repeat: int, only: str | None) -> tuple[dict, list[dict]]:
+    tmp_dir = tempfile.mkdtemp(prefix=f"roo-bench-{size}-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+
+    from backend.app import create_app
+    from backend.db import db
+    from backend.services.auth import issue_token
+    from backend.services.rollups import rollup_user
+    from backend.services.synthetic import generate
+    from backend.services.user import load_user
+
+    app = create_app()
+    results = []
+    with app.app_context():
+        started = time.perf_counter()
+        (user_id,) = generate(users=1, subscriptions=size, seed=size)
+        setup = {"generate_s": time.perf_counter() - started}
+        started = time.perf_counter()
+        rollup_user(user_id)
+        db.session.commit()
+        setup["rollup_backfill_s"] = time.perf_counter() - started
+        counter = StatementCounter(db.engine)
+        token = issue_token(load_user(user_id))
+
+        created = _seed_ids(user_id)
+        for name, fn in service_cases(created):
+            if only and only not in name:
+                continue
+
+            def run(fn=fn):
+                db.session.remove()
+                fn(load_user(user_id))
+
+            results.append({"size": size, "kind": "service", "name": name, **_measure(run, repeat, counter)})
+
+    client = app.test_client()
+    client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+    with app.app_context():
+        created = _seed_ids(user_id)
+    for name, fn in endpoint_cases(created):
+        if only and only not in name:
+            continue
+
+        def run(fn=fn, name=name):
+            response = fn(client)
+            if response is not None and response.status_code >= 400:
+                raise RuntimeError(f"{name}: HTTP {response.status_code}")
+
+        results.append({"size": size, "kind": "endpoint", "name": name, **_measure(run, repeat, counter)})
+    return setup, results
+
+
+def _seed_ids(user_id: int) -> list[int]:
+    """Start the id list with an existing subscription, which the update cases patch."""
+    from backend.models import Subscription
+
+    first = Subscription.query.filter_by(user_id=user_id).order_by(Subscription.id).first()
+    return [first.id] if first else []
+
+
+def _metadata(args) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "stats_engine": os.environ.get("STATS_ENGINE", "python"),
+    }
+
+
+def _print_table(results: list[dict], previous: dict | None) -> None:
+    header = f"{'size':>7} {'case':36} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'SQL':>6} {'peak KiB':>9}"
+    print(header + ("  vs prev p50" if previous else ""))
+    for r in results:
+        line = (
+            f"{r['size']:7d} {r['name']:36} {r['p50_ms']:9.2f} {r['p90_ms']:9.2f} {r['p99_ms']:9.2f} "
+            f"{r['statements']:6.1f} {r['peak_kib']:9.0f}"
+        )
+        old = (previous or {}).get((r["size"], r["kind"], r["name"]))
+        if old and old["p50_ms"] > 0:
+            line += f"  {r['p50_ms'] / old['p50_ms']:6.2f}x"
+            if old["statements"] != r["statements"]:
+                line += f" (SQL {old['statements']:.1f} -> {r['statements']:.1f})"
+        print(line)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated subscription counts")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--only", help="only cases whose name contains this text")
+    parser.add_argument("--output", default="bench.json")
+    parser.add_argument("--compare", help="earlier --output file to compare against")
+    args = parser.parse_args(argv)
+
+    # Measure the computation, not the stats cache; keep background threads off.
+    os.environ["STATS_CACHE_SIZE"] = "0"
+    os.environ["REMINDERS_ENABLED"] = "0"
+    # The cases authenticate with a bearer token, which the default key refuses.
+    os.environ.setdefault("SECRET_KEY", "bench-" + os.urandom(8).hex())
+    # Migration and request logging would drown the report.
+    logging.disable(logging.INFO)
+
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            previous = {(r["size"], r["kind"], r["name"]): r for r in json.load(fh)["results"]}
+
+    report = {"meta": _metadata(args), "setup": {}, "results": []}
+    for size in (int(value) for value in args.sizes.split(",")):
+        setup, results = run_size(size, args.repeat, args.only)
+        report["setup"][str(size)] = setup
+        report["results"].extend(results)
+        print(f"\n{size} subscriptions: generated in {setup['generate_s']:.1f}s, "
+              f"rollups backfilled in {setup['rollup_backfill_s']:.1f}s")
+        _print_table(results, previous)
+
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"\nWrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Compare dominant-color extraction: ColorThief(quality=1) vs backend.services.color.
+
+Uses the icons in --corpus (png, ico, gif, jpg, webp) or, without one, a
+generated set of sample icons from 16px to 512px with transparency, white
+backgrounds and gradients.
+
+    python -m scripts.bench_color [--corpus DIR] [--repeat 5]
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+from colorthief import ColorThief
+from PIL import Image, ImageDraw
+
+from backend.services.color import compute_dominant_color, dominant_color
+
+EXTENSIONS = {".png", ".ico", ".gif", ".jpg", ".jpeg", ".webp", ".bmp"}
+
+
+def _encode(img: Image.Image, fmt: str = "PNG") -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def generated_corpus() -> list[tuple[str, bytes]]:
+    corpus = []
+    palette = [(229, 9, 20), (29, 185, 84), (66, 133, 244), (255, 153, 0), (124, 58, 237)]
+    for size in (16, 32, 64, 128, 256, 512):
+        for index, color in enumerate(palette):
+            # Logo on a transparent background
+            img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+            draw = ImageDraw.Draw(img)
+            draw.ellipse((size // 8, size // 8, size * 7 // 8, size * 7 // 8), fill=color + (255,))
+            corpus.append((f"transparent-{size}-{index}.png", _encode(img)))
+
+            # Logo on white with a dark glyph
+            img = Image.new("RGB", (size, size), (255, 255, 255))
+            draw = ImageDraw.Draw(img)
+            draw.rectangle((size // 6, size // 6, size * 5 // 6, size * 5 // 6), fill=color)
+            draw.rectangle((size // 3, size // 3, size * 2 // 3, size * 2 // 3), fill=(0, 0, 0))
+            corpus.append((f"white-{size}-{index}.jpg", _encode(img, "JPEG")))
+
+            # Horizontal gradient
+            img = Image.new("RGB", (size, size))
+            draw = ImageDraw.Draw(img)
+            for x in range(size):
+                shade = tuple(int(channel * (0.5 + x / (2 * size))) for channel in color)
+                draw.line((x, 0, x, size), fill=shade)
+            corpus.append((f"gradient-{size}-{index}.png", _encode(img)))
+    return corpus
+
+
+def load_corpus(directory: str) -> list[tuple[str, bytes]]:
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        if os.path.splitext(name)[1].lower() in EXTENSIONS:
+            with open(os.path.join(directory, name), "rb") as fh:
+                corpus.append((name, fh.read()))
+    return corpus
+
+
+def colorthief_color(data: bytes) -> str | None:
+    rgb = ColorThief(io.BytesIO(data)).get_color(quality=1)
+    return "#%02x%02x%02x" % rgb if rgb else None
+
+
+def _time(fn, corpus, repeat: int) -> tuple[list[float], dict]:
+    samples = []
+    results = {}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for name, data in corpus:
+            try:
+                results[name] = fn(data)
+            except Exception:
+                results[name] = None
+        samples.append(time.perf_counter() - started)
+    return samples, results
+
+
+def _distance(a: str | None, b: str | None) -> float | None:
+    if not a or not b:
+        return None
+    ca = [int(a[i:i + 2], 16) for i in (1, 3, 5)]
+    cb = [int(b[i:i + 2], 16) for i in (1, 3, 5)]
+    return sum((x - y) ** 2 for x, y in zip(ca, cb)) ** 0.5
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="directory of sample icons")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus) if args.corpus else generated_corpus()
+    if not corpus:
+        print("No images found.", file=sys.stderr)
+        return 1
+    total_bytes = sum(len(data) for _, data in corpus)
+    print(f"{len(corpus)} images, {total_bytes / 1024:.0f} KiB, {args.repeat} runs each\n")
+
+    runs = [
+        ("colorthief(quality=1)", colorthief_color),
+        ("color.compute_dominant_color", compute_dominant_color),
+        ("color.dominant_color (memoized)", dominant_color),
+    ]
+    baseline = None
+    reference = None
+    print(f"{'method':34} {'median ms':>10} {'per image ms':>13} {'speedup':>8}")
+    for label, fn in runs:
+        samples, results = _time(fn, corpus, args.repeat)
+        median = statistics.median(samples)
+        baseline = baseline or median
+        reference = reference or results
+        print(f"{label:34} {median * 1000:10.1f} {median * 1000 / len(corpus):13.3f} {baseline / median:7.1f}x")
+
+    _, ours = _time(compute_dominant_color, corpus, 1)
+    distances = [d for d in (_distance(reference[name], ours[name]) for name, _ in corpus) if d is not None]
+    if distances:
+        print(
+            f"\nRGB distance to ColorThief: median {statistics.median(distances):.1f}, "
+            f"max {max(distances):.1f} (over {len(distances)} images)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Print SQLite's EXPLAIN QUERY PLAN for every SELECT the hot service paths issue.
+
+Runs the list, stats, category and exchange-rate services against a throwaway
+database (or DATABASE_URL with --use-env), captures the statements they execute
+and explains each one with its original parameters, so it is easy to confirm the
+composite indexes are used and no full table scans remain.
+
+    python -m scripts.explain_query_plans
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+from sqlalchemy import event
+
+
+def _capture(engine, statements):
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    return lambda: event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--use-env", action="store_true", help="explain against DATABASE_URL instead of a temp database")
+    args = parser.parse_args(argv)
+
+    if not args.use_env:
+        tmp_dir = tempfile.mkdtemp(prefix="roo-explain-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'explain.db')}"
+
+    from backend.app import create_app
+    from backend.db import db
+    from backend.services.category import list_categories
+    from backend.services.exchange import list_exchange_rates, upsert_exchange_rate
+    from backend.services.renewals import upcoming_renewals
+    from backend.services.seed import seed_defaults
+    from backend.services.stats import build_summary, stats_by_category
+    from backend.services.subscription import list_subscriptions, page_subscriptions
+    from backend.services.user import get_or_create_demo_user
+
+    app = create_app()
+    with app.app_context():
+        if db.engine.dialect.name != "sqlite":
+            print("EXPLAIN QUERY PLAN is SQLite specific; DATABASE_URL is not a SQLite database.", file=sys.stderr)
+            return 1
+
+        user = get_or_create_demo_user()
+        seed_defaults(user)
+        upsert_exchange_rate(user, {"base": "EUR", "target": user.default_currency, "rate": 1.1})
+        category_id = list_categories(user)[0].id
+
+        calls = [
+            ("list_subscriptions", lambda: list_subscriptions(user)),
+            ("list_subscriptions(category)", lambda: list_subscriptions(user, str(category_id))),
+            ("page_subscriptions", lambda: page_subscriptions(
+                user, limit=2, cursor=page_subscriptions(user, limit=2)[1]
+            )),
+            ("page_subscriptions(category)", lambda: page_subscriptions(
+                user, str(category_id), limit=1, cursor=page_subscriptions(user, str(category_id), limit=1)[1]
+            )),
+            ("list_categories", lambda: list_categories(user)),
+            ("upcoming_renewals", lambda: upcoming_renewals(user, 30)),
+            ("list_exchange_rates", lambda: list_exchange_rates(user)),
+        ]
+        for engine_name in ("python", "numpy", "sql"):
+            def run_stats(engine_name=engine_name):
+                app.config["STATS_ENGINE"] = engine_name
+                build_summary(user, "month", None)
+                build_summary(user, "month", str(category_id))
+                stats_by_category(user, "month")
+            calls.append((f"stats[{engine_name}]", run_stats))
+
+        full_scans = 0
+        for label, call in calls:
+            statements = []
+            stop = _capture(db.engine, statements)
+            try:
+                call()
+            finally:
+                stop()
+            for statement, parameters in statements:
+                plan = db.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+                print(f"== {label}")
+                print("   " + " ".join(statement.split()))
+                for row in plan:
+                    detail = row[-1]
+                    if detail.startswith("SCAN") and "USING" not in detail:
+                        full_scans += 1
+                    print(f"   -> {detail}")
+                print()
+
+        print(f"{full_scans} full table scan(s) found.")
+        return 1 if full_scans else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""Compare SQLite lock errors and latency with and without the database profile.
+
+Starts --workers processes, each with its own app (as gunicorn workers
+would), against a fresh database file per profile. Each worker mixes list
+reads with creates and patches for --seconds. The "legacy" profile applies no
+pragmas (rollback journal, synchronous=FULL, pysqlite's default 5 s busy
+handler), like the app did before SQLITE_* settings existed. The "default"
+profile uses the shipped WAL settings.
+
+    python -m scripts.sqlite_concurrency [--workers 8] [--seconds 10] [--write-ratio 0.3]
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from backend.db_profile import SQLITE_PRAGMA_DEFAULTS
+
+PROFILES = {
+    "legacy": {f"SQLITE_{name.upper()}": "" for name in SQLITE_PRAGMA_DEFAULTS},
+    "default": {},
+}
+
+
+def _create_app(env: dict):
+    os.environ.update(env)
+    # Failed requests are counted below; their tracebacks would drown the report.
+    logging.disable(logging.CRITICAL)
+    from backend.app import create_app
+
+    return create_app()
+
+
+def _setup(env: dict):
+    """Migrate and seed once, so workers only take the schema fast path."""
+    _create_app(env).test_client().get("/api/seed")
+
+
+def _worker(env: dict, seconds: float, write_ratio: float, seed: int, results):
+    from flask import got_request_exception
+
+    app = _create_app(env)
+    lock_errors = []
+    got_request_exception.connect(
+        lambda sender, exception, **extra: lock_errors.append(1) if "locked" in str(exception) else None, app
+    )
+    client = app.test_client()
+    rng = random.Random(seed)
+    latencies = []
+    errors = 0
+    own_ids = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        if rng.random() < write_ratio:
+            if own_ids and rng.random() < 0.5:
+                response = client.patch(
+                    f"/api/subscriptions/{rng.choice(own_ids)}", json={"price": rng.randint(1, 50)}
+                )
+            else:
+                response = client.post("/api/subscriptions", json={"name": f"w{seed}", "price": 1})
+                if response.status_code == 201:
+                    own_ids.append(response.json["id"])
+        else:
+            response = client.get("/api/subscriptions")
+        latencies.append(time.perf_counter() - started)
+        if response.status_code >= 500:
+            errors += 1
+    results.put((latencies, errors, len(lock_errors)))
+
+
+def run_profile(name: str, workers: int, seconds: float, write_ratio: float) -> dict:
+    tmp_dir = tempfile.mkdtemp(prefix=f"roo-concurrency-{name}-")
+    env = {"DATABASE_URL": f"sqlite:///{os.path.join(tmp_dir, 'app.db')}", **PROFILES[name]}
+
+    ctx = multiprocessing.get_context("spawn")
+    setup = ctx.Process(target=_setup, args=(env,))
+    setup.start()
+    setup.join()
+
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(env, seconds, write_ratio, i, results)) for i in range(workers)]
+    for proc in procs:
+        proc.start()
+    collected = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+
+    latencies = sorted(lat for lats, _, _ in collected for lat in lats)
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors, _ in collected),
+        "lock_errors": sum(locks for _, _, locks in collected),
+        "throughput": len(latencies) / seconds,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--write-ratio", type=float, default=0.3)
+    parser.add_argument("--profile", choices=sorted(PROFILES), action="append", help="run only these profiles")
+    args = parser.parse_args(argv)
+
+    print(f"{args.workers} workers, {args.seconds:g}s, {args.write_ratio:.0%} writes\n")
+    print(f"{'profile':8} {'requests':>9} {'req/s':>8} {'5xx':>6} {'locked':>7} {'p50 ms':>8} {'p95 ms':>8}")
+    for name in args.profile or ["legacy", "default"]:
+        r = run_profile(name, args.workers, args.seconds, args.write_ratio)
+        print(
+            f"{name:8} {r['requests']:9d} {r['throughput']:8.1f} {r['errors']:6d} {r['lock_errors']:7d} "
+            f"{r['p50_ms']:8.2f} {r['p95_ms']:8.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""Credentials signed with the public default SECRET_KEY are never accepted."""
+import pytest
+from itsdangerous import URLSafeTimedSerializer
+
+from backend.app import create_app
+from backend.db import db
+from backend.services.auth import DEFAULT_SECRET_KEY, TOKEN_SALT
+from backend.services.user import get_or_create_demo_user
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv("JOB_WORKERS", "0")
+    monkeypatch.delenv("SECRET_KEY", raising=False)
+    app = create_app()
+    with app.app_context():
+        get_or_create_demo_user()
+        db.session.remove()
+    # No app context held open: requests must not share flask.g.
+    return app
+
+
+def _forged(user_id: int) -> str:
+    return URLSafeTimedSerializer(DEFAULT_SECRET_KEY, salt=TOKEN_SALT).dumps({"uid": user_id})
+
+
+def test_token_signed_with_default_key_is_rejected(app):
+    response = app.test_client().get("/api/profile", headers={"Authorization": f"Bearer {_forged(1)}"})
+    assert response.status_code == 401
+
+
+def test_session_cookie_under_default_key_is_rejected(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = 1
+    assert client.get("/api/profile").status_code == 401
+
+
+def test_login_is_refused_under_default_key(app):
+    response = app.test_client().post("/api/auth/login", json={"username": "demo", "password": "demo"})
+    assert response.status_code == 503
+
+
+def test_token_accepted_once_a_key_is_configured(app):
+    app.config["SECRET_KEY"] = "configured"
+    client = app.test_client()
+    token = client.post("/api/auth/register", json={"username": "alice", "password": "password1"}).json["token"]
+    assert client.get("/api/profile", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+    forged = app.test_client().get("/api/profile", headers={"Authorization": f"Bearer {_forged(2)}"})
+    assert forged.status_code == 401
@@ -0,0 +1,130 @@
+"""Favicon cache behaviour against a local stand-in for the favicon service.
+
+Run with ``python -m pytest tests`` from the repository root.
+"""
+import io
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+from backend.app import create_app
+from backend.db import db
+from backend.models import FaviconCacheEntry
+from backend.services import favicon
+from backend.services.favicon import FetchFailedError, fetch_favicon_payload
+
+MISSING_DOMAIN = "missing.example"
+
+
+def _png() -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (16, 16), (200, 40, 40)).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class FaviconService(BaseHTTPRequestHandler):
+    """Serves a PNG for every domain except MISSING_DOMAIN, counting requests per domain."""
+
+    hits: Counter = Counter()
+    body = _png()
+
+    def do_GET(self):
+        domain = self.path.strip("/").split("?")[0]
+        self.hits[domain] += 1
+        if domain == MISSING_DOMAIN:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def service_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FaviconService)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/{{domain}}?sz={{size}}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch, service_url):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv("JOB_WORKERS", "0")
+    monkeypatch.setenv("FAVICON_SERVICE_URL", service_url)
+    monkeypatch.setenv("FAVICON_CACHE_MAX_ENTRIES", "2")
+    FaviconService.hits.clear()
+    app = create_app()
+    with app.app_context():
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    """Counts dominant-color extractions, i.e. image decodes."""
+    calls = []
+    original = favicon.dominant_color
+
+    def counting(data):
+        calls.append(len(data))
+        return original(data)
+
+    monkeypatch.setattr(favicon, "dominant_color", counting)
+    return calls
+
+
+def test_hit_skips_network_and_decoding(app, decodes):
+    first = fetch_favicon_payload("https://one.example/path")
+    second = fetch_favicon_payload("one.example")
+
+    assert FaviconService.hits["one.example"] == 1
+    assert len(decodes) == 1
+    assert second["favicon_data"] == first["favicon_data"]
+    assert second["color"] == first["color"]
+
+
+def test_failure_is_cached_until_negative_ttl(app):
+    for _ in range(3):
+        with pytest.raises(FetchFailedError):
+            fetch_favicon_payload(MISSING_DOMAIN)
+    assert FaviconService.hits[MISSING_DOMAIN] == 1
+
+    entry = FaviconCacheEntry.query.filter_by(domain=MISSING_DOMAIN).one()
+    assert entry.failed
+    assert entry.expires_at <= datetime.utcnow() + timedelta(seconds=app.config["FAVICON_NEGATIVE_TTL"])
+
+    entry.expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    with pytest.raises(FetchFailedError):
+        fetch_favicon_payload(MISSING_DOMAIN)
+    assert FaviconService.hits[MISSING_DOMAIN] == 2
+
+
+def test_least_recently_used_entries_are_evicted(app):
+    fetch_favicon_payload("a.example")
+    fetch_favicon_payload("b.example")
+    # Make a.example the most recently used entry.
+    FaviconCacheEntry.query.filter_by(domain="b.example").update(
+        {FaviconCacheEntry.last_accessed_at: datetime.utcnow() - timedelta(days=1)}
+    )
+    db.session.commit()
+
+    fetch_favicon_payload("c.example")
+
+    domains = {entry.domain for entry in FaviconCacheEntry.query.all()}
+    assert domains == {"a.example", "c.example"}
+    fetch_favicon_payload("b.example")
+    assert FaviconService.hits["b.example"] == 2
+    assert FaviconCacheEntry.query.count() == 2
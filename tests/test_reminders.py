@@ -0,0 +1,52 @@
+"""A due reminder reaches the configured sink through the scheduler thread."""
+import json
+import time
+from datetime import date
+
+import pytest
+
+from backend.app import create_app
+from backend.services.reminders import reminder_scheduler
+
+
+@pytest.fixture
+def sink_path(tmp_path, monkeypatch):
+    path = tmp_path / "reminders.jsonl"
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv("JOB_WORKERS", "0")
+    monkeypatch.setenv("REMINDERS_ENABLED", "1")
+    monkeypatch.setenv("REMINDER_SINK", f"file:{path}")
+    monkeypatch.setenv("REMINDER_HOUR", "0")
+    yield path
+    reminder_scheduler.stop()
+
+
+def _wait_for_lines(path, count: int, timeout: float = 5.0) -> list[dict]:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if path.exists():
+            lines = path.read_text(encoding="utf-8").splitlines()
+            if len(lines) >= count:
+                return [json.loads(line) for line in lines]
+        time.sleep(0.05)
+    return []
+
+
+def test_due_reminder_is_written_to_the_file_sink(sink_path):
+    app = create_app()
+    client = app.test_client()
+    created = client.post("/api/subscriptions", json={
+        "name": "Netflix",
+        "price": 15.99,
+        "start_date": date.today().isoformat(),
+        "notify_enabled": True,
+        "remind_value": 1,
+        "remind_unit": "days",
+    }).json
+
+    reminders = _wait_for_lines(sink_path, 1)
+
+    assert [r["subscription_id"] for r in reminders] == [created["id"]]
+    assert reminders[0]["billing_date"] == date.today().isoformat()
+    assert reminders[0]["amount"] == 15.99
+    assert reminder_scheduler.info()["delivered"] >= 1